@@ -0,0 +1,204 @@
+"""
+Synthetic report corpus
+-
+Generates TestStand XML and ATML (IEEE 1636.1, TestStand 5.0 flavour) documents of a given size
+and shape. The output only depends on the arguments (seed included), so runs are reproducible.
+
+    teststand_xml(steps=1000, depth=3, multi_width=4, chart_points=100, fail_every=50)
+    atml(steps=1000, depth=3, uuts=10)
+
+Steps are spread evenly over depth nested sequence levels and cycle through numeric, pass/fail,
+string and multi numeric (TestStand, multi_width > 0) or action (ATML) steps; chart_points > 0
+adds a chart step per level. Neither converter reads attachments from the XML, so attachments are
+added to converted reports with add_attachments().
+"""
+import base64
+import random
+from xml.sax.saxutils import escape
+
+from report.attachment import Attachment
+
+
+def _prop(name, value=None, type_=None, children="", extra=""):
+    t = f' Type="{type_}"' if type_ else ""
+    v = f"<Value>{escape(str(value))}</Value>" if value is not None else ""
+    return f'<Prop Name="{name}"{t}{extra}>{v}{children}</Prop>'
+
+
+def _error():
+    return _prop("Error", type_="Obj", children=_prop("Code", 0, "Number") + _prop("Msg", "", "String"))
+
+
+def _ts(step_type, name, total_time=0.001, extra=""):
+    return _prop("TS", type_="Obj", children=_prop("StepType", step_type, "String") + _prop("StepName", name, "String")
+                 + _prop("StepGroup", "Main", "String") + _prop("TotalTime", total_time, "Number") + extra)
+
+
+def _teresult(status, ts, body=""):
+    return f'<Prop Type="TEResult">{_prop("Status", status, "String")}{_error()}{ts}{body}</Prop>'
+
+
+def ts_numeric(rng, i, fail=False):
+    value = rng.uniform(0, 10)
+    status = "Failed" if fail else "Passed"
+    body = (_prop("Numeric", repr(value), "Number")
+            + _prop("Limits", type_="Obj", children=_prop("Low", "0", "Number") + _prop("High", "10", "Number"))
+            + _prop("Units", "V", "String") + _prop("Comp", "GELE", "String"))
+    return _teresult(status, _ts("NumericLimitTest", f"Numeric {i}"), body)
+
+
+def ts_passfail(rng, i):
+    return _teresult("Passed", _ts("PassFailTest", f"PassFail {i}"), _prop("PassFail", "True", "Boolean"))
+
+
+def ts_string(rng, i):
+    body = _prop("String", "ABC", "String") + _prop("Comp", "IgnoreCase", "String") + _prop("Limits", type_="Obj", children=_prop("String", "abc", "String"))
+    return _teresult("Passed", _ts("StringValueTest", f"String {i}"), body)
+
+
+def ts_multi_numeric(rng, i, width):
+    values = "".join(
+        f'<Value ID="[{k}]"><Prop Name="M{k}" Type="Obj" TypeName="NI_LimitMeasurement">'
+        + _prop("Data", repr(rng.uniform(0, 10)), "Number")
+        + _prop("Limits", type_="Obj", children=_prop("Low", "0", "Number") + _prop("High", "10", "Number"))
+        + _prop("Units", "A", "String") + _prop("Status", "Passed", "String") + _prop("Comp", "GELE", "String")
+        + "</Prop></Value>" for k in range(width))
+    body = _prop("Measurement", type_="Array", children=values)
+    return _teresult("Passed", _ts("NI_MultipleNumericLimitTest", f"Multi {i}"), body)
+
+
+def ts_chart(rng, i, points):
+    data = "".join(f'<Value ID="[0][{k}]">{k}</Value>' for k in range(points)) + "".join(
+        f'<Value ID="[1][{k}]">{rng.uniform(0, 1):.4f}</Value>' for k in range(points))
+    plot = '<Value ID="[0]"><Prop Type="Obj">' + _prop("PlotName", "Plot", "String") + _prop("PlotData", type_="Array", children=data) + "</Prop></Value>"
+    chart = _prop("Chart", type_="Obj", children=_prop("ChartLabel", "Chart", "String") + _prop("Xlabel", "X", "String")
+                  + _prop("Ylabel", "Y", "String") + _prop("Xunit", "s", "String") + _prop("Yunit", "V", "String")
+                  + _prop("ChartType", "Line", "String")
+                  + _prop("Plots", type_="Array", children='<ArrayElementPrototype>' + _prop("PlotName", "Plot", "String") + '</ArrayElementPrototype>' + plot))
+    return _teresult("Passed", _ts("WATS_XYGMNLT", f"Chart {i}"), chart)
+
+
+def ts_sequence(name, results, status="Passed"):
+    seq_call = _prop("SequenceCall", type_="Obj", children=_prop("Sequence", name, "String") + _prop("SequenceFile", "c:\\seq.seq", "String")
+                     + _prop("SequenceFileVersion", "1.0.0", "String")
+                     + _prop("ResultList", type_="Array", children="".join(f'<Value ID="[{k}]">{r}</Value>' for k, r in enumerate(results))))
+    return _teresult(status, _ts("SequenceCall", name, extra=seq_call))
+
+
+def teststand_xml(steps=100, depth=1, multi_width=0, chart_points=0, fail_every=0, seed=1, sn="SN0001"):
+    rng = random.Random(seed)
+
+    def build(count, level):
+        results = []
+        for i in range(count):
+            kind = i % 4
+            if kind == 0 or (kind == 3 and not multi_width):
+                results.append(ts_numeric(rng, i, fail=bool(fail_every) and i % fail_every == 0))
+            elif kind == 1:
+                results.append(ts_passfail(rng, i))
+            elif kind == 2:
+                results.append(ts_string(rng, i))
+            else:
+                results.append(ts_multi_numeric(rng, i, multi_width))
+        if chart_points:
+            results.append(ts_chart(rng, count, chart_points))
+        if level < depth:
+            results.append(ts_sequence(f"Sub {level}", build(count, level + 1)))
+        return results
+
+    per_level = max(1, steps // max(1, depth))
+    main_results = "".join(f'<Value ID="[{k}]">{r}</Value>' for k, r in enumerate(build(per_level, 1)))
+    main = ('<Prop Name="MainSequenceResults" Type="TEResult">' + _prop("Status", "Passed", "String") + _error()
+            + _prop("TS", type_="Obj", children=_prop("TotalTime", 1.5, "Number") + _prop("SequenceCall", type_="Obj", children=
+                _prop("Sequence", "MainSequence", "String") + _prop("SequenceFile", "c:\\main.seq", "String")
+                + _prop("SequenceFileVersion", "1.0.0.0", "String") + _prop("ResultList", type_="Array", children=main_results)))
+            + "</Prop>")
+    uut = _prop("UUT", type_="Obj", children=_prop("SerialNumber", sn, "String") + _prop("UUTPartNumber", "PN-1", "String")
+                + _prop("UUTPartRevisionNumber", "A", "String") + _prop("UUTOperationType", "10", "String"))
+    station = _prop("StationInfo", type_="Obj", children=_prop("StationID", "STATION-1", "String") + _prop("LoginName", "operator", "String"))
+    start = _prop("StartTime", type_="Obj", children=_prop("Hours", 10, "Number") + _prop("Minutes", 20, "Number") + _prop("Seconds", 30, "Number"))
+    date = _prop("StartDate", type_="Obj", children=_prop("Year", 2025, "Number") + _prop("Month", 2, "Number") + _prop("MonthDay", 25, "Number"))
+    return ('<?xml version="1.0" encoding="utf-8"?>\n<?xml:stylesheet type="text/xsl" href="c:\\style.xsl"?>\n'
+            f'<Reports><Report Type="UUT" Title="UUT Report">{start}{date}{uut}{station}{main}</Report></Reports>').encode("utf-8")
+
+
+NS_50 = dict(trc="urn:IEEE-1636.1:2011:01:TestResultsCollection", tr="urn:IEEE-1636.1:2011:01:TestResults",
+             ts="www.ni.com/TestStand/ATMLTestResults/2.0", c="urn:IEEE-1671:2010:Common",
+             xsi="http://www.w3.org/2001/XMLSchema-instance")
+
+
+def _atml_props(step_type):
+    return (f'<tr:Extension><ts:TSStepProperties><ts:StepType>{step_type}</ts:StepType><ts:StepGroup>Main</ts:StepGroup>'
+            '<ts:TotalTime value="0.001"/></ts:TSStepProperties></tr:Extension>')
+
+
+def atml_numeric(rng, i, fail=False):
+    return (f'<tr:Test name="Numeric {i}">{_atml_props("NumericLimitTest")}<tr:Outcome value="{"Failed" if fail else "Passed"}"/>'
+            f'<tr:TestResult name="Numeric"><tr:TestData><c:Datum xsi:type="c:double" value="{rng.uniform(0, 10)!r}" nonStandardUnit="V"/></tr:TestData>'
+            '<tr:TestLimits><tr:Limits><c:LimitPair operator="AND"><c:Limit comparator="GE"><c:Datum value="0"/></c:Limit>'
+            '<c:Limit comparator="LE"><c:Datum value="10"/></c:Limit></c:LimitPair></tr:Limits></tr:TestLimits></tr:TestResult></tr:Test>')
+
+
+def atml_passfail(rng, i):
+    return f'<tr:Test name="PassFail {i}">{_atml_props("PassFailTest")}<tr:Outcome value="Passed"/></tr:Test>'
+
+
+def atml_string(rng, i):
+    return (f'<tr:Test name="String {i}">{_atml_props("StringValueTest")}<tr:Outcome value="Passed"/>'
+            '<tr:TestResult name="String"><tr:TestData><c:Datum xsi:type="c:string"><c:Value>ABC</c:Value></c:Datum></tr:TestData>'
+            '<tr:TestLimits><tr:Limits><c:Expected comparator="CIEQ"><c:Datum xsi:type="c:string"><c:Value>abc</c:Value></c:Datum></c:Expected>'
+            '</tr:Limits></tr:TestLimits></tr:TestResult></tr:Test>')
+
+
+def atml_action(rng, i):
+    return f'<tr:SessionAction name="Action {i}">{_atml_props("Action")}<tr:ActionOutcome value="Done"/></tr:SessionAction>'
+
+
+def atml_test_results(steps=100, depth=1, seed=1, sn="SN0001", fail_every=0, index=0):
+    rng = random.Random(seed)
+
+    def build(count, level):
+        out = []
+        for i in range(count):
+            kind = i % 4
+            if kind == 0:
+                out.append(atml_numeric(rng, i, fail=bool(fail_every) and i % fail_every == 0))
+            elif kind == 1:
+                out.append(atml_passfail(rng, i))
+            elif kind == 2:
+                out.append(atml_string(rng, i))
+            else:
+                out.append(atml_action(rng, i))
+        if level < depth:
+            out.append(f'<tr:TestGroup name="c:\\seq.seq#Sub {level}" callerName="Sub {level}">{_atml_props("SequenceCall")}'
+                       f'<tr:Outcome value="Passed"/>{"".join(build(count, level + 1))}</tr:TestGroup>')
+        return out
+
+    per_level = max(1, steps // max(1, depth))
+    return (f'<trc:TestResults uuid="{index}">'
+            '<tr:Personnel><tr:SystemOperator name="operator"/></tr:Personnel>'
+            '<tr:ResultSet name="c:\\main.seq#MainSequence" startDateTime="2025-02-25T10:20:30.125" endDateTime="2025-02-25T10:20:35.625">'
+            + "".join(build(per_level, 1)) +
+            '</tr:ResultSet>'
+            f'<tr:UUT UutType="Part"><c:Definition><c:Identification><c:IdentificationNumbers><c:IdentificationNumber number="PN-1" type="Part"/>'
+            f'</c:IdentificationNumbers></c:Identification></c:Definition><c:SerialNumber>{escape(sn)}</c:SerialNumber></tr:UUT>'
+            '<tr:TestStation><c:SerialNumber>STATION-1</c:SerialNumber></tr:TestStation>'
+            '</trc:TestResults>')
+
+
+def atml(steps=100, depth=1, uuts=1, seed=1, fail_every=0):
+    ns = " ".join(f'xmlns:{k}="{v}"' for k, v in NS_50.items())
+    body = "".join(atml_test_results(steps, depth, seed + k, sn=f"SN{k:04d}", fail_every=fail_every, index=k) for k in range(uuts))
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<trc:TestResultsCollection {ns}>{body}</trc:TestResultsCollection>'.encode("utf-8")
+
+
+def add_attachments(report, count: int, size: int, seed: int = 1):
+    """
+    Attaches count files of size bytes (random content, base64 encoded) to the first steps of report.
+    """
+    rng = random.Random(seed)
+    steps = [step for step in report.root.steps if step.attachment is None][:count]
+    for k, step in enumerate(steps):
+        data = base64.b64encode(rng.randbytes(size)).decode("ascii")
+        step.attachment = Attachment(name=f"attachment{k}.bin", content_type="application/octet-stream", data=data)
+    return report
@@ -0,0 +1,122 @@
+"""
+Import time benchmark
+-
+Measures the cold start of the modules a CLI or watcher process loads, each in a fresh
+interpreter: the import itself and the first use (the first conversion and JSON round trip,
+which builds the report schemas).
+
+    python -m benchmarks.import_time --output import.json
+    python -m benchmarks.import_time --compare import.json
+
+Every measurement is repeated --repeat times and the fastest run is kept. --compare exits with
+status 1 when a measurement got slower by more than --tolerance against an earlier results file.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+RESULTS_VERSION = 1
+
+# Name -> (setup, measured code); both run in a fresh interpreter
+CASES: Dict[str, tuple] = {
+    "import.pywats_api": ("", "import pywats_api.WATS"),
+    "import.report": ("", "import report.uut.uut_report"),
+    "import.converters": ("", "import converters.converter_registry"),
+    "first_use.convert_roundtrip": (
+        "import io, contextlib\n"
+        "from benchmarks import corpus\n"
+        "from converters.converter_registry import default_registry\n"
+        "from pywats_api.json_backend import get_backend\n"
+        "document = corpus.teststand_xml(steps=20, depth=2, multi_width=2, chart_points=0, fail_every=0, seed=1, sn='SN1')\n",
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    report = default_registry().convert_report(io.BytesIO(document))\n"
+        "backend = get_backend()\n"
+        "backend.decode_report(backend.encode_report(report))\n",
+    ),
+}
+
+_TEMPLATE = """
+import time
+{setup}
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def measure(setup: str, code: str, repeat: int) -> float:
+    """ Fastest of repeat fresh-interpreter runs, in seconds """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    script = _TEMPLATE.format(setup=setup, code=code)
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], cwd=root, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        elapsed = float(output.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat: int = 7) -> Dict[str, Any]:
+    """ Runs all cases and returns the results document """
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+        },
+        "repeat": repeat,
+        "results": {name: {"seconds": measure(setup, code, repeat)} for name, (setup, code) in CASES.items()},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """ Regressions of current against baseline (slower by more than tolerance) """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is not None and result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['seconds'] * 1000:.1f} ms, baseline {base['seconds'] * 1000:.1f} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n-\n")[0].strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per case; the fastest is kept (default: 7)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression for --compare (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    document = run(repeat=args.repeat)
+    for name, result in document["results"].items():
+        print(f"{name:<32}{result['seconds'] * 1000:>10.1f} ms")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(document, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
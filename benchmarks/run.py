@@ -0,0 +1,223 @@
+"""
+Benchmark runner
+-
+Measures convert, serialize, deserialize and submit throughput for synthetic TestStand XML and
+ATML reports (see corpus.py), submitting to a local mock WATS server (pywats_api.mock_server), and
+records the peak RSS of the process.
+
+    python -m benchmarks.run --profile medium --output results.json
+    python -m benchmarks.run --profile medium --compare results.json
+
+Every stage is repeated --repeat times and the fastest run is kept. Results are written as JSON;
+--compare exits with status 1 when a stage got slower (or the peak RSS grew) by more than
+--tolerance against an earlier results file.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import pydantic
+
+from benchmarks import corpus
+from converters.converter_registry import default_registry
+from pywats_api.instrumentation import count_steps
+from pywats_api.json_backend import get_backend
+from pywats_api.mock_server import VALIDATE_NONE, MockWatsServer
+from pywats_api.WATS import WATS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+RESULTS_VERSION = 1
+
+# Corpus shapes: documents per stage and the shape of each document
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "small": dict(reports=50, steps=100, depth=2, multi_width=0, chart_points=0, attachments=0, attachment_size=0),
+    "medium": dict(reports=20, steps=1000, depth=3, multi_width=4, chart_points=50, attachments=2, attachment_size=16 * 1024),
+    "large": dict(reports=5, steps=10000, depth=4, multi_width=8, chart_points=500, attachments=10, attachment_size=64 * 1024),
+}
+FORMATS = ("teststand", "atml")
+
+
+def peak_rss() -> Optional[int]:
+    """ Peak resident set size of this process in bytes (None where unavailable) """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def generate(format_name: str, shape: Dict[str, Any], seed: int) -> List[bytes]:
+    """ The documents of one format, one report each """
+    documents = []
+    for k in range(shape["reports"]):
+        if format_name == "teststand":
+            documents.append(corpus.teststand_xml(steps=shape["steps"], depth=shape["depth"], multi_width=shape["multi_width"],
+                                                  chart_points=shape["chart_points"], fail_every=50, seed=seed + k, sn=f"SN{k:06d}"))
+        else:
+            documents.append(corpus.atml(steps=shape["steps"], depth=shape["depth"], seed=seed + k, fail_every=50))
+    return documents
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """ Fastest of repeat runs, in seconds """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def stage_result(seconds: float, reports: int, steps: int, size: int) -> Dict[str, Any]:
+    return {
+        "seconds": seconds,
+        "reports_per_s": reports / seconds,
+        "steps_per_s": steps / seconds,
+        "mb_per_s": size / seconds / 1e6,
+        "peak_rss_bytes": peak_rss(),
+    }
+
+
+def run_format(format_name: str, shape: Dict[str, Any], repeat: int, seed: int, wats: WATS) -> Dict[str, Dict[str, Any]]:
+    registry = default_registry()
+    backend = wats.json
+    documents = generate(format_name, shape, seed)
+    document_bytes = sum(len(document) for document in documents)
+
+    def convert():
+        return [registry.convert_report(io.BytesIO(document)) for document in documents]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    reports = convert()
+    steps = sum(count_steps(report.root) for report in reports)
+    results["convert"] = stage_result(measure(convert, repeat), len(reports), steps, document_bytes)
+
+    if shape["attachments"]:
+        for k, report in enumerate(reports):
+            corpus.add_attachments(report, shape["attachments"], shape["attachment_size"], seed=seed + k)
+
+    payloads = [backend.encode_report(report) for report in reports]
+    payload_bytes = sum(len(payload) for payload in payloads)
+    results["serialize"] = stage_result(measure(lambda: [backend.encode_report(report) for report in reports], repeat),
+                                        len(reports), steps, payload_bytes)
+    results["deserialize"] = stage_result(measure(lambda: [backend.decode_report(payload) for payload in payloads], repeat),
+                                          len(reports), steps, payload_bytes)
+    results["submit"] = stage_result(measure(lambda: [wats.submit_report(report) for report in reports], repeat),
+                                     len(reports), steps, payload_bytes)
+    for stage in results.values():
+        stage["document_bytes"] = document_bytes
+        stage["payload_bytes"] = payload_bytes
+    return results
+
+
+def run(shape: Dict[str, Any], repeat: int = 3, seed: int = 1, formats=FORMATS, json_backend: Optional[str] = None) -> Dict[str, Any]:
+    """ Runs all stages for the given formats and returns the results document """
+    results: Dict[str, Any] = {}
+    # The converters print diagnostics; keep them out of the measurements' output
+    with MockWatsServer(validation=VALIDATE_NONE, keep_reports=False) as server, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        wats = WATS(server.url, "YmVuY2htYXJr", json_backend=json_backend)
+        for format_name in formats:
+            for stage, result in run_format(format_name, shape, repeat, seed, wats).items():
+                results[f"{format_name}.{stage}"] = result
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "pydantic": pydantic.VERSION,
+            "json_backend": get_backend(json_backend).name,
+        },
+        "shape": shape,
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+        "peak_rss_bytes": peak_rss(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """ Regressions of current against baseline (throughput down / peak RSS up by more than tolerance) """
+    regressions = []
+    if current.get("shape") != baseline.get("shape"):
+        regressions.append(f"Corpus shape differs from the baseline: {baseline.get('shape')}")
+        return regressions
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["reports_per_s"] < base["reports_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['reports_per_s']:.1f} reports/s, baseline {base['reports_per_s']:.1f}")
+    current_rss, base_rss = current.get("peak_rss_bytes"), baseline.get("peak_rss_bytes")
+    if current_rss and base_rss and current_rss > base_rss * (1 + tolerance):
+        regressions.append(f"peak RSS: {current_rss / 1e6:.1f} MB, baseline {base_rss / 1e6:.1f} MB")
+    return regressions
+
+
+def format_table(document: Dict[str, Any]) -> str:
+    lines = [f"{'stage':<24}{'reports/s':>12}{'steps/s':>14}{'MB/s':>10}{'peak RSS MB':>14}"]
+    for name, result in document["results"].items():
+        rss = result["peak_rss_bytes"]
+        lines.append(f"{name:<24}{result['reports_per_s']:>12.1f}{result['steps_per_s']:>14.0f}{result['mb_per_s']:>10.1f}"
+                     f"{rss / 1e6 if rss else float('nan'):>14.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n-\n")[0].strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small", help="Corpus size and shape (default: small)")
+    for key in PROFILES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f"Override the profile's {key}")
+    parser.add_argument("--format", choices=FORMATS, action="append", dest="formats", help="Format to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json-backend", choices=("json", "orjson"), default=None)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression for --compare (default: 0.15)")
+    args = parser.parse_args(argv)
+
+    shape = dict(PROFILES[args.profile])
+    for key in shape:
+        value = getattr(args, key)
+        if value is not None:
+            shape[key] = value
+
+    document = run(shape, repeat=args.repeat, seed=args.seed, formats=args.formats or FORMATS, json_backend=args.json_backend)
+    print(format_table(document))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(document, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
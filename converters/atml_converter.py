@@ -1,8 +1,6 @@
 
-from datetime import datetime
 import xml.etree.ElementTree as ET
-from typing import Dict, Optional
-from zoneinfo import ZoneInfo
+from typing import Dict, Iterator, Optional
 
 from report.uut.step import Step
 from report.uut.steps.action_step import ActionStep
@@ -12,29 +10,147 @@ from report.uut.steps.message_popup_step import MessagePopUpStep, MessagePopupIn
 from report.uut.steps.sequence_call import SequenceCallInfo
 from report.uut.uut_info import UUTInfo
 from report.uut.uut_report import UUTReport
+from converters.converter_base import ReportConverter, SniffResult
+from pywats_api.instrumentation import count_steps, span
+from converters import parsing_tables
+
+
+# Root element namespace -> (trc, tr, ts, xsi, c)
+ATML_NAMESPACES = {
+    # ATML 2.02
+    "http://www.ieee.org/ATML/2007/TestResults": (
+        None,
+        "http://www.ieee.org/ATML/2007/TestResults",
+        "www.ni.com/TestStand/ATMLTestResults/1.0",
+        "http://www.w3.org/2001/XMLSchema-instance",
+        "http://www.ieee.org/ATML/2006/Common"),
+    # ATML 5.0
+    "urn:IEEE-1636.1:2011:01:TestResultsCollection": (
+        "urn:IEEE-1636.1:2011:01:TestResultsCollection",
+        "urn:IEEE-1636.1:2011:01:TestResults",
+        "www.ni.com/TestStand/ATMLTestResults/2.0",
+        "http://www.w3.org/2001/XMLSchema-instance",
+        "urn:IEEE-1671:2010:Common"),
+    # ATML 6.01
+    "urn:IEEE-1636.1:2013:TestResultsCollection": (
+        "urn:IEEE-1636.1:2013:TestResultsCollection",
+        "urn:IEEE-1636.1:2013:TestResults",
+        "www.ni.com/TestStand/ATMLTestResults/3.0",
+        "http://www.w3.org/2001/XMLSchema-instance",
+        "urn:IEEE-1671:2010:Common"),
+}
+
+
+class ATMLTags:
+    """
+    Namespace-qualified tags and search paths for one ATML version.
+
+    Bare qualified tags ("{ns}Tag") are used for direct children, which lets
+    ElementTree take its fast path instead of compiling an XPath on every find.
+    """
+
+    def __init__(self, trc, tr, ts, xsi, c):
+        self.namespaces = (trc, tr, ts, xsi, c)
+
+        # No collection container: the root element is TestResults
+        self.test_results = "{%s}TestResults" % (trc if trc is not None else tr)
+
+        # Report header
+        self.uut = ".//{%s}UUT" % tr
+        self.definition = ".//{%s}Definition" % c
+        self.identification = ".//{%s}Identification" % c
+        self.identification_numbers = ".//{%s}IdentificationNumbers" % c
+        self.identification_number = ".//{%s}IdentificationNumber" % c
+        self.serial_number = ".//{%s}SerialNumber" % c
+        self.personnel = ".//{%s}Personnel" % tr
+        self.system_operator = ".//{%s}SystemOperator" % tr
+        self.test_station = ".//{%s}TestStation" % tr
+        self.result_set = "{%s}ResultSet" % tr
+        self.any_result_set = ".//{%s}ResultSet" % tr
+
+        # Step children
+        self.extension = "{%s}Extension" % tr
+        self.outcome = "{%s}Outcome" % tr
+        self.any_outcome = ".//{%s}Outcome" % tr
+        self.action_outcome = "{%s}ActionOutcome" % tr
+        self.any_action_outcome = ".//{%s}ActionOutcome" % tr
+        self.test_result = "{%s}TestResult" % tr
+        self.data = "{%s}Data" % tr
+        self.any_data = ".//{%s}Data" % tr
+
+        # TestStand step properties
+        self.ts_step_properties = "{%s}TSStepProperties" % ts
+        self.ts_step_type = "{%s}StepType" % ts
+        self.ts_step_group = "{%s}StepGroup" % ts
+        self.ts_total_time = "{%s}TotalTime" % ts
+        self.ts_limit_properties = "{%s}TSLimitProperties" % ts
+        self.ts_is_comparison_type_log = "{%s}IsComparisonTypeLog" % ts
+
+        # Test results
+        self.test_data = "{%s}TestData" % tr
+        self.test_limits = "{%s}TestLimits" % tr
+        self.limits = "{%s}Limits" % tr
+        self.datum = "{%s}Datum" % c
+        self.value = "{%s}Value" % c
+        self.expected = "{%s}Expected" % c
+        self.collection = "{%s}Collection" % c
+        self.item = "{%s}Item" % c
+
+        self._local_names: Dict[str, str] = {}
+
+    def local_name(self, tag: str) -> str:
+        local_name = self._local_names.get(tag)
+        if local_name is None:
+            local_name = self._local_names[tag] = tag.split("}")[-1]
+        return local_name
+
+
+# Root element namespace -> ATMLTags, built once per ATML version
+ATML_TAGS = {namespace: ATMLTags(*namespaces) for namespace, namespaces in ATML_NAMESPACES.items()}
+
+
+class ATMLConverter(ReportConverter):
+
+    @classmethod
+    def can_convert(cls, sniff: SniffResult) -> bool:
+        return sniff.namespace in ATML_NAMESPACES
+
+    def convert(self, file_stream) -> Iterator[UUTReport]:
+        """
+        Streams the document and yields one UUTReport per TestResults element.
+        Each TestResults element is released as soon as it has been converted, so
+        batch/parallel collections convert in constant memory.
+        """
+        root = None
+        tags = None
+        stack = []
+
+        for event, element in ET.iterparse(file_stream, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                    tags = self.get_namespaces(root)
+                stack.append(element)
+                continue
+
+            stack.pop()
+            if element.tag != tags.test_results:
+                continue
+
+            # Parsing is streamed, so it is timed as part of the report it belongs to
+            with span("converter.create_uut", converter=type(self).__name__) as timing:
+                uut_report = self.create_report_header(element, tags)
+                if timing.recording:
+                    timing.set("steps", count_steps(uut_report.root))
+            yield uut_report
+
+            element.clear()
+            if stack:
+                try:
+                    stack[-1].remove(element)
+                except ValueError:
+                    pass
 
-
-class ATMLConverter:
-    
-    def convert_report(self, file_stream):
-        text = file_stream.read()
-        tree = ET.ElementTree(ET.fromstring(text))
-        root = tree.getroot()
-        trc, tr, ts, xsi, c = self.get_namespaces(root)
-
-        if trc is None:  # No collection container, root is TestResults
-            uut = self.create_report_header(root)
-            current_sequence = uut.get_root_sequence_call()
-            #process_elements(uut, tree.find(f".//{{{tr}}}ResultSet").find(f".//{{{tr}}}TestGroup"), current_sequence)
-            #process_result_set_properties(uut, tree.find(f".//{{{tr}}}TestResults"))
-            return uut
-        else:
-            for test_results in root.findall(f".//{{{trc}}}TestResults"):
-                uut = self.create_report_header(test_results, trc, tr, ts, xsi, c)
-                return uut
-        
-        return None
-    
     def __init__(self, args: Optional[Dict[str, str]] = None):
         self.parameters = args or {
             "operator": "oper",
@@ -49,29 +165,27 @@ class ATMLConverter:
             "location": "Drammen",
             "purpose": "Test",
         }
+        # Resolved once; None is the local system timezone
+        self.time_zone = parsing_tables.resolve_timezone(self.parameters.get("timezone"))
 
-    def create_report_header(self, test_results, trc, tr, ts, xsi, c):
-        
-        # Create the namespaces dictionary
-        namespaces = {
-            'tr': tr,  # Map the 'tr' prefix to the correct namespace URI
-            'ts': ts,  # If you need other namespaces, map them as well
-            'xsi': xsi,
-            'c': c
-        }
+    def create_report_header(self, test_results, tags):
         uut_definition = None
 
-        uut_element = test_results.find(".//{{{}}}UUT".format(tr), namespaces)
+        uut_element = test_results.find(tags.uut)
         if uut_element:
-            uut_definition = uut_element.find(".//{{{}}}Definition".format(c), namespaces)
+            uut_definition = uut_element.find(tags.definition)
         else:
             raise ValueError("UUT element not found in ATML file")
+
+        result_set_element = test_results.find(tags.result_set)
+        if result_set_element is None:
+            result_set_element = test_results.find(tags.any_result_set)
           
-        part_number = self.get_part_number(uut_definition, c, namespaces)            
-        serial_number = self.get_serial_number(uut_element, c, namespaces)
-        operator_name = self.get_operator_name(test_results, tr, namespaces)
-        station_name = self.get_station_name(test_results, tr, c, namespaces)
-        sequence_name = self.get_sequence_name(test_results, tr, namespaces)
+        part_number = self.get_part_number(uut_definition, tags)            
+        serial_number = self.get_serial_number(uut_element, tags)
+        operator_name = self.get_operator_name(test_results, tags)
+        station_name = self.get_station_name(test_results, tags)
+        sequence_name = self.get_sequence_name(result_set_element)
 
         current_uut = UUTReport(
             pn=part_number,
@@ -86,39 +200,39 @@ class ATMLConverter:
 
         current_uut.root.sequence = SequenceCallInfo(path="Path", file_name=sequence_name, version=self.parameters["sequenceVersion"])
         
-        start_date_time_str, end_date_time_str = self.get_date_time_values(test_results, tr, namespaces)
+        start_date_time_str, end_date_time_str = self.get_date_time_values(result_set_element)
         
         #Parse datetime string to datetime object
-        parsed_dt = datetime.strptime(start_date_time_str, "%Y-%m-%dT%H:%M:%S.%f")
-
-        formatted_dt = self.parse_datetime(parsed_dt)
+        parsed_dt = parsing_tables.parse_timestamp(start_date_time_str)
 
-        current_uut.start = formatted_dt
+        current_uut.start = self.parse_datetime(parsed_dt)
         
-        end_date_time = datetime.strptime(end_date_time_str, "%Y-%m-%dT%H:%M:%S.%f")
+        end_date_time = parsing_tables.parse_timestamp(end_date_time_str)
         time_difference = end_date_time - parsed_dt
 
         current_uut.info.exec_time = time_difference.total_seconds()
 
-        self.process_result_set(current_uut, test_results, tr, ts, c, namespaces)
+        self.process_result_set(current_uut, result_set_element, tags)
 
         return current_uut
     
-    def process_result_set(self, current_uut, test_results, tr, ts, c, namespaces):
+    def process_result_set(self, current_uut, result_set_element, tags):
         
-        result_set_element = test_results.find(".//{{{}}}ResultSet".format(tr))
         current_seq = current_uut.get_root_sequence_call()
         current_seq.sequence.path = result_set_element.attrib.get("name").split("#")[0]
-        current_uut.result = self.add_steps(result_set_element, current_seq, tr, ts, c, namespaces)
+        with span("converter.add_steps", converter=type(self).__name__) as timing:
+            current_uut.result = self.add_steps(result_set_element, current_seq, tags)
+            if timing.recording:
+                timing.set("steps", count_steps(current_seq))
     
-    def add_steps(self, result_set_element, current_sequence, tr, ts, c, namespaces):
+    def add_steps(self, result_set_element, current_sequence, tags):
         uut_status = "P"
         current_step = None
         
         if result_set_element is not None:
             
             for element in result_set_element:
-                element_name = element.tag.split("}")[-1]
+                element_name = tags.local_name(element.tag)
                 
                 if element_name == "TestGroup":
                     full_sequence_name = element.attrib.get("name", None)
@@ -130,39 +244,44 @@ class ATMLConverter:
                     file_path = full_sequence_name.split("#")[0]
                     current_sequence = current_sequence.add_sequence_call(name=sequence_name,file_name=file_path, path=file_path, )
                     
-                    step_type, step_group, step_time = self.parse_step_properties(element, tr, ts, namespaces)
+                    extension, outcome, _action_outcome, _test_result, _data = self.scan_step_children(element, tags)
+                    step_type, step_group, step_time = self.parse_step_properties(extension, tags)
 
-                    outcome = element.find(".//{{{}}}Outcome".format(tr), namespaces)
-                    step_result = self.parse_step_status(outcome, element, tr, namespaces)
+                    if outcome is None:
+                        outcome = element.find(tags.any_outcome)
+                    step_result = self.parse_step_status(outcome, element, tags)
                     
                     if step_result == "S":
                         continue
                     else:
                         current_sequence.status = step_result
                         if step_result == "F":
-                            current_sequence.parent.status = "F"
                             uut_status = "F"
 
                     current_sequence.group = step_group
                     current_sequence.tot_time = step_time
 
-                    self.add_steps(element, current_sequence, tr, ts, c, namespaces)
+                    self.add_steps(element, current_sequence, tags)
                     
                     current_sequence = current_sequence.parent
 
                 elif element_name == "SessionAction":
                     current_step = None
                     step_name = element.attrib.get("name", None)
-                    step_type, step_group, step_time = self.parse_step_properties(element, tr, ts, namespaces)
+                    extension, _outcome, action_outcome, _test_result, data = self.scan_step_children(element, tags)
+                    step_type, step_group, step_time = self.parse_step_properties(extension, tags)
                     
-                    action_outcome = element.find(".//{{{}}}ActionOutcome".format(tr), namespaces)
-                    step_result = self.parse_step_status(action_outcome, element, tr, namespaces)
+                    if action_outcome is None:
+                        action_outcome = element.find(tags.any_action_outcome)
+                    step_result = self.parse_step_status(action_outcome, element, tags)
                     
                     if step_type in ["Action", "AdditionalResults"]:
                         current_step = ActionStep(name=step_name, group=step_group, status=step_result, tot_time=step_time)
                         current_sequence.steps.append(current_step)
                     elif step_type == "MessagePopup":
-                        button_hit = self.get_button_hit(element, tr, c, namespaces)
+                        if data is None:
+                            data = element.find(tags.any_data)
+                        button_hit = self.get_button_hit(data, tags)
                         
                         current_step = MessagePopUpStep(name=step_name, group=step_group, status=step_result, tot_time=step_time, messagePopup=MessagePopupInfo())
                         if button_hit is not None:
@@ -173,26 +292,25 @@ class ATMLConverter:
                 
                 elif element_name == "Test":
                     step_name = element.attrib.get("name", None)
-                    step_type, step_group, step_time = self.parse_step_properties(element, tr, ts, namespaces)
+                    extension, outcome, _action_outcome, test_result, _data = self.scan_step_children(element, tags)
+                    step_type, step_group, step_time = self.parse_step_properties(extension, tags)
 
-                    if step_type == "NumericLimitTest":
-                        outcome = element.find(".//{{{}}}Outcome".format(tr), namespaces)
-                        step_result = self.parse_step_status(outcome, element, tr, namespaces)
+                    if step_type not in ("NumericLimitTest", "PassFailTest", "StringValueTest"):
+                        continue
 
-                        measurement_value, low_limit, high_limit, comp_oper, unit = self.parse_numeric_step(element, tr, ts, c, namespaces)
+                    if outcome is None:
+                        outcome = element.find(tags.any_outcome)
+                    step_result = self.parse_step_status(outcome, element, tags)
+
+                    if step_type == "NumericLimitTest":
+                        measurement_value, low_limit, high_limit, comp_oper, unit = self.parse_numeric_step(test_result, tags)
                         current_step = current_sequence.add_numeric_step(name=step_name, value=measurement_value, low_limit=low_limit, high_limit=high_limit, comp_op=comp_oper, unit=unit, group=step_group, status=step_result, tot_time=step_time)
                     
                     elif step_type == "PassFailTest":
-                        outcome = element.find(".//{{{}}}Outcome".format(tr), namespaces)
-                        step_result = self.parse_step_status(outcome, element, tr, namespaces)
-
                         current_step = current_sequence.add_boolean_step(name=step_name, status=step_result, group=step_group, tot_time=step_time)
                         
                     elif step_type == "StringValueTest":
-                        outcome = element.find(".//{{{}}}Outcome".format(tr), namespaces)
-                        step_result = self.parse_step_status(outcome, element, tr, namespaces)
-
-                        measurement_value, comp_oper, string_limit = self.parse_string_step(element, tr, c, namespaces)
+                        measurement_value, comp_oper, string_limit = self.parse_string_step(test_result, tags)
                         current_step = current_sequence.add_string_step(name=step_name, value=measurement_value, comp_op=comp_oper, limit=string_limit, group=step_group, status=step_result, tot_time=step_time)
             
             return uut_status
@@ -201,120 +319,141 @@ class ATMLConverter:
 #Helper methods for parsing elements
 
 
-    def parse_numeric_step(self, element, tr, ts, c, namespaces):
+    def scan_step_children(self, element, tags):
+        """
+        Returns the (Extension, Outcome, ActionOutcome, TestResult, Data) children of a step, found in a single pass.
+        """
+        extension = outcome = action_outcome = test_result = data = None
+        for child in element:
+            tag = child.tag
+            if tag == tags.extension:
+                if extension is None:
+                    extension = child
+            elif tag == tags.outcome:
+                if outcome is None:
+                    outcome = child
+            elif tag == tags.test_result:
+                if test_result is None:
+                    test_result = child
+            elif tag == tags.action_outcome:
+                if action_outcome is None:
+                    action_outcome = child
+            elif tag == tags.data:
+                if data is None:
+                    data = child
+        return extension, outcome, action_outcome, test_result, data
+
+    def parse_numeric_step(self, test_result_element, tags):
         test_measurement = None
         low_limit = None
         high_limit = None
         comp_oper = None
         unit = None
         
-        test_result_element = element.find("./{{{}}}TestResult".format(tr), namespaces)
         if test_result_element is not None:
-            test_data_element = test_result_element.find("./{{{}}}TestData".format(tr), namespaces)
-            test_limits_element = test_result_element.find("./{{{}}}TestLimits".format(tr), namespaces)
+            test_data_element = test_result_element.find(tags.test_data)
+            test_limits_element = test_result_element.find(tags.test_limits)
             if test_data_element is not None:
-                test_measurement = test_data_element.find("./{{{}}}Datum".format(c), namespaces).attrib.get("value", None)
-                unit = test_data_element.find("./{{{}}}Datum".format(c), namespaces).attrib.get("nonStandardUnit", " ")
+                datum_element = test_data_element.find(tags.datum)
+                test_measurement = parsing_tables.extract_numeric(datum_element.attrib.get("value", None))
+                unit = datum_element.attrib.get("nonStandardUnit", " ")
             if test_limits_element is not None:
-                limits_element = test_limits_element.find("./{{{}}}Limits".format(tr), namespaces)
+                limits_element = test_limits_element.find(tags.limits)
                 for limit in limits_element:
-                    element_name = limit.tag.split("}")[-1]
+                    element_name = tags.local_name(limit.tag)
                     if element_name == "SingleLimit":
                         comp_oper = limit.attrib.get("comparator", None)
                         comp_oper = CompOp[comp_oper]
-                        low_limit = limit.find("./{{{}}}Datum".format(c), namespaces).attrib.get("value", None)
+                        low_limit = parsing_tables.extract_numeric(limit.find(tags.datum).attrib.get("value", None))
                     elif element_name == "LimitPair":
                         comp_oper = ""
                         limits = []
                         for element in limit:
                             comp_oper += element.attrib.get("comparator", None)
-                            limits.append(element.find("./{{{}}}Datum".format(c), namespaces).attrib.get("value", None))
+                            limits.append(parsing_tables.extract_numeric(element.find(tags.datum).attrib.get("value", None)))
      
                         comp_oper = CompOp[comp_oper]
                         low_limit = limits[0]
                         high_limit = limits[1]
                     elif element_name == "Expected":
                         comp_oper = CompOp[limit.attrib.get("comparator", None)]
-                        low_limit = limit.find("./{{{}}}Datum".format(c), namespaces).attrib.get("value", None)
+                        low_limit = parsing_tables.extract_numeric(limit.find(tags.datum).attrib.get("value", None))
                     
-            elif test_result_element.find("./{{{}}}Extension".format(tr), namespaces) is not None:
-                limit_properties_element = test_result_element.find("./{{{}}}Extension".format(tr), namespaces).find("./{{{}}}TSLimitProperties".format(ts), namespaces)
-                if limit_properties_element is not None:
-                    comp_type_log_value = limit_properties_element.find("./{{{}}}IsComparisonTypeLog".format(ts), namespaces).attrib.get("value", None)
-                    if comp_type_log_value == "true":
-                        comp_oper = CompOp.LOG
+            else:
+                extension_element = test_result_element.find(tags.extension)
+                if extension_element is not None:
+                    limit_properties_element = extension_element.find(tags.ts_limit_properties)
+                    if limit_properties_element is not None:
+                        comp_type_log_value = limit_properties_element.find(tags.ts_is_comparison_type_log).attrib.get("value", None)
+                        if comp_type_log_value == "true":
+                            comp_oper = CompOp.LOG
         return test_measurement, low_limit, high_limit, comp_oper, unit
 
-    def parse_string_step(self, element, tr, c, namespaces):
+    def parse_string_step(self, test_result_element, tags):
         string_measurement = None
         comp_oper = None
         string_limit = None
 
-        test_result_element = element.find("./{{{}}}TestResult".format(tr), namespaces)
         if test_result_element is not None:
-            test_data_element = test_result_element.find("./{{{}}}TestData".format(tr), namespaces)
-            test_limits_element = test_result_element.find("./{{{}}}TestLimits".format(tr), namespaces)
+            test_data_element = test_result_element.find(tags.test_data)
+            test_limits_element = test_result_element.find(tags.test_limits)
             if test_data_element is not None:
-                test_measurement = test_data_element.find("./{{{}}}Datum".format(c), namespaces)
+                test_measurement = test_data_element.find(tags.datum)
                 if test_measurement is not None:
-                    string_measurement = test_measurement.find("./{{{}}}Value".format(c), namespaces).text
+                    string_measurement = test_measurement.find(tags.value).text
             if test_limits_element is not None:
-                limits_element = test_limits_element.find("./{{{}}}Limits".format(tr), namespaces)
+                limits_element = test_limits_element.find(tags.limits)
                 if limits_element is not None:
-                    comp_oper = limits_element.find("./{{{}}}Expected".format(c), namespaces).attrib.get("comparator", None)
+                    expected_element = limits_element.find(tags.expected)
+                    comp_oper = expected_element.attrib.get("comparator", None)
                     if comp_oper is not None:
                         if comp_oper == "CIEQ":
                             comp_oper = "IGNORECASE"
                         else:
                             comp_oper = CompOp[comp_oper]
-                    string_limit = limits_element.find("./{{{}}}Expected".format(c), namespaces).find("./{{{}}}Datum".format(c), namespaces).find("./{{{}}}Value".format(c), namespaces).text
+                    string_limit = expected_element.find(tags.datum).find(tags.value).text
         return string_measurement, comp_oper, string_limit
     
 
-    def parse_step_properties(self, element, tr, ts, namespaces):
+    def parse_step_properties(self, extension, tags):
         step_type = None
         step_group = None
         step_time = None
         
-        # Find the Extension element under 'element'
-        extension = element.find("./{{{}}}Extension".format(tr), namespaces)
-        
         # Proceed only if Extension element exists
         if extension is not None:
             # Find the TSStepProperties element under 'extension'
-            step_properties = extension.find("./{{{}}}TSStepProperties".format(ts), namespaces)
+            step_properties = extension.find(tags.ts_step_properties)
             
             # Proceed only if TSStepProperties exists
             if step_properties is not None:
-                # Find and assign StepType if it exists
-                step_type_element = step_properties.find("./{{{}}}StepType".format(ts), namespaces)
-                if step_type_element is not None:
-                    step_type = step_type_element.text
-                
-                # Find and assign StepGroup if it exists
-                step_group_element = step_properties.find("./{{{}}}StepGroup".format(ts), namespaces)
-                if step_group_element is not None:
-                    step_group = self.parse_step_group(step_group_element.text)
-                    
-                # Find and assign TotalTime if it exists
-                step_time_element = step_properties.find("./{{{}}}TotalTime".format(ts), namespaces)
-                if step_time_element is not None:
-                    step_time = step_time_element.attrib.get("value", None)
+                # Pick StepType, StepGroup and TotalTime in one pass over the properties
+                for child in step_properties:
+                    tag = child.tag
+                    if tag == tags.ts_step_type:
+                        if step_type is None:
+                            step_type = child.text
+                    elif tag == tags.ts_step_group:
+                        if step_group is None:
+                            step_group = self.parse_step_group(child.text)
+                    elif tag == tags.ts_total_time:
+                        if step_time is None:
+                            step_time = child.attrib.get("value", None)
         
         return step_type, step_group, step_time
             
 
-    def get_part_number(self, uut_definition, c, namespaces):
+    def get_part_number(self, uut_definition, tags):
         # Use the namespace dictionary to find the element
-        identification_element = uut_definition.find(".//{{{}}}Identification".format(c), namespaces)
+        identification_element = uut_definition.find(tags.identification)
         
         if identification_element is not None:
             # Find the IdentificationNumbers element inside Identification
-            identification_numbers_element = identification_element.find(".//{{{}}}IdentificationNumbers".format(c), namespaces)
+            identification_numbers_element = identification_element.find(tags.identification_numbers)
             
             if identification_numbers_element is not None:
                 # Find the IdentificationNumber element inside IdentificationNumbers
-                identification_number_element = identification_numbers_element.find(".//{{{}}}IdentificationNumber".format(c), namespaces)
+                identification_number_element = identification_numbers_element.find(tags.identification_number)
                 
                 if identification_number_element is not None:
                     # Access the 'number' attribute of the IdentificationNumber element
@@ -325,9 +464,9 @@ class ATMLConverter:
         # If no part number is found, return the default part number
         return self.parameters["partNumber"]
         
-    def get_serial_number(self, uut_element, c, namespaces):
+    def get_serial_number(self, uut_element, tags):
         # Find the SerialNumber element using the correct namespace
-        serial_number_element = uut_element.find(".//{{{}}}SerialNumber".format(c), namespaces)
+        serial_number_element = uut_element.find(tags.serial_number)
         
         if serial_number_element is not None:
             # Get the text of the SerialNumber element
@@ -342,13 +481,13 @@ class ATMLConverter:
         # If the SerialNumber element isn't found, return the default serial number
         return self.parameters["serialNumber"]
         
-    def get_operator_name(self, test_results, tr, namespaces):
+    def get_operator_name(self, test_results, tags):
         # Find the Personnel element using the correct namespace
-        personnel_element = test_results.find(".//{{{}}}Personnel".format(tr), namespaces)
+        personnel_element = test_results.find(tags.personnel)
         
         if personnel_element is not None:
             # Find the SystemOperator element inside Personnel
-            system_operator_element = personnel_element.find(".//{{{}}}SystemOperator".format(tr), namespaces)
+            system_operator_element = personnel_element.find(tags.system_operator)
             
             if system_operator_element is not None:
                 # Get the 'name' attribute of the SystemOperator element
@@ -362,13 +501,13 @@ class ATMLConverter:
         
         # If the Personnel or SystemOperator element isn't found, return the default operator
         return self.parameters["operator"]
-    def get_station_name(self, test_results, tr, c, namespaces):
+    def get_station_name(self, test_results, tags):
          # Find the SerialNumber element using the correct namespace
-        serial_number_element = test_results.find(".//{{{}}}TestStation".format(tr), namespaces)
+        serial_number_element = test_results.find(tags.test_station)
         
         if serial_number_element is not None:
             # Get the text of the SerialNumber element
-            station_name = serial_number_element.find(".//{{{}}}SerialNumber".format(c), namespaces).text
+            station_name = serial_number_element.find(tags.serial_number).text
             
             # If no serial number is found or it's empty, use the default from parameters
             if station_name is None or station_name == "":
@@ -379,10 +518,7 @@ class ATMLConverter:
         # If the SerialNumber element isn't found, return the default serial number
         return self.parameters["serialNumber"]
             
-    def get_sequence_name(self, test_results, tr, namespaces):
-        # Find the ResultSet element using the correct namespace
-        result_set_element = test_results.find(".//{{{}}}ResultSet".format(tr), namespaces)
-        
+    def get_sequence_name(self, result_set_element):
         if result_set_element is not None:
             # Get the 'name' attribute of the ResultSet element
             sequence_name = result_set_element.attrib.get('name', None)
@@ -396,10 +532,7 @@ class ATMLConverter:
         # If the ResultSet element isn't found, return the default sequence name
         return self.parameters["sequenceName"]
     
-    def get_date_time_values(self, test_results, tr, namespaces):
-        # Find the ResultSet element using the correct namespace
-        result_set_element = test_results.find(".//{{{}}}ResultSet".format(tr), namespaces)
-        
+    def get_date_time_values(self, result_set_element):
         if result_set_element is not None:
             # Get the 'startDateTime' and 'endDateTime' attributes from the ResultSet element
             start_date_time = result_set_element.attrib.get('startDateTime', None)
@@ -411,97 +544,48 @@ class ATMLConverter:
         # If the ResultSet element isn't found, return None
         return None, None
     
-    def get_button_hit(self, element, tr, c, namespaces):
+    def get_button_hit(self, data_element, tags):
         button_hit = None
-        if element.find(".//{{{}}}Data".format(tr), namespaces):
-            if element.find(".//{{{}}}Data".format(tr), namespaces).find("./{{{}}}Collection".format(c), namespaces):
-                datum_element = element.find(".//{{{}}}Data".format(tr), namespaces).find("./{{{}}}Collection".format(c), namespaces).find("./{{{}}}Item".format(c), namespaces)
+        if data_element:
+            collection_element = data_element.find(tags.collection)
+            if collection_element:
+                datum_element = collection_element.find(tags.item)
                 if datum_element is not None:
-                    button_hit = element.find(".//{{{}}}Data".format(tr), namespaces).find("./{{{}}}Collection".format(c), namespaces).find("./{{{}}}Item".format(c), namespaces).find("./{{{}}}Datum".format(c), namespaces).attrib.get("value", None)
+                    button_hit = datum_element.find(tags.datum).attrib.get("value", None)
         return button_hit
     
 
     def parse_datetime(self, parsed_dt):
+        """
+        Returns parsed_dt as an aware datetime in the converter's timezone.
+        """
         try:
-
-            # Get the timezone from self.parameters["timeZone"]
-            time_zone_str = self.parameters["timezone"]
-            
-            # Get the local timezone
-            if time_zone_str is not None:
-                try:
-                    # Try to get the timezone using zoneinfo (Python 3.9+)
-                    local_tz = ZoneInfo(time_zone_str)
-                except Exception as e:
-                    print(f"Invalid timezone '{time_zone_str}' provided. Falling back to local timezone. Error: {e}")
-                    # Fallback to local timezone if the timezone is invalid
-                    local_tz = datetime.now().astimezone().tzinfo
-            else:
-                # If no timezone string is provided, fallback to local system timezone
-                local_tz = datetime.now().astimezone().tzinfo
-
-            # Localize the datetime (assign the timezone)
-            localized_dt = parsed_dt.replace(tzinfo=local_tz)
-            
-            # Format as ISO string with timezone offset
-            formatted_dt = localized_dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-            
-            return formatted_dt
-
-        except ValueError as e:
-            print(f"Error parsing the datetime string: {e}")
+            return parsing_tables.localize(parsed_dt, self.time_zone)
+        except (ValueError, OverflowError) as e:
+            print(f"Error localizing the datetime: {e}")
             return None
 
     def parse_step_group(self, step_group):
-        if step_group == "Setup":
-            step_group = "S"
-        elif step_group == "Cleanup":
-            step_group = "C"
-        else:
-            step_group = "M"
-        return step_group
+        return parsing_tables.step_group(step_group)
     
-    def parse_step_status(self, outcome, element, tr, namespaces):
+    def parse_step_status(self, outcome, element, tags):
         outcome = outcome.attrib.get("value", None)
-        if outcome == "Passed":
-            return "P"
-        elif outcome == "Failed":
-            return "F"
-        elif outcome == "Error":
-            return "E"
-        elif outcome == "Skipped":
-            return "S"
-        elif outcome == "Done":
-            return "D"
-        elif outcome == "Terminated":
-            return "T"
+        status = parsing_tables.ATML_OUTCOME_MAP.get(outcome)
+        if status is not None:
+            return status
         elif outcome == "UserDefined":
-            outcome = element.find(".//{{{}}}Outcome".format(tr), namespaces).attrib.get("qualifier", None)
+            outcome = element.find(tags.any_outcome).attrib.get("qualifier", None)
             if outcome == "Skipped":
                 return "S"
             
     def get_namespaces(self, root_element):
+        """
+        Returns the precomputed ATMLTags of the ATML version the root element belongs to.
+        """
         namespace_name = root_element.tag.split('}')[0].strip('{')
 
-        if namespace_name == "http://www.ieee.org/ATML/2007/TestResults":
-            trc = None
-            tr = namespace_name
-            ts = "www.ni.com/TestStand/ATMLTestResults/1.0"
-            xsi = "http://www.w3.org/2001/XMLSchema-instance"
-            c = "http://www.ieee.org/ATML/2006/Common"
-        elif namespace_name == "urn:IEEE-1636.1:2011:01:TestResultsCollection":
-            trc = namespace_name
-            tr = "urn:IEEE-1636.1:2011:01:TestResults"
-            ts = "www.ni.com/TestStand/ATMLTestResults/2.0"
-            xsi = "http://www.w3.org/2001/XMLSchema-instance"
-            c = "urn:IEEE-1671:2010:Common"
-        elif namespace_name == "urn:IEEE-1636.1:2013:TestResultsCollection":
-            trc = namespace_name
-            tr = "urn:IEEE-1636.1:2013:TestResults"
-            ts = "www.ni.com/TestStand/ATMLTestResults/3.0"
-            xsi = "http://www.w3.org/2001/XMLSchema-instance"
-            c = "urn:IEEE-1671:2010:Common"
-        else:
+        tags = ATML_TAGS.get(namespace_name)
+        if tags is None:
             raise NotImplementedError("Unsupported ATML Format. Supported formats: 2.02, 5.0, 6.01")
 
-        return trc, tr, ts, xsi, c
+        return tags
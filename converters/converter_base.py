@@ -0,0 +1,153 @@
+"""
+Common converter interface and format sniffing.
+"""
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from report.uut.uut_report import UUTReport
+from pywats_api.instrumentation import count_steps, span
+
+# Number of bytes read from the start of a stream to detect its format
+SNIFF_SIZE = 8192
+# Number of start tags recorded in a SniffResult
+SNIFF_TAG_COUNT = 16
+
+# TestStand writes an invalid processing instruction that expat refuses
+_INVALID_STYLESHEET_REGEX = re.compile(rb'<\?xml:stylesheet.*?\?>')
+_START_TAG_REGEX = re.compile(rb'<([A-Za-z_][\w.\-]*(?::[\w.\-]+)?)([^>]*)>')
+_XMLNS_REGEX = re.compile(rb'xmlns(?::([\w.\-]+))?\s*=\s*["\']([^"\']*)["\']')
+
+
+@dataclass
+class SniffResult:
+    """
+    Describes the first elements of an XML document.
+    """
+    root_tag: Optional[str] = None
+    """
+    Local name of the root element.
+    """
+    namespace: Optional[str] = None
+    """
+    Namespace URI of the root element (None when not namespaced).
+    """
+    tags: List[str] = field(default_factory=list)
+    """
+    Local names of the first start tags found in the head, in document order.
+    """
+
+
+def sniff_xml(head: bytes) -> SniffResult:
+    """
+    Detects root element, root namespace and the first start tags from the first bytes of an XML document.
+    """
+    head = _INVALID_STYLESHEET_REGEX.sub(b'', head)
+    result = SniffResult()
+
+    parser = ET.XMLPullParser(events=("start",))
+    try:
+        parser.feed(head)
+        for _event, element in parser.read_events():
+            namespace, local_name = _split_tag(element.tag)
+            if result.root_tag is None:
+                result.root_tag = local_name
+                result.namespace = namespace
+            result.tags.append(local_name)
+            if len(result.tags) >= SNIFF_TAG_COUNT:
+                break
+        if result.root_tag is not None:
+            return result
+    except ET.ParseError:
+        if result.root_tag is not None:
+            return result
+
+    # Not well-formed (or badly encoded) head: fall back to a lexical scan of the start tags.
+    prefixes = {}
+    for match in _START_TAG_REGEX.finditer(head):
+        qualified_name, attributes = match.group(1).decode("ascii"), match.group(2)
+        for prefix, uri in _XMLNS_REGEX.findall(attributes):
+            prefixes[prefix.decode("ascii")] = uri.decode("utf-8", errors="replace")
+        prefix, _, local_name = qualified_name.rpartition(":")
+        if result.root_tag is None:
+            result.root_tag = local_name
+            result.namespace = prefixes.get(prefix) or None
+        result.tags.append(local_name)
+        if len(result.tags) >= SNIFF_TAG_COUNT:
+            break
+    return result
+
+
+def _split_tag(tag: str):
+    if tag.startswith("{"):
+        namespace, _, local_name = tag[1:].partition("}")
+        return namespace, local_name
+    return None, tag
+
+
+class ReplayStream:
+    """
+    Read-only binary stream that returns an already read head before the rest of the wrapped stream.
+    Lets a converter consume a stream whose first bytes were used for sniffing, without re-reading it.
+    Text read from the wrapped stream is encoded as UTF-8 (like the head, see ConverterRegistry).
+    """
+
+    def __init__(self, head: bytes, stream):
+        self._head = head
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        head = self._head
+        if size is None or size < 0:
+            self._head = b""
+            return head + self._read()
+        if head:
+            chunk = head[:size]
+            self._head = head[size:]
+            if len(chunk) < size:
+                chunk += self._read(size - len(chunk))
+            return chunk
+        return self._read(size)
+
+    def _read(self, size: int = -1) -> bytes:
+        # A text stream returns up to size characters, which may be more than size bytes
+        data = self._stream.read(size)
+        return data.encode("utf-8") if isinstance(data, str) else data
+
+    def readable(self) -> bool:
+        return True
+
+
+class ReportConverter(ABC):
+    """
+    Base class for all report converters.
+
+    A converter reads a binary stream and yields one UUTReport per unit found in it.
+    """
+
+    @classmethod
+    @abstractmethod
+    def can_convert(cls, sniff: SniffResult) -> bool:
+        """
+        Returns True if the converter handles documents that start as described by sniff.
+        """
+
+    @abstractmethod
+    def convert(self, file_stream) -> Iterator[UUTReport]:
+        """
+        Yields every report in file_stream.
+        """
+
+    def convert_report(self, file_stream) -> Optional[UUTReport]:
+        """
+        Converts file_stream and returns the first report in it.
+        """
+        with span("converter.convert_report", converter=type(self).__name__) as timing:
+            report = next(iter(self.convert(file_stream)), None)
+            if timing.recording and report is not None:
+                timing.set("steps", count_steps(report.root))
+        return report
@@ -0,0 +1,80 @@
+"""
+Registry that picks the right converter for a stream by sniffing its first bytes.
+
+    registry = default_registry()
+    with open(file_path, "rb") as file_stream:
+        for uut in registry.convert(file_stream):
+            wats.submit_report(uut)
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+
+from report.uut.uut_report import UUTReport
+from converters.converter_base import SNIFF_SIZE, ReplayStream, ReportConverter, SniffResult, sniff_xml
+
+
+class ConverterRegistry:
+    """
+    Ordered collection of converter classes. The first converter that accepts the sniffed head is used.
+
+    :param args: Parameters passed to each converter on creation.
+    """
+
+    def __init__(self, args: Optional[Dict[str, str]] = None):
+        self.args = args
+        self._converter_types: List[Type[ReportConverter]] = []
+        self._instances: Dict[Type[ReportConverter], ReportConverter] = {}
+
+    def register(self, converter_type: Type[ReportConverter], first: bool = False) -> Type[ReportConverter]:
+        if first:
+            self._converter_types.insert(0, converter_type)
+        else:
+            self._converter_types.append(converter_type)
+        return converter_type
+
+    @property
+    def converter_types(self) -> List[Type[ReportConverter]]:
+        return list(self._converter_types)
+
+    def find_converter(self, file_stream) -> Tuple[ReportConverter, ReplayStream, SniffResult]:
+        """
+        Reads the head of file_stream and returns the converter to use, together with a stream
+        that replays the head, so the converter can read the document from its start.
+        """
+        head = file_stream.read(SNIFF_SIZE)
+        if isinstance(head, str):
+            head = head.encode("utf-8")
+        sniff = sniff_xml(head)
+        for converter_type in self._converter_types:
+            if converter_type.can_convert(sniff):
+                return self._get_instance(converter_type), ReplayStream(head, file_stream), sniff
+        raise ValueError(f"No converter registered for documents with root element '{sniff.root_tag}' (namespace: {sniff.namespace})")
+
+    def convert(self, file_stream) -> Iterator[UUTReport]:
+        converter, stream, _sniff = self.find_converter(file_stream)
+        yield from converter.convert(stream)
+
+    def convert_report(self, file_stream) -> Optional[UUTReport]:
+        converter, stream, _sniff = self.find_converter(file_stream)
+        return converter.convert_report(stream)
+
+    def _get_instance(self, converter_type: Type[ReportConverter]) -> ReportConverter:
+        converter = self._instances.get(converter_type)
+        if converter is None:
+            converter = converter_type(self.args)
+            self._instances[converter_type] = converter
+        return converter
+
+
+def default_registry(args: Optional[Dict[str, str]] = None) -> ConverterRegistry:
+    """
+    Returns a registry with the converters shipped in this package.
+    """
+    from converters.atml_converter import ATMLConverter
+    from converters.teststand_xml_converter import TestStandXMLConverter
+
+    registry = ConverterRegistry(args)
+    registry.register(ATMLConverter)
+    registry.register(TestStandXMLConverter)
+    return registry
@@ -0,0 +1,130 @@
+"""
+Precompiled patterns and lookup tables shared by the converters.
+
+These functions run once per measurement, limit and chart point, so they avoid
+repeated lower()-calls, per-call regex compilation and per-call dict building.
+"""
+import re
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from report.uut.step import StepStatus
+
+# Numeric part of a string such as "3.3V" or "-12.5 dBm"
+NUMERIC_REGEX = re.compile(r"(?P<numeric>[-+]?\d*\.?\d+)")
+
+# TestStand writes an invalid processing instruction that expat refuses
+INVALID_STYLESHEET_REGEX = re.compile(r'<\?xml:stylesheet.*\?>')
+
+# ATML startDateTime/endDateTime
+ATML_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# Lower-cased TestStand value -> WATS value
+VALUE_MAP = MappingProxyType({
+    "nan": "NaN",
+    "inf": "Inf",
+    "-inf": "-Inf",
+    "equal": "EQ",
+    "passed": "P",
+    "failed": "F",
+    "skipped": "S",
+    "true": "P",
+    "false": "F",
+})
+
+# Lower-cased TestStand step status -> StepStatus (anything else is Passed)
+STEP_STATUS_MAP = MappingProxyType({
+    "failed": StepStatus.Failed,
+    "skipped": StepStatus.Skipped,
+    "terminated": StepStatus.Terminated,
+    "done": StepStatus.Done,
+})
+
+# Lower-cased TestStand measurement status -> WATS measurement status (anything else is kept as is)
+MEASUREMENT_STATUS_MAP = MappingProxyType({
+    "passed": "P",
+    "failed": "F",
+})
+
+# TestStand step group -> WATS step group (anything else is Main)
+STEP_GROUP_MAP = MappingProxyType({
+    "Setup": "S",
+    "Cleanup": "C",
+})
+
+# ATML Outcome value -> WATS step status
+ATML_OUTCOME_MAP = MappingProxyType({
+    "Passed": "P",
+    "Failed": "F",
+    "Error": "E",
+    "Skipped": "S",
+    "Done": "D",
+    "Terminated": "T",
+})
+
+
+def extract_numeric(value: Optional[str]) -> Optional[float]:
+    """
+    Returns value as float. Plain numbers (including NaN/Inf in any casing) take the
+    float() fast path; otherwise the first numeric part of the string is used.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = NUMERIC_REGEX.search(value)
+    if match:
+        return float(match.group("numeric"))
+    return None
+
+
+def parse_value(value: str) -> str:
+    """
+    Maps TestStand values (status words, booleans, NaN/Inf, 'Equal') to their WATS form.
+    """
+    return VALUE_MAP.get(value.lower(), value)
+
+
+def step_status(status: str) -> StepStatus:
+    return STEP_STATUS_MAP.get(status.lower(), StepStatus.Passed)
+
+
+def step_group(group: str) -> str:
+    return STEP_GROUP_MAP.get(group, "M")
+
+
+@lru_cache(maxsize=1024)
+def parse_timestamp(value: str, fmt: str = ATML_TIMESTAMP_FORMAT) -> datetime:
+    """
+    Parses a naive timestamp string. Cached, since batches of reports repeat the same timestamps.
+    """
+    return datetime.strptime(value, fmt)
+
+
+def resolve_timezone(time_zone: Optional[str]) -> Optional[tzinfo]:
+    """
+    Returns the tzinfo for a timezone name, or None for the local system timezone.
+    Resolve once per converter and pass the result to localize().
+    """
+    if time_zone is None:
+        return None
+    try:
+        return ZoneInfo(time_zone)
+    except Exception as e:
+        print(f"Invalid timezone '{time_zone}' provided. Falling back to local timezone. Error: {e}")
+        return None
+
+
+def localize(naive: datetime, time_zone: Optional[tzinfo]) -> datetime:
+    """
+    Returns naive as an aware datetime in time_zone (None: local system timezone, with the
+    UTC offset that applied at that date rather than today's).
+    """
+    if time_zone is None:
+        return naive.astimezone()
+    return naive.replace(tzinfo=time_zone)
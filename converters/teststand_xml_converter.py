@@ -1,11 +1,8 @@
-import math
-import re
 import xml.etree.ElementTree as ET
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 import os
-from zoneinfo import ZoneInfo
 from report.chart import ChartSeries
-from report.uut.step import StepStatus
+from report.uut.step import StepStatus, status_value
 from report.uut.steps import *
 from report.uut.steps.callexe_step import CallExeStepInfo
 from report.uut.steps.comp_operator import CompOp
@@ -17,8 +14,14 @@ from report.uut.steps.sequence_call import SequenceCall, SequenceCallInfo
 from report.uut.uut_info import UUTInfo
 from datetime import datetime, timedelta
 from uuid import UUID, uuid4
+from converters.converter_base import ReportConverter, SniffResult
+from pywats_api.instrumentation import count_steps, span
+from converters import parsing_tables
+
+class TestStandXMLConverter(ReportConverter):
+    # Root elements of TestStand XML reports (not namespaced)
+    ROOT_TAGS = ("Reports", "Report", "TSReport")
 
-class TestStandXMLConverter:
     def __init__(self, args: Optional[Dict[str, str]] = None):
         self.parameters = args or {
             "operator": "oper",
@@ -30,6 +33,8 @@ class TestStandXMLConverter:
             "location": "Drammen",
             "purpose": "Test",
         }
+        # Resolved once; None is the local system timezone
+        self.time_zone = parsing_tables.resolve_timezone(self.parameters.get("timezone"))
 
         self.namespaces = {
             'trc': "urn:IEEE-1636.1:2011:01:TestResults",
@@ -38,19 +43,36 @@ class TestStandXMLConverter:
         }
         self.delete_files: List[str] = []
 
-    def convert_report(self, file_stream):
-        invalid_stylesheet_regex = re.compile(r'<\?xml:stylesheet.*\?>')
+    @classmethod
+    def can_convert(cls, sniff: SniffResult) -> bool:
+        return sniff.namespace is None and sniff.root_tag in cls.ROOT_TAGS
 
+    def convert(self, file_stream) -> Iterator[UUTReport]:
         text = file_stream.read().decode('utf-8', errors='replace')  # Read from stream
-        text = invalid_stylesheet_regex.sub('', text)
+        text = parsing_tables.INVALID_STYLESHEET_REGEX.sub('', text)
 
-        root = ET.fromstring(text)
+        with span("converter.parse_xml", converter=type(self).__name__, input_bytes=len(text)):
+            root = ET.fromstring(text)
 
+        found = False
         for report_elem in root.iter():
             if report_elem.tag == "TSReport" or report_elem.tag == "Report":
-                return self.create_uut(report_elem)
+                found = True
+                with span("converter.create_uut", converter=type(self).__name__) as timing:
+                    uut_report = self.create_uut(report_elem)
+                    if timing.recording:
+                        timing.set("steps", count_steps(uut_report.root))
+                yield uut_report
+
+        if not found:
+            raise ValueError("TSReport or Report element was not found.")
 
-        raise ValueError("TSReport or Report element was not found.")
+    def convert_report(self, file_stream):
+        with span("converter.convert_report", converter=type(self).__name__) as timing:
+            uut_report = next(self.convert(file_stream))
+            if timing.recording:
+                timing.set("steps", count_steps(uut_report.root))
+        return uut_report
 
     def clean_up(self):
         for file_path in self.delete_files:
@@ -127,8 +149,11 @@ class TestStandXMLConverter:
         if uut_report.root.sequence.version == "" or uut_report.root.sequence.version is None:
             uut_report.root.sequence.version = "1.0.0.1"    
         uut_report.info.exec_time = report_element.find(".//Prop[@Type='TEResult']/Prop[@Name='TS']/Prop[@Name='TotalTime']").find("Value").text
-        if report_element.find(".//Prop[@Type='TEResult']/Prop[@Name='Status']").find("Value").text != "Passed":
-            uut_report.result = "F"
+        # The result TestStand recorded (MainSequence status) wins over the roll-up from the steps,
+        # for the report and for its root sequence alike
+        result = "P" if report_element.find(".//Prop[@Type='TEResult']/Prop[@Name='Status']").find("Value").text == "Passed" else "F"
+        uut_report.result = result
+        uut_report.root.status = result
 
         uut_report.info.error_code = xp_root.get_int_value("Error.Code", 0)
         uut_report.info.error_message = xp_root.get_string_value("Error.Msg", None)
@@ -183,9 +208,10 @@ class TestStandXMLConverter:
         root_seq = uut_report.get_root_sequence_call()
         
 
-        self.add_steps(root_seq, result_list_values)
-        
-        uut_report.root.status = uut_report.result
+        with span("converter.add_steps", converter=type(self).__name__) as timing:
+            self.add_steps(root_seq, result_list_values)
+            if timing.recording:
+                timing.set("steps", count_steps(root_seq))
         
         return uut_report
 
@@ -227,6 +253,7 @@ class TestStandXMLConverter:
                             current_seq.group = step_group
                             current_seq.tot_time = step_execution_time
                             current_seq.status = self.set_step_status(step_status)
+                            self.check_caused_seq_failure(te_result, current_seq)
                             current_seq = current_seq.parent
 
                         elif step_type.text in ["StringValueTest", "ET_SVT"]:
@@ -234,11 +261,13 @@ class TestStandXMLConverter:
                             if string_step is None:
                                 continue
                             string_step.tot_time = step_execution_time
+                            self.check_caused_seq_failure(te_result, string_step)
                             current_step = string_step
                         
                         elif step_type.text in ["ET_MSVT"]:
                             multi_string_step = self.parse_multi_string_step(te_result, step_name, step_group, step_status, current_seq)
                             multi_string_step.tot_time = step_execution_time
+                            self.check_caused_seq_failure(te_result, multi_string_step)
                             current_step = multi_string_step
                         
                         elif step_type.text in ["PassFailTest", "ET_PFT"]:
@@ -252,12 +281,14 @@ class TestStandXMLConverter:
                             pass_fail_step.tot_time = step_execution_time
                             pass_fail_step.status = self.set_step_status(step_status)
                             self.check_for_error_msg(te_result, pass_fail_step)
+                            self.check_caused_seq_failure(te_result, pass_fail_step)
                             current_step = pass_fail_step
 
                         elif step_type.text in ["ET_MPFT"]:
                             multi_boolean_step = self.parse_multi_boolean_step(te_result, step_name, step_group, step_status, current_seq)
                             multi_boolean_step.tot_time = step_execution_time
                             self.check_for_error_msg(te_result, multi_boolean_step)
+                            self.check_caused_seq_failure(te_result, multi_boolean_step)
                             current_step = multi_boolean_step
 
                         elif step_type.text in ["NumericLimitTest", "ET_NLT"]:
@@ -265,6 +296,7 @@ class TestStandXMLConverter:
                             numeric_step = self.parse_numeric_step(te_result, step_name, step_group, step_status, current_seq)
                             numeric_step.tot_time = step_execution_time
                             self.check_for_error_msg(te_result, numeric_step)
+                            self.check_caused_seq_failure(te_result, numeric_step)
                             current_step = numeric_step
 
                         elif step_type.text in ["NI_MultipleNumericLimitTest", "ET_MNLT"]:
@@ -277,6 +309,7 @@ class TestStandXMLConverter:
                             mlt_numeric_step.tot_time = step_execution_time
                             mlt_numeric_step.status = self.set_step_status(step_status)
                             self.check_for_error_msg(te_result, mlt_numeric_step)
+                            self.check_caused_seq_failure(te_result, mlt_numeric_step)
                             current_step = mlt_numeric_step
 
                         elif step_type.text in FlowType._value2member_map_:
@@ -285,6 +318,7 @@ class TestStandXMLConverter:
                             generic_step = current_seq.add_generic_step(step_type=step_type, name=step_name, group=step_group, status=status)
                             generic_step.tot_time = step_execution_time
                             self.check_for_error_msg(te_result, generic_step)
+                            self.check_caused_seq_failure(te_result, generic_step)
                             current_step = generic_step
 
                         elif step_type.text == "MessagePopup":
@@ -301,6 +335,7 @@ class TestStandXMLConverter:
                                     message_pop_up_step.messagePopup.response = te_result.find("Prop[@Name='Response']").find("Value").text
                             
                             self.check_for_error_msg(te_result, message_pop_up_step)
+                            self.check_caused_seq_failure(te_result, message_pop_up_step)
                             current_seq.steps.append(message_pop_up_step)
                             current_step = message_pop_up_step
 
@@ -309,12 +344,14 @@ class TestStandXMLConverter:
                             call_exe_step = CallExeStep(name=step_name, callExe=CallExeStepInfo(), group=step_group, step_status=status, tot_time=step_execution_time, parent=current_seq)
                             call_exe_step.callExe.exit_code = int(te_result.find("Prop[@Name='ExitCode']").find("Value").text)
                             self.check_for_error_msg(te_result, call_exe_step)
+                            self.check_caused_seq_failure(te_result, call_exe_step)
                             current_seq.steps.append(call_exe_step)
                             current_step = call_exe_step
 
                         elif step_type.text == "WATS_XYGMNLT":
                             chart_step = self.parse_chart_step(te_result, step_name, step_group, step_status, current_seq)
                             self.check_for_error_msg(te_result, chart_step)
+                            self.check_caused_seq_failure(te_result, chart_step)
                             current_step = chart_step
 
                 step_report_text = te_result.find("Prop[@Name='ReportText']")
@@ -558,11 +595,9 @@ class TestStandXMLConverter:
                 step_unit = step_unit[:20]
 
             measure_status = measure.find("Prop[@Name='Status']").find("Value").text
+            measure_status = parsing_tables.MEASUREMENT_STATUS_MAP.get(measure_status.lower(), measure_status)
 
-            if measure_status.lower() == "passed":
-                measure_status = "P"
-            elif measure_status.lower() == "failed":
-                measure_status = "F"
+            if measure_status == "F":
                 current_step.status = StepStatus.Failed
                 current_seq.status = StepStatus.Failed
             
@@ -573,73 +608,24 @@ class TestStandXMLConverter:
             
         return current_step
     
-    # Method to parse the datetime string
+    # Method to localize the report start time
     def parse_datetime(self, parsed_dt):
+        """
+        Returns parsed_dt as an aware datetime in the converter's timezone.
+        """
         try:
-            
-            # Get the timezone from self.parameters["timeZone"]
-            time_zone_str = self.parameters["timezone"]
-            
-            # Get the local timezone
-            if time_zone_str is not None:
-                try:
-                    # Try to get the timezone using zoneinfo (Python 3.9+)
-                    local_tz = ZoneInfo(time_zone_str)
-                except Exception as e:
-                    print(f"Invalid timezone '{time_zone_str}' provided. Falling back to local timezone. Error: {e}")
-                    # Fallback to local timezone if the timezone is invalid
-                    local_tz = datetime.now().astimezone().tzinfo
-            else:
-                # If no timezone string is provided, fallback to local system timezone
-                local_tz = datetime.now().astimezone().tzinfo
-
-            # Localize the datetime (assign the timezone)
-            localized_dt = parsed_dt.replace(tzinfo=local_tz)
-            
-            # Format as ISO string with timezone offset
-            formatted_dt = localized_dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-            
-            return formatted_dt
-
-        except ValueError as e:
-            print(f"Error parsing the datetime string: {e}")
+            return parsing_tables.localize(parsed_dt, self.time_zone)
+        except (ValueError, OverflowError) as e:
+            print(f"Error localizing the datetime: {e}")
             return None
             
     # Method to extract numeric part from a string
     def extract_numeric(self, value: str) -> Optional[float]:
-        if value.lower() == "nan":
-            return math.nan
-        elif value.lower() == "inf":
-            return math.inf
-        elif value.lower() == "-inf":
-            return -math.inf
-        else:
-            match = re.search(r"(?P<numeric>[-+]?\d*\.?\d+)", value)
-            if match:
-                return float(match.group("numeric"))
-        return None      
+        return parsing_tables.extract_numeric(value)
     
     #Parse Value element
     def parse_value(self, value: str) -> str:
-        if value.lower() == "nan":
-            return "NaN"
-        elif value.lower() == "inf":
-            return "Inf"
-        elif value.lower() == "-inf":
-            return "-Inf"
-        elif value.lower() == "equal":
-            return "EQ"
-        elif value.lower() == "passed":
-            return "P"
-        elif value.lower() == "failed":
-            return "F"
-        elif value.lower() == "skipped":
-            return "S"
-        elif value.lower() == "true":
-            return "P"
-        elif value.lower() == "false":
-            return "F"
-        return value
+        return parsing_tables.parse_value(value)
     
     # Method to determine step status                          
     def set_step_status(self, step_status: str) -> StepStatus:
@@ -648,13 +634,7 @@ class TestStandXMLConverter:
         :param step_status: The status of the step.
         :return: The corresponding status code.
         """
-        status_map = {
-            "failed": StepStatus.Failed,
-            "skipped": StepStatus.Skipped,
-            "terminated": StepStatus.Terminated,
-            "done": StepStatus.Done
-        }
-        return status_map.get(step_status.lower(), StepStatus.Passed)
+        return parsing_tables.step_status(step_status)
     
     # Method to check for error message
     def check_for_error_msg(self, te_result, current_step):
@@ -665,16 +645,21 @@ class TestStandXMLConverter:
         if error_code is not None or error_code != "":
             current_step.error_code = error_code
 
+    # Method to map TestStand's "step failure causes sequence failure"
+    def check_caused_seq_failure(self, te_result, current_step):
+        """
+        Sets caused_seq_failure of a failed step from StepCausedSequenceFailure, so a failure TestStand
+        ignored does not fail the step's sequence and the UUT.
+        """
+        if status_value(current_step.status) != "F":
+            return
+        value = te_result.find("Prop[@Name='StepCausedSequenceFailure']/Value")
+        if value is not None and value.text:
+            current_step.caused_seq_failure = value.text.strip().lower() == "true"
+
     #Set Step Group
     def set_step_group(self, step_group: str) -> str:
-        
-        if step_group == "Setup":
-            step_group = "S"
-        elif step_group == "Cleanup":
-            step_group = "C"
-        else:
-            step_group = "M"
-        return step_group
+        return parsing_tables.step_group(step_group)
     
     #Get Comp Operator
     def get_comp_op(self, comp_op) -> str:
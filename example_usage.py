@@ -1,10 +1,13 @@
+import io
 import os
 import re
 import argparse
-import shutil
 from typing import Generator
+from uuid import UUID
 from pywats_api.WATS import WATS
-from converters.teststand_xml_converter import TestStandXMLConverter
+from pywats_api.folder_watcher import FolderWatcher
+from pywats_api.processing_journal import ProcessingJournal, PENDING, DONE, run_post_process_action
+from converters.converter_registry import default_registry
 
 class FileSearcher:
     def __init__(self, path: str, pattern: str):
@@ -18,9 +21,17 @@ class FileSearcher:
         if not os.path.isdir(self.path):
             raise ValueError(f"{self.path} er ikke en gyldig katalog")
         
-        for filename in os.listdir(self.path):
-            if self.pattern.match(filename):
-                yield os.path.join(self.path, filename)
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if self.pattern.match(entry.name) and entry.is_file():
+                    yield entry.path
+
+    def watch_matching_files(self) -> Generator[str, None, None]:
+        """
+        Generator that keeps watching path and yields matching files as soon as they are completely written.
+        """
+        watcher = FolderWatcher(self.path, self.pattern)
+        yield from watcher.watch()
 
 def main():
     
@@ -30,43 +41,56 @@ def main():
         path = "C:\\TestStandXML"
         pattern = ".*\\.xml$"
         ppa = "Move"
+        watch = False
     else:
         parser = argparse.ArgumentParser(description="Search for files based on regex and convert them")
         parser.add_argument("path", type=str, help="Path to the directory where the files should be searched")
         parser.add_argument("pattern", type=str, help="Regex-pattern to filter files")
-        parser.add_argument("ppa", type=str, help="Post process action after submitting report")
+        parser.add_argument("ppa", type=str, help="Post process action after submitting report: Move, Archive, Delete or None")
+        parser.add_argument("--watch", action="store_true", help="Keep watching the directory and convert new files as they arrive")
         args = parser.parse_args()
         path = args.path
         pattern = args.pattern
         ppa = args.ppa
+        watch = args.watch
         
     searcher = FileSearcher(path, pattern)
-    converter = TestStandXMLConverter()
+    converter = default_registry()  # Picks the TestStand XML or ATML converter per file
     
     # Create an instance of WATS
     url = "https://YOURSERVER.wats.com/"
     token = "YOURTOKEN"
     wats = WATS(url, token)
     
-    for file in searcher.find_matching_files():
+    files = searcher.watch_matching_files() if watch else searcher.find_matching_files()
+    # Write-ahead journal so a crash never causes a resubmission or a lost file
+    journal = ProcessingJournal(os.path.join(path, ".pywats_journal"))
 
-        with open(file, "rb") as file_stream:  # Open file as a stream
-            uut = converter.convert_report(file_stream)  # Pass stream instead of file path
-        
-        # Send report to WATS
-        wats.submit_report(uut)
-        
-        #PPA 
-        if ppa == "Move":
-            done_folder = os.path.join(path, "Done")
-            if os.path.exists(done_folder):
-                shutil.move(file, done_folder)
+    for file in files:
+
+        with open(file, "rb") as file_stream:
+            data = file_stream.read()
+        content_hash = ProcessingJournal.hash_bytes(data)
+        entry = journal.get(content_hash)
+
+        if entry is None or entry.state == PENDING:
+            uut = converter.convert_report(io.BytesIO(data))  # Pass stream instead of file path
+            if entry is None:
+                journal.begin(file, content_hash, uut.id)
             else:
-                #done_folder = os.path.join(path, "Done")
-                os.makedirs(done_folder)
-                shutil.move(file, done_folder)
-        elif ppa == "Delete":
-            os.remove(file)
+                # Interrupted before the submit was confirmed; reuse the id so the server overwrites.
+                uut.id = UUID(entry.report_id)
+
+            # Send report to WATS. False: the report was spooled (see WATS(spool_dir=...)) and the spool
+            # submits it; the file stays pending and is submitted again (same report id) on the next run.
+            if not wats.submit_report(uut):
+                continue
+            entry = journal.mark_submitted(content_hash)
+
+        #PPA - idempotent, so it is safe to repeat after a crash or for a re-dropped file
+        run_post_process_action(file, ppa, path)
+        if entry.state != DONE:
+            journal.mark_done(content_hash)
 
 if __name__ == "__main__":
     main()
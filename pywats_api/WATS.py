@@ -1,25 +1,100 @@
 import requests
-import json as json_module
-from typing import Any, Union
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Iterable, List, Optional, Tuple, Union
 from report.report import Report
 from report.uut.uut_report import UUTReport
 from report.uur.uur_report import UURReport
+from report.report_header import ReportHeader, parse_report_header
+from report.uut.validation import ReportValidationError, validate_report
 from urllib.parse import urlparse, urljoin
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .flow_control import FlowControl, is_overload_status
+from .instrumentation import span
+from .json_backend import get_backend
+from .report_cache import DEFAULT_MAX_BYTES, ReportCache
+from .report_index import ReportIndex
+from .report_spool import ReportSpool
 
 import logging
 logger = logging.getLogger(__name__)
+# Request and response bodies are logged at DEBUG to their own logger, which does not propagate to the
+# application's handlers (even when the root logger is at DEBUG). Its level is left to the application.
+# Enable with logging.getLogger("pywats_api.WATS.payload").propagate = True, or add a handler to it.
+payload_logger = logging.getLogger(__name__ + ".payload")
+payload_logger.addHandler(logging.NullHandler())
+payload_logger.propagate = False
+
+# Keep-alive connections per host kept open by each session. This does not limit concurrency: each
+# thread has its own session, and a session opens (and then closes) extra connections when all are busy.
+DEFAULT_POOL_SIZE = 16
+# Seconds to wait for a connection to the server and for its response (requests' (connect, read) timeout)
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+# Bytes of a request/response body written to the log
+PAYLOAD_LOG_LIMIT = 2048
+
+
+class _Payload:
+    """
+    A body in a log message. Only formatted when the record is emitted, and only its first
+    PAYLOAD_LOG_LIMIT bytes, so logging a multi-MB report costs nothing while the logger is off.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: Union[bytes, str, None]):
+        self.data = data
+
+    def __str__(self) -> str:
+        data = self.data
+        if not data:
+            return "<empty>"
+        head = data[:PAYLOAD_LOG_LIMIT]
+        if isinstance(head, bytes):
+            head = head.decode("utf-8", errors="replace")
+        if len(data) > PAYLOAD_LOG_LIMIT:
+            return f"{head}... ({len(data)} bytes)"
+        return head
 
 
-class ReportHeader:
-    uuid: str | None = None
-
 class WATS(): 
     
-    def __init__(self, url=None, token=None):
+    def __init__(self, url=None, token=None, json_backend: Optional[str] = None, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = DEFAULT_MAX_BYTES, cache_max_age: Optional[float] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, index_path: Optional[str] = None,
+                 flow_control: Optional[FlowControl] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 spool_dir: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float], None] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)):
         # Log the init parameters at debug level for diagnostic purposes
         logger.debug("Initializing WATS with url=%s, token=%s", url, token)
         self.url = url
         self.token = token
+        # JSON encoder/decoder ("json", "orjson" or None for the fastest installed)
+        self.json = get_backend(json_backend)
+        # Downloaded reports are kept on disk (for up to cache_max_age seconds) when a cache directory is given
+        self.cache = ReportCache(cache_dir, cache_max_bytes, cache_max_age) if cache_dir else None
+        # Submitted reports are recorded in a local SQLite index when a path is given
+        self.index = ReportIndex(index_path) if index_path else None
+        # Rate and concurrency limit for submissions, may be shared with other instances (see flow_control)
+        self.flow_control = flow_control
+        # Fails requests fast while the server is down, may be shared with other instances (see circuit_breaker)
+        self.circuit_breaker = circuit_breaker
+        # Reports that could not be submitted (server down, throttled) are kept here when a directory is given;
+        # see flush_spool()
+        self.spool = ReportSpool(spool_dir) if spool_dir else None
+        # (connect, read) timeout of every request; None waits forever
+        self.timeout = timeout
+
+        # One pooled session (keep-alive connections) per thread: requests.Session is not thread-safe
+        # (cookies, redirects), and load_reports() and SubmissionWorker send from several threads.
+        # self.session is the session of the thread that created the client.
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._sessions_lock = threading.Lock()
+        self._sessions = weakref.WeakSet()
+        self.session = self._thread_session()
 
         # Validate required parameters; log and raise exception if missing
         if not self.url or not self.token:
@@ -39,12 +114,28 @@ class WATS():
 
         ## TODO: Sjekke at API er connected ved api kall og logg connection sucessfull
 
-        self.sync_local_processes_with_server()
+        # Process list, synchronized now; with a spool the client must also start while the server is
+        # down, so a failed sync is logged and retried by get_local_processes()
+        self.processes = None
+        try:
+            self.sync_local_processes_with_server()
+        except (requests.exceptions.RequestException, CircuitOpenError) as err:
+            if self.spool is None:
+                raise
+            logger.warning("Process list not synchronized, the server is unavailable: %s", err)
 
         # Log success after setting URL/token
         logger.info("WATS instance created with URL: %s", self.url)
 
-    def submit_report(self, report: Union[str, 'Report']):
+    def submit_report(self, report: Union[str, 'Report'], validate: bool = False) -> bool:
+        """
+        Submits a report. With validate=True the report's steps are checked first (see
+        report.uut.validation) and ReportValidationError is raised instead of submitting.
+
+        With a spool (spool_dir), a report the server cannot take now (unreachable, timeout, 5xx,
+        429 or an open circuit) is spooled instead of raising. Returns True when the report was
+        submitted, False when it was spooled.
+        """
         logger.debug("submit_report_from_object called")
         
         headers = {
@@ -53,29 +144,197 @@ class WATS():
         }
 
         if isinstance(report, str):
-            json_string = self.get_validated_json_string(report)
-        else:
-            json_string = self.report_object_to_json_string(report)
-
+            report = self.json_string_to_report_object(report)
+        if validate:
+            issues = validate_report(report)
+            if issues:
+                raise ReportValidationError(issues)
+
+        with span("client.submit_report") as timing:
+            json_data = self._encode_report(report)
+            timing.set("payload_bytes", len(json_data))
+
+            endpoint = self._get_full_endpoint("api/Report/WSJF")
+            logger.debug("Endpoint URL: %s", endpoint)
+            payload_logger.debug("Request body: %s", _Payload(json_data))
+
+            try:
+                response = self._post(endpoint, json_data, headers)
+                timing.set("status_code", str(response.status_code))
+                logger.debug("Received response with status code: %s", response.status_code)
+                if self.spool is not None and is_overload_status(response.status_code):
+                    return self._spool_report(report, json_data, f"HTTP {response.status_code}")
+                response.raise_for_status()
+                logger.info("Report with uuid %s was sent successfully.", report.id)
+                if self.cache is not None:
+                    self.cache.invalidate(report.id)
+            except (CircuitOpenError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                if self.spool is None:
+                    logger.error("Error occurred during report submission: %s", err)
+                    raise
+                return self._spool_report(report, json_data, err)
+            except requests.exceptions.HTTPError as http_err:
+                logger.error("HTTP error occurred during report submission: %s - Response text: %s", http_err, _Payload(response.content))
+                raise 
+            except Exception as err:
+                logger.error("Error occurred during report submission: %s", err)
+                raise
+        if self.index is not None:
+            self.index.add(report)
+        return True
+
+    def _spool_report(self, report: Report, json_data: bytes, reason: Any) -> bool:
+        self.spool.put(report.id, json_data)
+        logger.warning("Report with uuid %s was spooled (%s); %d reports waiting.", report.id, reason, len(self.spool))
+        return False
+
+    def flush_spool(self, max_reports: Optional[int] = None) -> int:
+        """
+        Submits spooled reports, oldest first, until the spool is empty, max_reports were sent or the
+        server fails again (the rest stays spooled). Reports the server rejects (4xx) are moved to the
+        spool's rejected/ directory. While the circuit is open, nothing is sent until its next probe.
+
+        :return: Number of reports submitted.
+        """
+        if self.spool is None:
+            return 0
+        headers = {
+            'Authorization': f'Basic {self.token}',
+            'Content-Type': 'application/json'
+        }
         endpoint = self._get_full_endpoint("api/Report/WSJF")
-        logger.debug(f"Endpoint URL: {endpoint}")
-
+        sent = 0
+        for report_id in self.spool.pending():
+            if max_reports is not None and sent >= max_reports:
+                break
+            data = self.spool.get(report_id)
+            if data is None:
+                continue
+            try:
+                response = self._post(endpoint, data, headers)
+            except (CircuitOpenError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                logger.info("Spool flush stopped: %s", err)
+                break
+            if is_overload_status(response.status_code):
+                logger.info("Spool flush stopped: HTTP %s", response.status_code)
+                break
+            if response.status_code >= 400:
+                logger.error("Spooled report %s was rejected: %s - Response text: %s", report_id, response.status_code, _Payload(response.content))
+                self.spool.reject(report_id)
+                continue
+            self.spool.remove(report_id)
+            if self.cache is not None:
+                self.cache.invalidate(report_id)
+            if self.index is not None:
+                self.index.add(self.json_string_to_report_object(data))
+            sent += 1
+        if sent:
+            logger.info("Submitted %d spooled reports; %d waiting.", sent, len(self.spool))
+        return sent
+
+    def _thread_session(self) -> requests.Session:
+        """ The calling thread's session, created on first use """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # Sessions of threads that ended are freed with the thread
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
+
+    def _post(self, endpoint: str, data: bytes, headers: dict) -> requests.Response:
+        """ POST through the circuit breaker and flow control, when configured """
+        return self._request("POST", endpoint, self.flow_control, data=data, headers=headers)
+
+    def _get(self, endpoint: str, **kwargs) -> requests.Response:
+        """ GET through the circuit breaker, when configured (flow control only limits submissions) """
+        return self._request("GET", endpoint, None, **kwargs)
+
+    def _request(self, method: str, endpoint: str, flow_control: Optional[FlowControl], **kwargs) -> requests.Response:
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(breaker.retry_in)
         try:
-            response = requests.post(endpoint, data=json_string, headers=headers)
-            logger.debug(f"Received response with status code: {response.status_code}")
-            response.raise_for_status()
-            logger.info(f"Report with uuid {report.id} was sent successfully.")
-        except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred during report submission: {http_err} - Response text: {response.text}")
-            raise 
-        except Exception as err:
-            logger.error(f"Error occurred during report submission: {err}")
+            session = self._thread_session()
+            if flow_control is None:
+                response = session.request(method, endpoint, timeout=self.timeout, **kwargs)
+            else:
+                with flow_control.permit() as permit:
+                    response = session.request(method, endpoint, timeout=self.timeout, **kwargs)
+                    permit.record(response.status_code, response.headers.get("Retry-After"))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            # The server did not answer
+            if breaker is not None:
+                breaker.record_failure()
             raise
-        # Should we return a status or true/false?
-
+        except BaseException:
+            # No permit within the flow control timeout (FlowControlTimeout) or a local error:
+            # the request never reached the server, so it is not counted either way
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            # 4xx and 429 come from a working server
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
 
     def load_report_from_server(self, guid, context: Any=None) -> Union[UUTReport,UURReport]:  
-        logger.debug(f"load_report called with id: {guid}")
+        logger.debug("load_report called with id: %s", guid)
+
+        # Validate and parse the response body into a UUTReport/UURReport object
+        report = self.json_string_to_report_object(self._get_report_json(guid), context)
+        logger.info("Report with GUID %s was loaded successfully.", guid)
+        return report
+
+    def load_report_header_from_server(self, guid, context: Any=None) -> ReportHeader:
+        """
+        Loads a report, parsing only its header. The full report (step tree) is validated
+        on first use of header.report / header.root.
+        """
+        logger.debug("load_report_header called with id: %s", guid)
+
+        header = self.json_string_to_report_header(self._get_report_json(guid), context)
+        logger.info("Report header with GUID %s was loaded successfully.", guid)
+        return header
+
+    def load_reports(self, guids: Iterable, max_concurrency: int = 8, context: Any=None,
+                     header_only: bool = False) -> List[Union[UUTReport, UURReport, ReportHeader]]:
+        """
+        Loads several reports in parallel (each worker thread with its own session). Reports in
+        the cache are not downloaded again.
+
+        :param guids: Report ids.
+        :param max_concurrency: Maximum number of downloads at the same time.
+        :param header_only: Return ReportHeader projections instead of full reports.
+        :return: The reports, in the order of guids. The first failure is raised.
+        """
+        guids = list(guids)
+        logger.debug("load_reports called with %d ids", len(guids))
+        parse = self.json_string_to_report_header if header_only else self.json_string_to_report_object
+
+        def load(guid):
+            return parse(self._get_report_json(guid), context)
+
+        if max_concurrency <= 1 or len(guids) <= 1:
+            return [load(guid) for guid in guids]
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(guids)), thread_name_prefix="wats-load") as executor:
+            reports = list(executor.map(load, guids))
+        logger.info("Loaded %d reports", len(reports))
+        return reports
+
+    def _get_report_json(self, guid) -> bytes:
+        """ Returns the WSJF JSON of a report, from the cache or downloaded """
+        if self.cache is not None:
+            data = self.cache.get(guid)
+            if data is not None:
+                logger.debug("Report %s loaded from cache", guid)
+                return data
 
         headers = {
             'Authorization': f'Basic {self.token}',
@@ -85,30 +344,24 @@ class WATS():
         params = {'id': guid}
  
         endpoint = self._get_full_endpoint(f"api/Report/WSJF/{guid}")
-        logger.debug(f"Endpoint URL: {endpoint}")
+        logger.debug("Endpoint URL: %s", endpoint)
 
         try:
-            response = requests.get(endpoint, params=params, headers=headers)
-            logger.debug(f"Received response with status code: {response.status_code}")
+            response = self._get(endpoint, params=params, headers=headers)
+            logger.debug("Received response with status code: %s", response.status_code)
             
             response.raise_for_status()
             
-            json_data = response.json()
-            logger.debug(f"Response JSON: {json_data}")
-
-            # Convert the dictionary to a JSON string
-            json_string = json_module.dumps(json_data)
-            
-            # Validate and parse the JSON string into a UUTReport object
-            report = self.json_string_to_report_object(json_string, context)
-            
-            logger.info(f"Report with GUID {guid} was loaded successfully.")
-            return report
+            logger.debug("Response size: %d bytes", len(response.content))
+            payload_logger.debug("Response body: %s", _Payload(response.content))
+            if self.cache is not None:
+                self.cache.put(guid, response.content)
+            return response.content
         except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred during report loading: {http_err} - Response text: {response.text}")
+            logger.error("HTTP error occurred during report loading: %s - Response text: %s", http_err, _Payload(response.content))
             raise 
         except Exception as err:
-            logger.error(f"Error occurred during report loading: {err}")
+            logger.error("Error occurred during report loading: %s", err)
             raise
 
     def sync_local_processes_with_server(self):
@@ -123,46 +376,67 @@ class WATS():
         logger.debug("Endpoint URL: %s", endpoint)
 
         try:
-            response = requests.get(endpoint, headers=headers)
-            logger.debug(f"Received response with status code: {response.status_code}")
+            response = self._get(endpoint, headers=headers)
+            logger.debug("Received response with status code: %s", response.status_code)
             
             response.raise_for_status()
             
-            processes = response.json()
-            logger.debug(f"Synchronized processes: {processes}")
+            processes = self.json.loads(response.content)
+            logger.debug("Synchronized processes (%d bytes)", len(response.content))
+            payload_logger.debug("Processes: %s", _Payload(response.content))
             
             self.processes = processes
             return self.processes
 
         except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred during process synchronization: {http_err} - Response text: {response.text}")
+            logger.error("HTTP error occurred during process synchronization: %s - Response text: %s", http_err, _Payload(response.content))
             raise
         except Exception as err:
-            logger.error(f"Error occurred during process synchronization: {err}")
+            logger.error("Error occurred during process synchronization: %s", err)
             raise
 
     def get_local_processes(self):
         logger.debug("get_local_processes called.")
+        if self.processes is None:
+            self.sync_local_processes_with_server()
         return self.processes
 
     def _get_full_endpoint(self, endpoint: str) -> str:
         """ Ensures consistent API endpoint joining """
         return urljoin(self.url + '/', endpoint) 
     
-    def report_object_to_json_string(self, report: Report):
-        return report.model_dump_json(by_alias=True, exclude_none=True)
+    def report_object_to_json_string(self, report: Report) -> str:
+        return self._encode_report(report).decode("utf-8")
+
+    def _encode_report(self, report: Report) -> bytes:
+        with span("client.serialize") as timing:
+            json_data = self.json.encode_report(report)
+            timing.set("payload_bytes", len(json_data))
+        return json_data
 
-    def json_string_to_report_object(self, json : str, context:Any=None):
+    def json_string_to_report_object(self, json : Union[str, bytes], context:Any=None) -> Union[UUTReport, UURReport]:
         #return UUTReport.model_validate_json(json, context={"is_deserialization": True})
-        return UUTReport.model_validate_json(json, context=context) 
+        return self.json.decode_report(json, context=context)
     
-    def get_validated_json_string(self, json : str, context:Any=None):
-        return UUTReport.model_validate_json(json, context=context)
-
-
-
-
-
-
-
-
+    def json_string_to_report_header(self, json : Union[str, bytes], context:Any=None) -> ReportHeader:
+        return parse_report_header(json, context)
+
+    def get_validated_json_string(self, json : Union[str, bytes], context:Any=None) -> str:
+        """ Validates json as a report and returns it re-encoded as WSJF JSON """
+        return self.report_object_to_json_string(self.json_string_to_report_object(json, context))
+
+    def close(self):
+        """ Writes and closes the report index and closes the server connections """
+        if self.index is not None:
+            self.index.close()
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.close()
+
+    def __enter__(self) -> "WATS":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
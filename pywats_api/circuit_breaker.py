@@ -0,0 +1,109 @@
+"""
+Circuit breaker for the WATS server.
+
+After failure_threshold consecutive failures (connection errors, timeouts, 5xx responses) the
+circuit opens: calls fail at once (or are spooled, see WATS(spool_dir=...)) instead of each
+waiting for a timeout. After reset_timeout seconds one call is let through as a probe (half
+open). Its success closes the circuit again; its failure keeps it open for another reset_timeout.
+Every request of the WATS client goes through the breaker: submissions, report downloads and
+the process list.
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    wats = WATS(url, token, circuit_breaker=breaker, spool_dir="spool")
+
+Like FlowControl, one breaker can be shared by all WATS instances talking to the same server.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """ Raised instead of calling the server while the circuit is open """
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f"WATS server unavailable (circuit open); next attempt in {retry_in:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. Thread-safe.
+
+    :param failure_threshold: Consecutive failures that open the circuit.
+    :param reset_timeout: Seconds the circuit stays open before a probe call is let through.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        """
+        Number of times the circuit opened.
+        """
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """ Seconds until the next probe is let through (0 when calls are allowed) """
+        if self._state == CLOSED:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """ True when a call may go to the server; every allowed call must record its outcome or release() """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._probing or time.monotonic() < self._opened_at + self.reset_timeout:
+                return False
+            # One probe at a time
+            self._state = HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("WATS server reachable again; circuit closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self):
+        """ An allowed call that never reached the server: lets the next probe through, counts nothing """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                if self._state == CLOSED:
+                    logger.warning("WATS server failed %d times in a row; circuit open for %.1fs", self._failures, self.reset_timeout)
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self._state, "failures": self._failures, "opened": self.opened, "retry_in": self.retry_in}
@@ -0,0 +1,310 @@
+"""
+Flow control for report submission.
+
+When many stations reconnect at once and submit their backlog, the server is protected by two
+client-side limits:
+
+    RateLimiter          token bucket: at most rate requests per second (bursts of up to burst)
+    AdaptiveConcurrency  AIMD limit on requests in flight: +1 per round trip of successful
+                         requests, halved (backoff) on 429/5xx, connection errors and latency
+                         growing beyond latency_tolerance times the best latency seen
+
+FlowControl combines both. One instance is meant to be shared by all threads and WATS instances
+of a process that submit to the same server:
+
+    flow = FlowControl(rate=50, burst=10, max_concurrency=32)
+    wats_a = WATS(url, token, flow_control=flow)
+    wats_b = WATS(url, other_token, flow_control=flow)
+
+A 429 response with Retry-After also pauses all requests for that many seconds.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class FlowControlTimeout(TimeoutError):
+    """ Raised when no request slot became available within the timeout """
+
+
+def is_overload_status(status_code: int) -> bool:
+    """ Statuses that mean the server is overloaded (the concurrency limit backs off on them) """
+    return status_code == 429 or status_code >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """ Seconds of a Retry-After header (the HTTP-date form is not supported) """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+# ------------------------------------------------------------------------
+# Rate limiter
+class RateLimiter:
+    """
+    Token bucket. Thread-safe.
+
+    Waiting callers reserve their token up front (the bucket goes negative), so they are
+    served in arrival order at exactly rate requests per second.
+
+    :param rate: Requests per second.
+    :param burst: Tokens stored while idle, i.e. requests that may be sent at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        # Time the tokens were counted at; in the future while paused
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """ Takes a token, waiting for it if needed. Returns False when that would take longer than timeout """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._updated - now) + max(0.0, (1 - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return False
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def pause(self, seconds: float):
+        """ Sends nothing for the next seconds (e.g. a server's Retry-After) """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            until = now + seconds
+            if until > self._updated:
+                self._updated = until
+                self._tokens = min(self._tokens, 0.0)
+
+
+# ------------------------------------------------------------------------
+# Adaptive concurrency
+class AdaptiveConcurrency:
+    """
+    AIMD (additive increase, multiplicative decrease) limit on requests in flight. Thread-safe.
+
+    Every successful request raises the limit by 1/limit (about +1 per round trip at full
+    load). An overloaded request multiplies it by backoff, at most once per round trip: requests
+    started before the last decrease do not decrease it again.
+
+    :param initial_limit: Starting limit.
+    :param min_limit: The limit never goes below this.
+    :param max_limit: The limit never goes above this.
+    :param backoff: Factor applied to the limit on overload.
+    :param latency_tolerance: A successful request slower than this many times the baseline (best
+        recent) latency counts as overload. None disables latency based backoff.
+    :param min_latency: Latency below this many seconds never counts as overload.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64, backoff: float = 0.5,
+                 latency_tolerance: Optional[float] = 2.0, min_latency: float = 0.05):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_latency = min_latency
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def baseline_latency(self) -> Optional[float]:
+        return self._baseline
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Waits for a free slot. Returns the start time to pass to release(), or None when no slot
+        became free within timeout.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout):
+                return None
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False):
+        """ Frees the slot of a request started at started and adjusts the limit """
+        now = time.monotonic()
+        latency = now - started
+        with self._condition:
+            self._in_flight -= 1
+            if not overloaded and self.latency_tolerance is not None:
+                baseline = self._baseline
+                if baseline is None or latency < baseline:
+                    self._baseline = latency
+                else:
+                    overloaded = latency > max(baseline * self.latency_tolerance, self.min_latency)
+                    # Follows a server that got slower for good, slowly
+                    self._baseline = baseline + (latency - baseline) * 0.01
+            if overloaded:
+                if started >= self._last_decrease:
+                    limit = max(self.min_limit, self._limit * self.backoff)
+                    if limit < self._limit:
+                        logger.debug("Concurrency limit %d -> %d (latency %.3fs)", self._limit, limit, latency)
+                    self._limit = limit
+                    self._last_decrease = now
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def cancel(self):
+        """ Frees the slot of a request that was not sent; the limit is not changed """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+# ------------------------------------------------------------------------
+# Flow control
+class _Permit:
+    """ One request admitted by FlowControl.permit(); report its outcome with record() """
+    __slots__ = ("status_code", "retry_after")
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def record(self, status_code: int, retry_after: Optional[str] = None):
+        """ The response status (and Retry-After header) of the request """
+        self.status_code = status_code
+        self.retry_after = parse_retry_after(retry_after)
+
+
+class FlowControl:
+    """
+    Rate limit and adaptive concurrency for the requests to one server. Thread-safe; share one
+    instance between all threads and WATS instances submitting to that server.
+
+    :param rate: Requests per second; None for no rate limit.
+    :param burst: Requests that may be sent at once after an idle period (default: rate, at least 1).
+    :param max_concurrency: Upper bound of the concurrency limit; further parameters as AdaptiveConcurrency.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None, initial_concurrency: int = 4,
+                 min_concurrency: int = 1, max_concurrency: int = 64, backoff: float = 0.5,
+                 latency_tolerance: Optional[float] = 2.0, min_latency: float = 0.05):
+        self.rate_limiter = RateLimiter(rate, burst if burst is not None else max(1, int(rate))) if rate else None
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, min_concurrency, max_concurrency, backoff,
+                                               latency_tolerance, min_latency)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "overloaded": 0, "timeouts": 0}
+        # No request is sent before this time (monotonic), see pause()
+        self._resume_at = 0.0
+
+    def permit(self, timeout: Optional[float] = None) -> "_PermitContext":
+        """
+        Waits until a request may be sent (rate and concurrency). Use as a context manager around the
+        request and record() its status; an exception without a recorded status counts as overload.
+
+            with flow.permit() as permit:
+                response = session.post(...)
+                permit.record(response.status_code, response.headers.get("Retry-After"))
+
+        :raises FlowControlTimeout: No slot within timeout seconds.
+        """
+        return _PermitContext(self, timeout)
+
+    def pause(self, seconds: float):
+        """ Sends no request for the next seconds (a server's Retry-After) """
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+        if self.rate_limiter is not None:
+            # No burst of stored tokens after the pause
+            self.rate_limiter.pause(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Current limit, requests in flight and counters """
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(limit=self.concurrency.limit, in_flight=self.concurrency.in_flight,
+                     baseline_latency=self.concurrency.baseline_latency)
+        return stats
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+
+class _PermitContext:
+    __slots__ = ("flow", "timeout", "permit", "started")
+
+    def __init__(self, flow: FlowControl, timeout: Optional[float]):
+        self.flow = flow
+        self.timeout = timeout
+        self.permit = _Permit()
+        self.started = 0.0
+
+    def __enter__(self) -> _Permit:
+        flow, timeout = self.flow, self.timeout
+        now = time.monotonic()
+        deadline = None if timeout is None else now + timeout
+        paused = flow._resume_at - now
+        if paused > 0:
+            if deadline is not None and flow._resume_at > deadline:
+                flow._count("timeouts")
+                raise FlowControlTimeout(f"Paused for {paused:.1f}s, longer than the timeout ({timeout}s)")
+            time.sleep(paused)
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        started = flow.concurrency.acquire(timeout)
+        if started is None:
+            flow._count("timeouts")
+            raise FlowControlTimeout(f"No request slot within {timeout}s")
+        if flow.rate_limiter is not None:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not flow.rate_limiter.acquire(remaining):
+                flow.concurrency.cancel()
+                flow._count("timeouts")
+                raise FlowControlTimeout(f"No request slot within {timeout}s")
+            # Time spent waiting for the rate limiter is not latency
+            started = time.monotonic()
+        self.started = started
+        return self.permit
+
+    def __exit__(self, exc_type, exc, tb):
+        flow, permit = self.flow, self.permit
+        status_code = permit.status_code
+        overloaded = is_overload_status(status_code) if status_code is not None else exc_type is not None
+        if status_code == 429 and permit.retry_after:
+            flow.pause(permit.retry_after)
+        flow.concurrency.release(self.started, overloaded)
+        flow._count("requests")
+        if overloaded:
+            flow._count("overloaded")
+        return False
@@ -0,0 +1,221 @@
+"""
+Folder watcher for continuous drop-folder ingestion.
+
+Uses inotify (Linux) to get notified when a file has been completely written
+(close-write) or moved into the folder, and falls back to a scandir based
+polling loop on other platforms. Files are only reported once their size has
+settled, and each file is reported once per appearance in the folder.
+"""
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Generator, Optional, Set, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# inotify constants (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """ Minimal ctypes binding of the inotify API for a single directory """
+
+    def __init__(self, path: str):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def read_events(self) -> Generator[Tuple[int, str], None, None]:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield mask, os.fsdecode(name)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class FolderWatcher:
+    """
+    Watches a folder and yields paths of newly completed files that match pattern.
+
+    :param path: The folder to watch.
+    :param pattern: Regex pattern (str or compiled) the file name must match.
+    :param debounce: Seconds a close-write must be quiet before the file is reported.
+    :param settle_time: Seconds size/mtime must be unchanged before a polled file is reported.
+    :param poll_interval: Seconds between scans when polling.
+    :param use_inotify: Force (True) or disable (False) inotify. Default: use when available.
+    :param include_existing: Report files already present in the folder when watching starts.
+    """
+
+    def __init__(self, path: str, pattern, *,
+                 debounce: float = 0.2,
+                 settle_time: float = 1.0,
+                 poll_interval: float = 0.5,
+                 use_inotify: Optional[bool] = None,
+                 include_existing: bool = True):
+        if not os.path.isdir(path):
+            raise ValueError(f"{path} is not a valid directory")
+        self.path = path
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.debounce = debounce
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.include_existing = include_existing
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        self.use_inotify = use_inotify
+        self._stop = threading.Event()
+
+    def stop(self):
+        """ Makes a running watch() generator return at its next wake-up """
+        self._stop.set()
+
+    def watch(self) -> Generator[str, None, None]:
+        """
+        Generator yielding full paths of completed files until stop() is called.
+        """
+        self._stop.clear()
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify(self.path)
+            except (OSError, AttributeError) as err:
+                logger.warning("inotify not available (%s), falling back to polling", err)
+
+        if inotify is None:
+            yield from self._watch_polling()
+            return
+        try:
+            yield from self._watch_inotify(inotify)
+        finally:
+            inotify.close()
+
+    # -------------------------------------------------------------------
+    # inotify
+    def _watch_inotify(self, inotify: _Inotify) -> Generator[str, None, None]:
+        pending: Dict[str, float] = {}
+        if self.include_existing:
+            # Existing files are complete as far as we can tell; report them right away.
+            for name in self._scan_matching():
+                pending[name] = 0.0
+
+        poller = select.poll()
+        poller.register(inotify.fd, select.POLLIN)
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for name in [n for n, due in pending.items() if due <= now]:
+                del pending[name]
+                full_path = os.path.join(self.path, name)
+                if os.path.isfile(full_path):
+                    yield full_path
+            if self._stop.is_set():
+                break
+
+            # Sleep until the next debounce deadline, a new event or the stop check.
+            timeout = self.poll_interval
+            if pending:
+                timeout = max(0.0, min(timeout, min(pending.values()) - time.monotonic()))
+            if not poller.poll(timeout * 1000):
+                continue
+
+            for mask, name in inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    # Kernel queue overflowed: resynchronize with one scan.
+                    logger.warning("inotify queue overflow in %s, rescanning", self.path)
+                    for existing in self._scan_matching():
+                        pending.setdefault(existing, time.monotonic() + self.debounce)
+                    continue
+                if mask & (IN_ISDIR | IN_IGNORED) or not self.pattern.match(name):
+                    continue
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    pending.pop(name, None)
+                else:
+                    pending[name] = time.monotonic() + self.debounce
+
+    # -------------------------------------------------------------------
+    # Polling fallback
+    def _watch_polling(self) -> Generator[str, None, None]:
+        # name -> (size, mtime_ns, time first seen with this size/mtime)
+        candidates: Dict[str, Tuple[int, int, float]] = {}
+        reported: Set[str] = set()
+        first_scan = True
+        while not self._stop.is_set():
+            now = time.monotonic()
+            present: Set[str] = set()
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not self.pattern.match(name):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    present.add(name)
+                    if name in reported:
+                        continue
+                    if first_scan and self.include_existing:
+                        reported.add(name)
+                        yield entry.path
+                        continue
+                    if first_scan:
+                        reported.add(name)
+                        continue
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    previous = candidates.get(name)
+                    if previous is None or previous[:2] != signature:
+                        candidates[name] = (*signature, now)
+                    elif now - previous[2] >= self.settle_time:
+                        del candidates[name]
+                        reported.add(name)
+                        yield entry.path
+            first_scan = False
+
+            # Forget files that left the folder so a new file with the same name is picked up.
+            reported &= present
+            for name in [n for n in candidates if n not in present]:
+                del candidates[name]
+
+            self._stop.wait(self.poll_interval)
+
+    def _scan_matching(self):
+        with os.scandir(self.path) as entries:
+            return [entry.name for entry in entries if self.pattern.match(entry.name) and entry.is_file()]
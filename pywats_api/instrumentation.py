@@ -0,0 +1,229 @@
+"""
+Timing instrumentation for the ingestion hot path.
+
+Converters and the WATS client time their stages in spans:
+
+    converter.convert_report   whole conversion of one report (steps)
+    converter.parse_xml        XML parsing (input_bytes)
+    converter.create_uut       report header and step tree (steps)
+    converter.add_steps        step tree only (steps)
+    client.serialize           report -> WSJF JSON (payload_bytes)
+    client.submit_report       serialization and HTTP post (payload_bytes, status_code)
+
+Finished spans are passed to the registered sinks: a MetricsCollector (Prometheus text format),
+a CallbackSink or any object with a record(span) method.
+
+    metrics = MetricsCollector()
+    add_sink(metrics)
+    ...
+    print(metrics.render())
+
+With no sink registered, span() returns a shared no-op span: no clock reads, no allocations.
+Attributes that are expensive to compute (like step counts) are only computed for recording
+spans (see Span.recording).
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """
+    A timed stage. Use as a context manager; duration is in seconds.
+    """
+    __slots__ = ("name", "attributes", "start", "duration", "error")
+    recording = True
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        """
+        Exception type name when the stage raised.
+        """
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _emit(self)
+        return False
+
+    def __repr__(self):
+        return f"Span({self.name!r}, duration={self.duration:.6f}, attributes={self.attributes!r})"
+
+
+class _NoopSpan:
+    """ Returned by span() while no sink is registered """
+    __slots__ = ()
+    recording = False
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+# Replaced (not mutated) on change, so span() and _emit() read it without a lock
+_sinks: Tuple[Any, ...] = ()
+_sinks_lock = threading.Lock()
+
+
+def span(name: str, **attributes: Any):
+    """ Returns a span for a stage: a recording Span when a sink is registered, else a no-op """
+    if not _sinks:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def _emit(finished: Span):
+    for sink in _sinks:
+        try:
+            sink.record(finished)
+        except Exception:
+            # A broken sink must not break ingestion
+            logger.exception("Instrumentation sink %r failed", sink)
+
+
+def add_sink(sink: Any):
+    """ Registers a sink (any object with a record(span) method) """
+    global _sinks
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+
+
+def remove_sink(sink: Any):
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(s for s in _sinks if s is not sink)
+
+
+def is_enabled() -> bool:
+    """ True when spans are recorded """
+    return bool(_sinks)
+
+
+def count_steps(root) -> int:
+    """ Number of steps below a sequence call (columnar rows are counted without materializing them) """
+    count = 0
+    stack = [root]
+    while stack:
+        steps = stack.pop().steps
+        if not steps:
+            continue
+        count += len(steps)
+        stack.extend(step for step in list.__iter__(steps) if getattr(step, "steps", None))
+    return count
+
+
+# ------------------------------------------------------------------------
+# Sinks
+class CallbackSink:
+    """ Calls callback(span) for every finished span """
+
+    def __init__(self, callback: Callable[[Span], None]):
+        self.callback = callback
+
+    def record(self, finished: Span):
+        self.callback(finished)
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _SpanMetrics:
+    __slots__ = ("count", "errors", "total", "buckets", "sums")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * (bucket_count + 1)
+        # Numeric attribute -> sum
+        self.sums: Dict[str, float] = {}
+
+
+class MetricsCollector:
+    """
+    Aggregates spans into Prometheus-style metrics per span name: a duration histogram, an error
+    counter and a sum counter for every numeric attribute (payload_bytes, steps, ...). Thread-safe.
+
+    :param prefix: Prefix of the metric names.
+    :param buckets: Upper bounds of the duration histogram buckets, in seconds.
+    """
+
+    def __init__(self, prefix: str = "pywats", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _SpanMetrics] = {}
+
+    def record(self, finished: Span):
+        with self._lock:
+            metrics = self._metrics.get(finished.name)
+            if metrics is None:
+                metrics = self._metrics[finished.name] = _SpanMetrics(len(self.buckets))
+            metrics.count += 1
+            metrics.total += finished.duration
+            metrics.buckets[bisect.bisect_left(self.buckets, finished.duration)] += 1
+            if finished.error is not None:
+                metrics.errors += 1
+            for key, value in finished.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metrics.sums[key] = metrics.sums.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """ Span name -> {"count", "errors", "seconds", <attribute sums>} """
+        with self._lock:
+            return {name: {"count": m.count, "errors": m.errors, "seconds": m.total, **m.sums} for name, m in self._metrics.items()}
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def render(self) -> str:
+        """ The metrics in the Prometheus text exposition format """
+        prefix = self.prefix
+        lines: List[str] = [
+            f"# TYPE {prefix}_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self._metrics.items())
+            for name, m in items:
+                cumulative = 0
+                for bound, count in zip(self.buckets, m.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {m.count}')
+                lines.append(f'{prefix}_span_duration_seconds_sum{{span="{name}"}} {m.total}')
+                lines.append(f'{prefix}_span_duration_seconds_count{{span="{name}"}} {m.count}')
+            lines.append(f"# TYPE {prefix}_span_errors_total counter")
+            for name, m in items:
+                lines.append(f'{prefix}_span_errors_total{{span="{name}"}} {m.errors}')
+            attributes = sorted({key for _name, m in items for key in m.sums})
+            for key in attributes:
+                lines.append(f"# TYPE {prefix}_span_{key}_total counter")
+                for name, m in items:
+                    if key in m.sums:
+                        lines.append(f'{prefix}_span_{key}_total{{span="{name}"}} {m.sums[key]}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,373 @@
+"""
+Mock WATS server
+-
+An asyncio HTTP/1.1 server that stands in for WATS in load tests and offline development. It
+implements the endpoints used by the WATS client:
+
+    POST api/Report/WSJF                       submit a report
+    GET  api/Report/WSJF/{guid}                download a submitted report
+    GET  api/internal/Process/GetProcesses     process list
+
+Latency, random server errors, 429 throttling (token bucket, with Retry-After) and payload
+validation are configurable. The server runs in a background thread with its own event loop:
+
+    with MockWatsServer(latency=0.005, error_rate=0.01, rate_limit=2000) as server:
+        wats = WATS(server.url, "token")
+        ...
+        print(server.stats.by_status)
+
+or inside a running event loop with await server.start_async(). From the command line:
+
+    python -m pywats_api.mock_server --port 8080 --latency 0.01 --rate-limit 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Payload validation levels
+VALIDATE_NONE = "none"
+VALIDATE_JSON = "json"
+VALIDATE_FULL = "full"
+_VALIDATIONS = (VALIDATE_NONE, VALIDATE_JSON, VALIDATE_FULL)
+# Fields every report must have for VALIDATE_JSON
+_REQUIRED_FIELDS = ("id", "pn", "sn", "rev", "processCode")
+
+DEFAULT_PROCESSES: List[Dict[str, Any]] = [
+    {"code": 10, "name": "SW Debug", "isTestOperation": True, "isRepairOperation": False},
+    {"code": 50, "name": "PCBA test", "isTestOperation": True, "isRepairOperation": False},
+    {"code": 500, "name": "Repair", "isTestOperation": False, "isRepairOperation": True},
+]
+
+_MAX_HEADER_BYTES = 64 * 1024
+_Response = Tuple[int, bytes, Dict[str, str]]
+
+
+@dataclass
+class MockServerStats:
+    requests: int = 0
+    reports: int = 0
+    """
+    Reports accepted.
+    """
+    received_bytes: int = 0
+    by_status: Counter = field(default_factory=Counter)
+    """
+    Responses per HTTP status code.
+    """
+
+
+class _TokenBucket:
+    """ rate tokens per second, at most burst tokens stored """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """ Takes a token; returns 0, or the seconds until a token is available """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class MockWatsServer:
+    """
+    Mock WATS server.
+
+    :param host: Address to listen on.
+    :param port: Port to listen on; 0 picks a free port (see url).
+    :param token: Expected token (Authorization: Basic <token>); any token is accepted when None.
+    :param latency: Seconds added to every response.
+    :param jitter: Up to this many seconds (uniformly random) added on top of latency.
+    :param error_rate: Fraction of requests answered with error_status instead of being handled.
+    :param error_status: Status of the random errors.
+    :param rate_limit: Requests per second accepted; requests over the limit get 429. Unlimited when None.
+    :param burst: Requests accepted at once before rate_limit applies (default: one second's worth).
+    :param validation: Submitted payloads are checked as "none", "json" (well-formed, required fields)
+        or "full" (validated as a UUT/UUR report); invalid payloads get 400.
+    :param keep_reports: Keep submitted reports so they can be downloaded again.
+    :param processes: Process list returned by GetProcesses.
+    :param seed: Seed for jitter and errors, for reproducible runs.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, rate_limit: Optional[float] = None,
+                 burst: Optional[int] = None, validation: str = VALIDATE_JSON, keep_reports: bool = True,
+                 processes: Optional[List[Dict[str, Any]]] = None, seed: Optional[int] = None):
+        if validation not in _VALIDATIONS:
+            raise ValueError(f"Unknown validation '{validation}'. Valid values: {', '.join(_VALIDATIONS)}")
+        self.host = host
+        self.port = port
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.validation = validation
+        self.keep_reports = keep_reports
+        self.processes = DEFAULT_PROCESSES if processes is None else processes
+        self.stats = MockServerStats()
+        self.reports: Dict[str, bytes] = {}
+
+        self._random = random.Random(seed)
+        self._bucket = _TokenBucket(rate_limit, burst or max(1, int(rate_limit))) if rate_limit else None
+        self._processes_json = json.dumps(self.processes).encode("utf-8")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # -------------------------------------------------------------------
+    # Life cycle
+    async def start_async(self) -> "MockWatsServer":
+        """ Starts listening in the running event loop """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=_MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Mock WATS server listening on %s", self.url)
+        return self
+
+    async def stop_async(self):
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise stay open
+            for writer in list(self._connections):
+                writer.close()
+            deadline = time.monotonic() + 1.0
+            while self._connections and time.monotonic() < deadline:
+                await asyncio.sleep(0.001)
+            await self._server.wait_closed()
+            self._server = None
+
+    def start(self) -> "MockWatsServer":
+        """ Starts the server in a background thread and returns when it is listening """
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start_async())
+            except BaseException as err:
+                errors.append(err)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop_async())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-wats-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """ Stops a server started with start() """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "MockWatsServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # -------------------------------------------------------------------
+    # HTTP
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, (HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, b"", {}), keep_alive=False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    body = await self._read_chunked(reader)
+                else:
+                    length = int(headers.get("content-length") or 0)
+                    body = await reader.readexactly(length) if length else b""
+
+                try:
+                    response = await self._respond(method, target, headers, body)
+                except Exception as err:
+                    logger.exception("Mock WATS server failed on %s %s", method, target)
+                    response = _error(HTTPStatus.INTERNAL_SERVER_ERROR, str(err))
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._write(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as err:
+            logger.debug("Mock WATS server connection closed: %s", err)
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    async def _write(self, writer: asyncio.StreamWriter, response: _Response, keep_alive: bool):
+        status, body, headers = response
+        self.stats.by_status[int(status)] += 1
+        lines = [f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}", f"Content-Length: {len(body)}",
+                 "Content-Type: application/json; charset=utf-8", "Connection: " + ("keep-alive" if keep_alive else "close")]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> _Response:
+        stats = self.stats
+        stats.requests += 1
+        stats.received_bytes += len(body)
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.token is not None and headers.get("authorization") != f"Basic {self.token}":
+            return _error(HTTPStatus.UNAUTHORIZED, "Invalid token")
+        if self._bucket is not None:
+            wait = self._bucket.take()
+            if wait:
+                return _error(HTTPStatus.TOO_MANY_REQUESTS, "Too many requests", {"Retry-After": str(max(1, math.ceil(wait)))})
+        if self.error_rate and self._random.random() < self.error_rate:
+            return _error(self.error_status, "Injected error")
+
+        path = target.split("?", 1)[0].strip("/").lower()
+        if path == "api/report/wsjf":
+            if method != "POST":
+                return _error(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+            return self._submit(body)
+        if path.startswith("api/report/wsjf/"):
+            if method != "GET":
+                return _error(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            report = self.reports.get(path.rsplit("/", 1)[-1])
+            if report is None:
+                return _error(HTTPStatus.NOT_FOUND, "Report not found")
+            return HTTPStatus.OK, report, {}
+        if path == "api/internal/process/getprocesses":
+            return HTTPStatus.OK, self._processes_json, {}
+        return _error(HTTPStatus.NOT_FOUND, f"No endpoint {target}")
+
+    # -------------------------------------------------------------------
+    # Endpoints
+    def _submit(self, body: bytes) -> _Response:
+        report_id, error = self._check_report(body)
+        if error is not None:
+            return _error(HTTPStatus.BAD_REQUEST, error)
+        self.stats.reports += 1
+        if self.keep_reports and report_id is not None:
+            self.reports[report_id.lower()] = body
+        return HTTPStatus.OK, json.dumps({"id": report_id}).encode("utf-8"), {}
+
+    def _check_report(self, body: bytes) -> Tuple[Optional[str], Optional[str]]:
+        # Returns (report id, error message)
+        if self.validation == VALIDATE_NONE:
+            if not self.keep_reports:
+                return None, None
+            try:
+                return str(json.loads(body).get("id")), None
+            except (ValueError, AttributeError):
+                return None, None
+        if self.validation == VALIDATE_FULL:
+            from report.report_header import validate_report_json
+            try:
+                return str(validate_report_json(body).id), None
+            except ValueError as err:
+                return None, f"Invalid report: {err}"
+        try:
+            document = json.loads(body)
+        except ValueError as err:
+            return None, f"Invalid JSON: {err}"
+        if not isinstance(document, dict):
+            return None, "Report must be a JSON object"
+        missing = [name for name in _REQUIRED_FIELDS if name not in document]
+        if missing:
+            return None, f"Missing fields: {', '.join(missing)}"
+        return str(document["id"]), None
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> _Response:
+    return status, json.dumps({"message": message}).encode("utf-8"), headers or {}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mock WATS server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--token", default=None, help="Required token (default: any)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds, up to this value")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before 429 responses")
+    parser.add_argument("--burst", type=int, default=None)
+    parser.add_argument("--validation", choices=_VALIDATIONS, default=VALIDATE_JSON)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    server = MockWatsServer(host=args.host, port=args.port, token=args.token, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, error_status=args.error_status, rate_limit=args.rate_limit,
+                            burst=args.burst, validation=args.validation, seed=args.seed)
+
+    async def serve():
+        await server.start_async()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Mock WATS server stopped: %s", server.stats)
+
+
+if __name__ == "__main__":
+    main()
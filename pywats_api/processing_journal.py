@@ -0,0 +1,269 @@
+"""
+Crash-safe journal for file based report ingestion.
+
+Every processed file is recorded in an append-only (write-ahead) journal, keyed
+by the SHA-256 of its content, before and after each side effect:
+
+    pending   -> report id assigned, report is about to be submitted
+    submitted -> report accepted by the server, post-processing not yet done
+    done      -> post-process action (move/delete/archive) completed
+
+On restart the runner looks the file up in the journal (O(1)) and resumes at
+the right step. A report left in 'pending' is resubmitted with the same report
+id, which makes the server overwrite rather than duplicate it.
+"""
+from __future__ import annotations
+
+import errno
+import filecmp
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+DONE = "done"
+
+
+@dataclass
+class JournalEntry:
+    path: str
+    hash: str
+    report_id: str
+    state: str
+    time: float
+
+
+class ProcessingJournal:
+    """
+    Append-only JSON-lines journal with an in-memory index keyed by content hash.
+
+    :param journal_path: File that holds the journal. Created if missing.
+    :param fsync: fsync after each record (disable only for benchmarking).
+    :param compact_threshold: Rewrite the journal on open when it holds this many more lines than entries.
+    """
+
+    def __init__(self, journal_path: str, fsync: bool = True, compact_threshold: int = 10000):
+        self.journal_path = journal_path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._entries: Dict[str, JournalEntry] = {}
+
+        line_count = self._load()
+        if line_count - len(self._entries) > compact_threshold:
+            self.compact()
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+
+    # -------------------------------------------------------------------
+    # Hashing
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # -------------------------------------------------------------------
+    # Lookup
+    def get(self, content_hash: str) -> Optional[JournalEntry]:
+        return self._entries.get(content_hash)
+
+    def is_submitted(self, content_hash: str) -> bool:
+        entry = self._entries.get(content_hash)
+        return entry is not None and entry.state != PENDING
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -------------------------------------------------------------------
+    # State transitions
+    def begin(self, path: str, content_hash: str, report_id: str) -> JournalEntry:
+        """ Records that a report with report_id is about to be submitted for the file """
+        return self._write(JournalEntry(path=path, hash=content_hash, report_id=str(report_id), state=PENDING, time=time.time()))
+
+    def mark_submitted(self, content_hash: str) -> JournalEntry:
+        return self._transition(content_hash, SUBMITTED)
+
+    def mark_done(self, content_hash: str) -> JournalEntry:
+        return self._transition(content_hash, DONE)
+
+    def _transition(self, content_hash: str, state: str) -> JournalEntry:
+        entry = self._entries.get(content_hash)
+        if entry is None:
+            raise KeyError(f"No journal entry for hash {content_hash}")
+        return self._write(JournalEntry(path=entry.path, hash=content_hash, report_id=entry.report_id, state=state, time=time.time()))
+
+    def _write(self, entry: JournalEntry) -> JournalEntry:
+        line = json.dumps(asdict(entry), separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._entries[entry.hash] = entry
+        return entry
+
+    # -------------------------------------------------------------------
+    # Persistence
+    def _load(self) -> int:
+        line_count = 0
+        if not os.path.exists(self.journal_path):
+            return line_count
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line_count += 1
+                try:
+                    entry = JournalEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    # A torn last line from a crash mid-write; the step it described did not complete.
+                    logger.warning("Ignoring corrupt journal line %d in %s", line_count, self.journal_path)
+                    continue
+                self._entries[entry.hash] = entry
+        return line_count
+
+    def compact(self):
+        """ Atomically rewrites the journal with only the latest state of each entry """
+        with self._lock:
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as tmp:
+                for entry in self._entries.values():
+                    tmp.write(json.dumps(asdict(entry), separators=(",", ":")) + "\n")
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            reopen = hasattr(self, "_file")
+            if reopen:
+                self._file.close()
+            os.replace(tmp_path, self.journal_path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.journal_path)))
+            if reopen:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# -----------------------------------------------------------------------
+# Post process actions
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _free_name(path: str) -> str:
+    # "name (2).ext", "name (3).ext", ... for a file that is already taken
+    root, ext = os.path.splitext(path)
+    number = 2
+    while os.path.exists(f"{root} ({number}){ext}"):
+        number += 1
+    return f"{root} ({number}){ext}"
+
+
+def atomic_move(src: str, dst_dir: str) -> str:
+    """
+    Moves src into dst_dir so that the file is always present in at least one of the two places.
+    Safe to call again after a crash: a file already moved is left alone. A different file of the
+    same name in dst_dir is kept; src then gets a free name ("name (2).ext").
+
+    :return: The path src was moved to.
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    if not os.path.exists(src):
+        if os.path.exists(dst):
+            return dst
+        raise FileNotFoundError(src)
+    if os.path.exists(dst):
+        if filecmp.cmp(src, dst, shallow=False):
+            # Copied by an interrupted move (or the same file dropped again): only src is left to remove
+            os.remove(src)
+            return dst
+        dst = _free_name(dst)
+    try:
+        os.replace(src, dst)
+    except OSError as err:
+        if err.errno != errno.EXDEV:
+            raise
+        # Different file systems: copy to a temporary name, then rename into place.
+        tmp = dst + ".tmp"
+        shutil.copyfile(src, tmp)
+        with open(tmp, "rb") as file:
+            os.fsync(file.fileno())
+        os.replace(tmp, dst)
+        _fsync_dir(dst_dir)
+        os.remove(src)
+    _fsync_dir(dst_dir)
+    return dst
+
+
+def atomic_archive(src: str, archive_dir: str) -> str:
+    """ Gzips src into archive_dir and removes src once the archive is durable """
+    os.makedirs(archive_dir, exist_ok=True)
+    dst = os.path.join(archive_dir, os.path.basename(src) + ".gz")
+    if not os.path.exists(src):
+        if os.path.exists(dst):
+            return dst
+        raise FileNotFoundError(src)
+    tmp = dst + ".tmp"
+    with open(src, "rb") as source, open(tmp, "wb") as raw:
+        with gzip.GzipFile(filename=os.path.basename(src), mode="wb", fileobj=raw) as target:
+            shutil.copyfileobj(source, target)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, dst)
+    _fsync_dir(archive_dir)
+    os.remove(src)
+    return dst
+
+
+def delete_file(src: str):
+    """ Deletes src; a file that is already gone is treated as deleted """
+    try:
+        os.remove(src)
+    except FileNotFoundError:
+        pass
+
+
+def run_post_process_action(file: str, action: str, base_folder: str):
+    """
+    Executes a post process action for a submitted file.
+
+    :param action: "Move" (to base_folder/Done), "Archive" (gzip to base_folder/Archive), "Delete" or "None".
+    """
+    if action == "Move":
+        atomic_move(file, os.path.join(base_folder, "Done"))
+    elif action == "Archive":
+        atomic_archive(file, os.path.join(base_folder, "Archive"))
+    elif action == "Delete":
+        delete_file(file)
+    elif action not in (None, "", "None"):
+        raise ValueError(f"Unknown post process action: {action}")
@@ -0,0 +1,180 @@
+"""
+On-disk cache of downloaded report JSON.
+
+One file per report (<report id>.json) in the cache directory. The total size is bounded;
+when a new report does not fit, the least recently used reports are removed. With max_age,
+reports stored longer ago are downloaded again: the server keeps a report's id when it is
+submitted again, so a cached copy can go stale. The WATS client invalidates the reports it
+submits itself. File access times record use and modification times when a report was stored,
+so both survive restarts.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+from uuid import UUID
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_SUFFIX = ".json"
+
+
+class ReportCache:
+    """
+    Size-bounded LRU cache of report JSON keyed by report id. Thread-safe.
+
+    :param directory: Cache directory. Created if missing.
+    :param max_bytes: Upper bound for the total size of the cached reports.
+    :param max_age: Seconds a report is used after it was stored. Unlimited when None.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, max_age: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Report id -> (size, time stored), least recently used first
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # -------------------------------------------------------------------
+    # Lookup
+    @staticmethod
+    def key(report_id: Union[str, UUID]) -> str:
+        """ Normalized report id (also guards the file name) """
+        return str(report_id if isinstance(report_id, UUID) else UUID(str(report_id)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def __contains__(self, report_id) -> bool:
+        return self.key(report_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """ Total size of the cached reports in bytes """
+        return self._size
+
+    def get(self, report_id: Union[str, UUID]) -> Optional[bytes]:
+        """ Returns the cached JSON of a report, or None """
+        key = self.key(report_id)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.max_age is not None and now - entry[1] > self.max_age):
+                if entry is not None:
+                    logger.debug("Report %s in cache expired", key)
+                    self._forget(key)
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as file:
+                data = file.read()
+            # Access time: last use, modification time: stored
+            os.utime(self._path(key), (now, entry[1]))
+        except OSError:
+            # Removed behind our back
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    # -------------------------------------------------------------------
+    # Update
+    def put(self, report_id: Union[str, UUID], data: bytes):
+        """ Stores the JSON of a report. Reports larger than max_bytes are not cached. """
+        key = self.key(report_id)
+        if len(data) > self.max_bytes:
+            logger.debug("Report %s (%d bytes) exceeds the cache size; not cached", key, len(data))
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+        stored = os.stat(path).st_mtime
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = (len(data), stored)
+            self._size += len(data)
+            self._evict()
+
+    def invalidate(self, report_id: Union[str, UUID]):
+        """ Removes a report, so it is downloaded again (e.g. after it was submitted again) """
+        key = self.key(report_id)
+        with self._lock:
+            self._forget(key)
+            self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._delete(key)
+            self._entries.clear()
+            self._size = 0
+
+    def _forget(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[0]
+
+    def _delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            key, (size, _stored) = self._entries.popitem(last=False)
+            self._size -= size
+            self._delete(key)
+            logger.debug("Evicted report %s from cache", key)
+
+    def _load(self):
+        # Rebuild the index from the directory, oldest use first
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                # Left over from an interrupted write
+                self._delete_path(entry.path)
+                continue
+            if not entry.is_file() or not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                key = self.key(entry.name[:-len(_SUFFIX)])
+            except ValueError:
+                continue
+            stat = entry.stat()
+            found.append((stat.st_atime, key, stat.st_size, stat.st_mtime))
+        for _used, key, size, stored in sorted(found):
+            self._entries[key] = (size, stored)
+            self._size += size
+        self._evict()
+        logger.debug("Report cache %s: %d reports, %d bytes", self.directory, len(self._entries), self._size)
+
+    @staticmethod
+    def _delete_path(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,257 @@
+"""
+Local SQLite index of submitted reports.
+
+Records the header of every submitted report (id, pn, sn, rev, process code, result, start,
+station, fixture) and the paths of its failed steps, so questions like "which serials failed
+on fixture X today" can be answered without querying the server:
+
+    index = ReportIndex("reports.db")
+    index.add(uut)
+    failed = index.query(fixture_id="X", result="F", since=midnight)
+
+Reports are buffered and written in batches, one transaction per batch, to a WAL-mode database.
+Queries flush the buffer first, so they always see every added report. close() (or leaving a
+with block) writes the buffer; an index that was not closed is flushed at interpreter exit.
+"""
+from __future__ import annotations
+
+import atexit
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from report.report import Report
+from report.uut.uut_report import UUTReport
+from report.uut.steps.sequence_call import SequenceCall
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    pn TEXT NOT NULL,
+    sn TEXT NOT NULL,
+    rev TEXT NOT NULL,
+    process_code INTEGER,
+    result TEXT,
+    start TEXT,
+    station_name TEXT,
+    fixture_id TEXT,
+    submitted REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_sn ON reports (sn);
+CREATE INDEX IF NOT EXISTS reports_pn_rev ON reports (pn, rev);
+CREATE INDEX IF NOT EXISTS reports_start ON reports (start);
+CREATE INDEX IF NOT EXISTS reports_fixture_start ON reports (fixture_id, start);
+CREATE INDEX IF NOT EXISTS reports_station_start ON reports (station_name, start);
+CREATE TABLE IF NOT EXISTS failed_steps (
+    report_id TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS failed_steps_report ON failed_steps (report_id);
+CREATE INDEX IF NOT EXISTS failed_steps_path ON failed_steps (path);
+"""
+
+_COLUMNS = ("id", "type", "pn", "sn", "rev", "process_code", "result", "start", "station_name", "fixture_id", "submitted")
+_INSERT_REPORT = f"INSERT OR REPLACE INTO reports ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+# Columns that query() filters on by equality
+_FILTERS = ("pn", "sn", "rev", "process_code", "result", "station_name", "fixture_id", "type")
+
+_FAILED = "F"
+
+
+@dataclass
+class IndexedReport:
+    id: str
+    type: str
+    pn: str
+    sn: str
+    rev: str
+    process_code: Optional[int]
+    result: Optional[str]
+    start: Optional[str]
+    """
+    Start time in UTC (ISO 8601).
+    """
+    station_name: Optional[str]
+    fixture_id: Optional[str]
+    submitted: float
+    """
+    time.time() when the report was added.
+    """
+
+
+def _utc(value: Optional[datetime]) -> Optional[str]:
+    # Stored in UTC so that string order is time order
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _status(step) -> Any:
+    status = step.status
+    return getattr(status, "value", status)
+
+
+def failed_step_paths(root: SequenceCall) -> List[str]:
+    """
+    Paths (as Step.get_step_path()) of the failed steps under root. Rows of a columnar step
+    list are read from the columns, without materializing them.
+    """
+    paths = []
+    stack: List[Tuple[str, SequenceCall]] = [(root.name, root)]
+    while stack:
+        path, sequence = stack.pop()
+        for step in list.__iter__(sequence.steps):
+            step_path = f"{path}/{step.name}"
+            if _status(step) == _FAILED:
+                paths.append(step_path)
+            if isinstance(step, SequenceCall):
+                stack.append((step_path, step))
+    return paths
+
+
+class ReportIndex:
+    """
+    SQLite index of reports. Thread-safe.
+
+    :param path: Database file. Created if missing.
+    :param batch_size: Number of buffered reports that triggers a write.
+    :param flush_interval: Seconds after which buffered reports are written on the next add().
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Buffered rows and failed step paths by report id; a report added again replaces its entry
+        self._reports: Dict[str, tuple] = {}
+        self._failed_steps: Dict[str, List[str]] = {}
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        atexit.register(self.close)
+
+    # -------------------------------------------------------------------
+    # Adding reports
+    def add(self, report: Report):
+        """ Buffers report for the index; the buffer is written when full or after flush_interval """
+        info = report.info
+        row = (str(report.id), report.type, report.pn, report.sn, report.rev, report.process_code, report.result,
+               _utc(report.start), report.station_name, getattr(info, "fixture_id", None), time.time())
+        failed = failed_step_paths(report.root) if isinstance(report, UUTReport) else []
+        with self._lock:
+            self._reports[row[0]] = row
+            self._failed_steps[row[0]] = failed
+            if len(self._reports) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """ Writes the buffered reports """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._reports:
+            return
+        reports = list(self._reports.values())
+        failed_steps = [(report_id, path) for report_id, paths in self._failed_steps.items() for path in paths]
+        connection = self._connection
+        connection.execute("BEGIN")
+        try:
+            # Resubmitted reports replace their earlier entry
+            connection.executemany("DELETE FROM failed_steps WHERE report_id = ?", ((row[0],) for row in reports))
+            connection.executemany(_INSERT_REPORT, reports)
+            connection.executemany("INSERT INTO failed_steps (report_id, path) VALUES (?, ?)", failed_steps)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._reports, self._failed_steps = {}, {}
+        logger.debug("Indexed %d reports", len(reports))
+
+    # -------------------------------------------------------------------
+    # Queries
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None, failed_step: Optional[str] = None,
+              limit: Optional[int] = None, **filters: Any) -> List[IndexedReport]:
+        """
+        Returns the indexed reports that match all given filters, newest first.
+
+        :param since: Only reports that started at or after this time.
+        :param until: Only reports that started before this time.
+        :param failed_step: Only reports with a failed step with this path (SQL LIKE pattern, e.g. "%/Voltage").
+        :param filters: Column values to match: pn, sn, rev, process_code, result, station_name, fixture_id, type.
+        """
+        conditions, parameters = [], []
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise ValueError(f"Unknown filter '{name}'. Valid filters: {', '.join(_FILTERS)}")
+            conditions.append(f"{name} = ?")
+            parameters.append(value)
+        if since is not None:
+            conditions.append("start >= ?")
+            parameters.append(_utc(since))
+        if until is not None:
+            conditions.append("start < ?")
+            parameters.append(_utc(until))
+        if failed_step is not None:
+            conditions.append("id IN (SELECT report_id FROM failed_steps WHERE path LIKE ?)")
+            parameters.append(failed_step)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM reports"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY start DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            self._flush()
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [IndexedReport(*row) for row in rows]
+
+    def failed_steps(self, report_id) -> List[str]:
+        """ Paths of the failed steps of a report """
+        with self._lock:
+            self._flush()
+            rows = self._connection.execute("SELECT path FROM failed_steps WHERE report_id = ?", (str(report_id),)).fetchall()
+        return [path for path, in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush()
+            return self._connection.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def __iter__(self) -> Iterator[IndexedReport]:
+        return iter(self.query())
+
+    # -------------------------------------------------------------------
+    # Life cycle
+    def close(self):
+        """ Writes the buffered reports and closes the database """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            atexit.unregister(self.close)
+            self._flush()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,129 @@
+"""
+Local spool of reports that could not be submitted.
+
+One file per report (<report id>.json, the WSJF JSON as it would have been posted) in the spool
+directory. Files are written to a temporary name, fsynced and renamed into place, so a crash
+never leaves a partial report. Reports are resubmitted oldest first (see WATS.flush_spool);
+reports the server rejects (4xx) are moved to the rejected/ subdirectory.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Union
+from uuid import UUID
+
+from .processing_journal import _fsync_dir, atomic_move
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+_SUFFIX = ".json"
+REJECTED_DIR = "rejected"
+
+
+class ReportSpool:
+    """
+    Directory of WSJF JSON reports waiting to be submitted. Thread-safe.
+
+    :param directory: Spool directory. Created if missing.
+    :param fsync: Flush every spooled report to disk before put() returns.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # Report ids, oldest first
+        self._entries: "OrderedDict[str, None]" = OrderedDict()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def key(report_id: Union[str, UUID]) -> str:
+        """ Normalized report id (also guards the file name) """
+        return str(report_id if isinstance(report_id, UUID) else UUID(str(report_id)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def __contains__(self, report_id) -> bool:
+        return self.key(report_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pending(self) -> List[str]:
+        """ Ids of the spooled reports, oldest first """
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, report_id: Union[str, UUID]) -> Optional[bytes]:
+        """ Returns the JSON of a spooled report, or None """
+        key = self.key(report_id)
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+    def put(self, report_id: Union[str, UUID], data: bytes):
+        """ Spools the JSON of a report (replacing an earlier spooled version) """
+        key = self.key(report_id)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(self.directory)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = None
+
+    def remove(self, report_id: Union[str, UUID]):
+        """ Removes a report (after it was submitted) """
+        key = self.key(report_id)
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def reject(self, report_id: Union[str, UUID]) -> str:
+        """ Moves a report the server refused to rejected/, so it no longer blocks the spool """
+        key = self.key(report_id)
+        with self._lock:
+            self._entries.pop(key, None)
+        return atomic_move(self._path(key), os.path.join(self.directory, REJECTED_DIR))
+
+    def _load(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(".tmp"):
+                    # Interrupted put
+                    os.remove(entry.path)
+                    continue
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    key = self.key(entry.name[:-len(_SUFFIX)])
+                except ValueError:
+                    continue
+                entries.append((entry.stat().st_mtime, key))
+        for _mtime, key in sorted(entries):
+            self._entries[key] = None
+        if entries:
+            logger.info("%d spooled reports waiting in %s", len(entries), self.directory)
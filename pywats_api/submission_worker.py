@@ -0,0 +1,264 @@
+"""
+Background report submission.
+
+SubmissionWorker serializes and uploads reports on background threads, so the calling thread (a
+test sequence) never waits for the network. submit() queues a report and returns a
+concurrent.futures.Future that resolves to WATS.submit_report's result (True: submitted, False:
+spooled) or its exception:
+
+    with SubmissionWorker(wats, queue_size=100, on_full=SPOOL) as worker:
+        future = worker.submit(uut)
+        ...
+    # Leaving the block (or close()) flushes the queue
+
+The queue is bounded. When it is full, on_full decides what submit() does:
+
+    BLOCK  wait for room (up to block_timeout seconds, then QueueFullError)
+    SPOOL  write the report to the WATS instance's spool (WATS(spool_dir=...)) on the calling thread
+    RAISE  raise QueueFullError at once
+
+With a spool, the workers also resubmit spooled reports (WATS.flush_spool) every flush_interval
+seconds. A report must not be changed after it was submitted, as it is serialized later.
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from report.report import Report
+from report.uut.validation import ReportValidationError, validate_report
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Backpressure policies
+BLOCK = "block"
+SPOOL = "spool"
+RAISE = "raise"
+POLICIES = (BLOCK, SPOOL, RAISE)
+
+
+class QueueFullError(RuntimeError):
+    """ Raised by SubmissionWorker.submit() when the queue is full (on_full RAISE, or BLOCK after block_timeout) """
+
+
+_Item = Tuple[Future, Report, bool]
+
+
+class SubmissionWorker:
+    """
+    Submits reports through a WATS instance on background threads. Thread-safe.
+
+    The threads and an atexit handler (which closes the worker at interpreter exit, see
+    shutdown_timeout) keep the worker alive until close(); a worker that is no longer used must be
+    closed, or used as a context manager, to be freed.
+
+    :param wats: The client to submit with (its flow control, circuit breaker and spool apply).
+    :param queue_size: Reports that may wait in memory.
+    :param workers: Submission threads.
+    :param on_full: BLOCK, SPOOL or RAISE; see the module documentation.
+    :param block_timeout: Longest wait of submit() with BLOCK; None waits forever.
+    :param flush_interval: Seconds between attempts to resubmit spooled reports.
+    :param shutdown_timeout: Seconds close() waits for the queue at interpreter exit.
+    """
+
+    def __init__(self, wats, queue_size: int = 100, workers: int = 1, on_full: str = BLOCK,
+                 block_timeout: Optional[float] = None, flush_interval: float = 5.0, shutdown_timeout: float = 30.0):
+        if on_full not in POLICIES:
+            raise ValueError(f"Unknown on_full policy '{on_full}'. Valid policies: {', '.join(POLICIES)}")
+        if on_full == SPOOL and wats.spool is None:
+            raise ValueError("on_full=SPOOL needs a WATS instance with a spool (spool_dir)")
+        self.wats = wats
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+        self.flush_interval = flush_interval
+        self.shutdown_timeout = shutdown_timeout
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue(maxsize=queue_size)
+        # Queued and running reports; flush() waits for 0
+        self._unfinished = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._next_flush = time.monotonic()
+        self._stats = {"submitted": 0, "spooled": 0, "failed": 0, "cancelled": 0}
+
+        self._threads: List[threading.Thread] = []
+        for number in range(workers):
+            thread = threading.Thread(target=self._run, name=f"wats-submit-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self._atexit)
+
+    # -------------------------------------------------------------------
+    # Caller side
+    def submit(self, report: Report, validate: bool = False) -> "Future[bool]":
+        """
+        Queues a report; see WATS.submit_report for validate and the result.
+
+        :raises QueueFullError: The queue is full (see on_full).
+        :raises RuntimeError: The worker is closed.
+        """
+        if self._closed:
+            raise RuntimeError("SubmissionWorker is closed")
+        future: Future = Future()
+        with self._idle:
+            self._unfinished += 1
+        try:
+            if self.on_full == BLOCK:
+                self._queue.put((future, report, validate), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((future, report, validate))
+        except queue.Full:
+            self._done()
+            if self.on_full != SPOOL:
+                raise QueueFullError(f"Submission queue is full ({self._queue.maxsize} reports)")
+            future.set_running_or_notify_cancel()
+            try:
+                if validate:
+                    issues = validate_report(report)
+                    if issues:
+                        raise ReportValidationError(issues)
+                future.set_result(self._spool(report, "submission queue full"))
+            except Exception as err:
+                future.set_exception(err)
+        return future
+
+    @property
+    def pending(self) -> int:
+        """ Reports queued or being submitted """
+        return self._unfinished
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """ Waits until every queued report was handled. Returns False on timeout. """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Stops accepting reports, waits up to timeout seconds for the queue to be submitted and stops
+        the threads. Reports still queued after the timeout are spooled when the WATS instance has a
+        spool, otherwise their futures are cancelled.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self._atexit)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self.flush(timeout):
+            logger.warning("%d reports not submitted within %.1fs of shutdown", self._unfinished, timeout)
+        self._stop.set()
+        self._abandon()
+        for _thread in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        # Reports queued by a submit() that raced with close()
+        self._abandon()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Counters and the number of pending reports """
+        with self._idle:
+            stats = dict(self._stats)
+            stats["pending"] = self._unfinished
+        return stats
+
+    def __enter__(self) -> "SubmissionWorker":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _atexit(self):
+        self.close(self.shutdown_timeout)
+
+    # -------------------------------------------------------------------
+    # Worker side
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self._process(item)
+            self._flush_spool()
+
+    def _process(self, item: _Item):
+        future, report, validate = item
+        try:
+            if not future.set_running_or_notify_cancel():
+                self._count("cancelled")
+                return
+            try:
+                submitted = self.wats.submit_report(report, validate)
+            except Exception as err:
+                self._count("failed")
+                future.set_exception(err)
+            else:
+                self._count("submitted" if submitted else "spooled")
+                future.set_result(submitted)
+        finally:
+            self._done()
+
+    def _flush_spool(self):
+        spool = self.wats.spool
+        if spool is None or not len(spool) or time.monotonic() < self._next_flush:
+            return
+        # One worker flushes; the others keep submitting
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.wats.flush_spool()
+        except Exception:
+            logger.exception("Resubmitting spooled reports failed")
+        finally:
+            self._next_flush = time.monotonic() + self.flush_interval
+            self._flush_lock.release()
+
+    # -------------------------------------------------------------------
+    # Helpers
+    def _spool(self, report: Report, reason: str) -> bool:
+        # On the calling thread: serialize and write to the spool
+        spooled = self.wats._spool_report(report, self.wats._encode_report(report), reason)
+        self._count("spooled")
+        return spooled
+
+    def _abandon(self):
+        # Spools (or cancels) the reports left in the queue
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                continue
+            future, report, _validate = item
+            if self.wats.spool is not None and future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._spool(report, "shutdown"))
+                except Exception as err:
+                    future.set_exception(err)
+            else:
+                future.cancel()
+                self._count("cancelled")
+            self._done()
+
+    def _done(self):
+        with self._idle:
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._idle.notify_all()
+
+    def _count(self, key: str):
+        with self._idle:
+            self._stats[key] += 1
@@ -0,0 +1,687 @@
+"""
+Binary report codec
+-
+Compact binary format for UUTReport/UURReport, for local interchange (spooling, caches, passing
+reports between processes). The WSJF JSON format is still what is sent to the server.
+
+    data = encode_report(uut)
+    uut = decode_report(data)
+
+Decoding rebuilds the models without validation, so only decode data produced by encode_report.
+The data is about a tenth of the size of the JSON. Decoding a large report takes roughly half to
+two thirds of the time of model_validate_json; encoding takes longer than model_dump_json.
+
+Format: a header (MAGIC, which also names the format version) followed by one tagged value. Strings
+are interned into a table, model classes are written once (import path and field names) and then referenced by number, lists of
+floats and chart series are written as raw little-endian doubles, and lists of models of the same
+class are written column by column. Parent references are written as a reference to the ancestor.
+"""
+import importlib
+import sys
+from array import array
+from datetime import datetime
+from enum import Enum
+from struct import Struct, error as StructError
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from .report import Report
+from .chart import ChartSeries
+from .uut.steps.sequence_call import StepList
+from .uut.steps.columnar_step_list import ColumnarStepList
+
+MAGIC = b"WRB2"
+
+# Value tags
+_NONE = 0
+_TRUE = 1
+_FALSE = 2
+_INT = 3
+_BIG_INT = 4
+_FLOAT = 5
+_STR = 6
+_STR_NEW = 7
+_STR_REF = 8
+_LIST = 9
+_DICT = 10
+_MODEL = 11
+_MODELS = 12
+_BACKREF = 13
+_STEP_LIST = 14
+_COLUMNAR_STEP_LIST = 15
+_ENUM = 16
+_UUID = 17
+_DATETIME = 18
+_FLOATS = 19
+_SERIES = 20
+_ARRAY = 21
+_BYTES = 22
+_COLUMN = 23
+_ROW_MODELS = 24
+_REPEAT = 25
+_GROUPED_MODELS = 26
+_ROW_BACKREF = 27
+
+# Strings up to this length are added to the string table
+_INTERN_LENGTH = 64
+# References back up the tree; models in these fields are written as ancestor references (or None)
+_PARENT_FIELDS = frozenset(("parent", "parent_step"))
+# ';'-separated number lists that are written as raw doubles when they round-trip exactly
+_SERIES_FIELDS = {ChartSeries: frozenset(("x_data", "y_data"))}
+# Values that can contain models
+_NESTED_TYPES = (BaseModel, list, dict)
+# Immutable values a list may hold several references to (see _REPEAT)
+_SCALAR_TYPES = (type(None), str, bool, int, float)
+# Only classes from this package are imported when decoding
+_PACKAGE = __name__.rpartition(".")[0]
+
+_INT64 = Struct("<q")
+_DOUBLE = Struct("<d")
+_SWAP = sys.byteorder != "little"
+
+
+class BinaryCodecError(ValueError):
+    """ Raised for data that is not a valid binary report """
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _float_bytes(values) -> bytes:
+    data = array("d", values)
+    if _SWAP:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _series_floats(value: str):
+    # The float list a series string was made from (Chart.AddSeries), if it converts back to the same string
+    try:
+        floats = [float(part) for part in value.split(";")]
+    except ValueError:
+        return None
+    return floats if ";".join(map(str, floats)) == value else None
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+# ------------------------------------------------------------------------
+# Encoding
+class _Encoder:
+    def __init__(self):
+        self.out = bytearray(MAGIC)
+        self.strings: Dict[str, int] = {}
+        self.classes: Dict[type, int] = {}
+        self.fields: Dict[type, tuple] = {}
+        # Models currently being written, innermost last
+        self.stack: List[Any] = []
+        # (stack index, models) of the nested model columns being written; all hold the same row
+        self.rows: List[tuple] = []
+
+    def write(self, value):
+        out = self.out
+        kind = type(value)
+        if value is None:
+            out.append(_NONE)
+        elif kind is str:
+            self.write_str(value)
+        elif kind is float:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+        elif kind is bool:
+            out.append(_TRUE if value else _FALSE)
+        elif kind is int:
+            if -0x8000000000000000 <= value <= 0x7FFFFFFFFFFFFFFF:
+                out.append(_INT)
+                out += _INT64.pack(value)
+            else:
+                out.append(_BIG_INT)
+                self.write_str(str(value))
+        elif isinstance(value, BaseModel):
+            self.write_model(value)
+        elif isinstance(value, ColumnarStepList):
+            out.append(_COLUMNAR_STEP_LIST)
+            self.write(value.get_state())
+        elif isinstance(value, StepList):
+            out.append(_STEP_LIST)
+            self.write_list(value)
+        elif kind is list or kind is tuple:
+            self.write_list(value)
+        elif kind is dict:
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                self.write(key)
+                self.write(item)
+        elif isinstance(value, Enum):
+            out.append(_ENUM)
+            self.write_class(type(value))
+            self.write(value.value)
+        elif kind is UUID:
+            out.append(_UUID)
+            out += value.bytes
+        elif isinstance(value, datetime):
+            out.append(_DATETIME)
+            self.write_str(value.isoformat())
+        elif kind is array:
+            out.append(_ARRAY)
+            out.append(ord(value.typecode))
+            data = value
+            if _SWAP:
+                data = array(value.typecode, value)
+                data.byteswap()
+            data = data.tobytes()
+            _write_varint(out, len(data))
+            out += data
+        elif kind is bytes or kind is bytearray:
+            out.append(_BYTES)
+            _write_varint(out, len(value))
+            out += value
+        else:
+            raise TypeError(f"Cannot encode value of type {kind.__name__}")
+
+    def write_str(self, value: str):
+        out = self.out
+        ref = self.strings.get(value)
+        if ref is not None:
+            out.append(_STR_REF)
+            _write_varint(out, ref)
+            return
+        data = value.encode("utf-8")
+        if len(value) <= _INTERN_LENGTH:
+            self.strings[value] = len(self.strings)
+            out.append(_STR_NEW)
+        else:
+            out.append(_STR)
+        _write_varint(out, len(data))
+        out += data
+
+    def write_class(self, cls: type):
+        # Class number, or 0 followed by the class definition on first use
+        out = self.out
+        ref = self.classes.get(cls)
+        if ref is not None:
+            _write_varint(out, ref)
+            return
+        self.classes[cls] = len(self.classes) + 1
+        out.append(0)
+        self.write_str(_class_path(cls))
+        names = self.fields[cls] = tuple(cls.model_fields) if issubclass(cls, BaseModel) else ()
+        _write_varint(out, len(names))
+        for name in names:
+            self.write_str(name)
+
+    def write_list(self, values):
+        out = self.out
+        if len(values) >= 2:
+            first = values[0]
+            kind = type(first)
+            if (kind in _SCALAR_TYPES or isinstance(first, Enum)) and all(type(value) is kind and value == first for value in values):
+                # Mostly columns of unset fields
+                out.append(_REPEAT)
+                _write_varint(out, len(values))
+                self.write(first)
+                return
+            if kind is float and all(type(value) is float for value in values):
+                data = _float_bytes(values)
+                out.append(_FLOATS)
+                _write_varint(out, len(values))
+                out += data
+                return
+            if isinstance(first, BaseModel) and all(isinstance(value, BaseModel) for value in values):
+                if all(type(value) is kind for value in values):
+                    self.write_models(kind, values)
+                else:
+                    self.write_grouped_models(values)
+                return
+        out.append(_LIST)
+        _write_varint(out, len(values))
+        for value in values:
+            self.write(value)
+
+    def write_grouped_models(self, models: list):
+        # Models of several classes (a sequence's steps): one column block per class, then the class
+        # of each position
+        groups: Dict[type, list] = {}
+        for model in models:
+            group = groups.get(type(model))
+            if group is None:
+                group = groups[type(model)] = []
+            group.append(model)
+        out = self.out
+        out.append(_GROUPED_MODELS)
+        _write_varint(out, len(groups))
+        for cls, group in groups.items():
+            if len(group) == 1:
+                self.write_model(group[0])
+            else:
+                self.write_models(cls, group)
+        index = {cls: number for number, cls in enumerate(groups)}
+        _write_varint(out, len(models))
+        for model in models:
+            _write_varint(out, index[type(model)])
+
+    def parent_depth(self, value) -> Optional[int]:
+        # Depth of the ancestor (1 = enclosing model), or None for references outside the tree
+        for depth, model in enumerate(reversed(self.stack)):
+            if model is value:
+                return depth
+        return None
+
+    def write_parent(self, value):
+        depth = self.parent_depth(value)
+        if depth is None:
+            self.out.append(_NONE)
+        else:
+            self.out.append(_BACKREF)
+            _write_varint(self.out, depth)
+
+    def write_field(self, cls: type, name: str, value):
+        if name in _PARENT_FIELDS and isinstance(value, BaseModel):
+            self.write_parent(value)
+        elif type(value) is str and cls in _SERIES_FIELDS and name in _SERIES_FIELDS[cls] and (floats := _series_floats(value)) is not None:
+            self.out.append(_SERIES)
+            _write_varint(self.out, len(floats))
+            self.out += _float_bytes(floats)
+        else:
+            self.write(value)
+
+    @staticmethod
+    def fields_set_bits(names: tuple, fields_set) -> int:
+        bits = 0
+        for position, name in enumerate(names):
+            if name in fields_set:
+                bits |= 1 << position
+        return bits
+
+    def write_private(self, model: BaseModel):
+        # Private attributes (status roll-up state); models in them are written as ancestor references
+        private = model.__pydantic_private__
+        if not private:
+            self.out.append(_NONE)
+            return
+        self.out.append(_DICT)
+        _write_varint(self.out, len(private))
+        for name, value in private.items():
+            self.write_str(name)
+            if isinstance(value, BaseModel):
+                self.write_parent(value)
+            else:
+                self.write(value)
+
+    def write_model(self, model: BaseModel):
+        cls = type(model)
+        if model.__pydantic_extra__:
+            raise TypeError(f"Cannot encode {cls.__name__} with extra attributes")
+        self.out.append(_MODEL)
+        self.write_class(cls)
+        names = self.fields[cls]
+        values = model.__dict__
+        self.stack.append(model)
+        for name in names:
+            self.write_field(cls, name, values.get(name))
+        self.write_private(model)
+        self.stack.pop()
+        _write_varint(self.out, self.fields_set_bits(names, model.__pydantic_fields_set__))
+
+    def set_row(self, row: int):
+        stack = self.stack
+        for index, models in self.rows:
+            stack[index] = models[row]
+
+    def write_models(self, cls: type, models: list, nested: bool = False):
+        # Same-class models column by column: one column per field, then the fields_set bitmasks.
+        # A nested block is a field column of an enclosing block (one model per enclosing row).
+        if any(model.__pydantic_extra__ for model in models):
+            raise TypeError(f"Cannot encode {cls.__name__} with extra attributes")
+        out = self.out
+        out.append(_MODELS)
+        self.write_class(cls)
+        _write_varint(out, len(models))
+        names = self.fields[cls]
+        outer_rows = self.rows
+        self.rows = (outer_rows if nested else []) + [(len(self.stack), models)]
+        self.stack.append(None)
+        for name in names:
+            column = [model.__dict__.get(name) for model in models]
+            if name in _PARENT_FIELDS:
+                depths = set()
+                for row, value in enumerate(column):
+                    self.set_row(row)
+                    depths.add(self.parent_depth(value) if isinstance(value, BaseModel) else None)
+                if len(depths) == 1 and None not in depths:
+                    # Every row refers to the same ancestor level (its sequence, its step)
+                    out.append(_ROW_BACKREF)
+                    _write_varint(out, depths.pop())
+                    continue
+            if name in _PARENT_FIELDS or cls in _SERIES_FIELDS or any(isinstance(value, _NESTED_TYPES) for value in column):
+                first = column[0]
+                if isinstance(first, BaseModel) and name not in _PARENT_FIELDS and all(type(value) is type(first) for value in column):
+                    # One model per row: written as a nested block, with the rows' models on the stack
+                    out.append(_ROW_MODELS)
+                    self.write_models(type(first), column, nested=True)
+                    continue
+                # Values that can refer back to their model are written with that model on the stack
+                out.append(_COLUMN)
+                for row, value in enumerate(column):
+                    self.set_row(row)
+                    self.write_field(cls, name, value)
+            else:
+                self.write_list(column)
+        if any(model.__pydantic_private__ for model in models):
+            out.append(_COLUMN)
+            for row, model in enumerate(models):
+                self.set_row(row)
+                self.write_private(model)
+        else:
+            out.append(_NONE)
+        self.stack.pop()
+        self.rows = outer_rows
+        self.write_list([self.fields_set_bits(names, model.__pydantic_fields_set__) for model in models])
+
+
+# ------------------------------------------------------------------------
+# Decoding
+class _ModelClass:
+    __slots__ = ("cls", "names", "exact", "private", "fields_sets")
+
+    def __init__(self, cls: type, names: tuple):
+        self.cls = cls
+        self.names = names
+        # Same fields as when encoded: the field dict can be set directly
+        self.exact = issubclass(cls, BaseModel) and tuple(cls.model_fields) == names
+        self.private = getattr(cls, "__private_attributes__", None)
+        self.fields_sets: Dict[int, frozenset] = {}
+
+
+def _resolve_class(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    if module_name != _PACKAGE and not module_name.startswith(_PACKAGE + "."):
+        raise BinaryCodecError(f"Class outside of package '{_PACKAGE}': {path}")
+    try:
+        target = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            target = getattr(target, part)
+    except (ImportError, AttributeError) as e:
+        raise BinaryCodecError(f"Unknown class {path}") from e
+    if not isinstance(target, type) or not issubclass(target, (BaseModel, Enum)):
+        raise BinaryCodecError(f"Not a model or enum class: {path}")
+    return target
+
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = len(MAGIC)
+        self.strings: List[str] = []
+        self.classes: List[_ModelClass] = [None]
+        self.stack: List[Any] = []
+        # See _Encoder.rows
+        self.rows: List[tuple] = []
+
+    def read_varint(self) -> int:
+        data = self.data
+        pos = self.pos
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            self.pos = pos
+            return byte
+        value = byte & 0x7F
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return value
+            shift += 7
+
+    def read_bytes(self, size: int) -> bytes:
+        start = self.pos
+        end = self.pos = start + size
+        if end > len(self.data):
+            raise BinaryCodecError("Unexpected end of data")
+        return self.data[start:end]
+
+    def read_floats(self, count: int) -> list:
+        values = array("d")
+        values.frombytes(self.read_bytes(count * 8))
+        if _SWAP:
+            values.byteswap()
+        return values.tolist()
+
+    def read(self):
+        data = self.data
+        tag = data[self.pos]
+        self.pos += 1
+        if tag == _STR_REF:
+            return self.strings[self.read_varint()]
+        if tag == _NONE:
+            return None
+        if tag == _FLOAT:
+            value = _DOUBLE.unpack_from(data, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == _STR_NEW:
+            value = str(self.read_bytes(self.read_varint()), "utf-8")
+            self.strings.append(value)
+            return value
+        if tag == _MODEL:
+            return self.read_model()
+        if tag == _BACKREF:
+            return self.stack[-1 - self.read_varint()]
+        if tag == _STR:
+            return str(self.read_bytes(self.read_varint()), "utf-8")
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            value = _INT64.unpack_from(data, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == _LIST:
+            return [self.read() for _ in range(self.read_varint())]
+        if tag == _MODELS:
+            return self.read_models()
+        if tag == _FLOATS:
+            return self.read_floats(self.read_varint())
+        if tag == _SERIES:
+            return ";".join(map(str, self.read_floats(self.read_varint())))
+        if tag == _DICT:
+            count = self.read_varint()
+            result = {}
+            for _ in range(count):
+                key = self.read()
+                result[key] = self.read()
+            return result
+        if tag == _REPEAT:
+            count = self.read_varint()
+            return [self.read()] * count
+        if tag == _GROUPED_MODELS:
+            return self.read_grouped_models()
+        if tag == _STEP_LIST:
+            return StepList(self.read(), parent=self.stack[-1])
+        if tag == _COLUMNAR_STEP_LIST:
+            return ColumnarStepList.from_state(self.read(), parent=self.stack[-1])
+        if tag == _ENUM:
+            cls = self.read_class().cls
+            return cls(self.read())
+        if tag == _UUID:
+            return UUID(bytes=self.read_bytes(16))
+        if tag == _DATETIME:
+            return datetime.fromisoformat(self.read())
+        if tag == _BIG_INT:
+            return int(self.read())
+        if tag == _ARRAY:
+            typecode = chr(data[self.pos])
+            self.pos += 1
+            values = array(typecode)
+            values.frombytes(self.read_bytes(self.read_varint()))
+            if _SWAP:
+                values.byteswap()
+            return values
+        if tag == _BYTES:
+            return self.read_bytes(self.read_varint())
+        raise BinaryCodecError(f"Unknown tag {tag} at offset {self.pos - 1}")
+
+    def read_grouped_models(self) -> list:
+        groups = []
+        for _ in range(self.read_varint()):
+            group = self.read()
+            if isinstance(group, BaseModel):
+                group = [group]
+            elif type(group) is not list:
+                raise BinaryCodecError("Bad model group")
+            groups.append(iter(group))
+        try:
+            return [next(groups[self.read_varint()]) for _ in range(self.read_varint())]
+        except (IndexError, StopIteration) as e:
+            raise BinaryCodecError("Bad model group order") from e
+
+    def read_class(self) -> _ModelClass:
+        ref = self.read_varint()
+        if ref:
+            return self.classes[ref]
+        cls = _resolve_class(self.read())
+        names = tuple(self.read() for _ in range(self.read_varint()))
+        model_class = _ModelClass(cls, names)
+        self.classes.append(model_class)
+        return model_class
+
+    def read_fields_set(self, model_class: _ModelClass) -> set:
+        return self.fields_set(model_class, self.read_varint())
+
+    @staticmethod
+    def fields_set(model_class: _ModelClass, bits: int) -> set:
+        fields_set = model_class.fields_sets.get(bits)
+        if fields_set is None:
+            fields_set = model_class.fields_sets[bits] = frozenset(name for position, name in enumerate(model_class.names) if bits >> position & 1)
+        return set(fields_set)
+
+    def read_model(self) -> BaseModel:
+        model_class = self.read_class()
+        model = model_class.cls.__new__(model_class.cls)
+        self.stack.append(model)
+        values = {name: self.read() for name in model_class.names}
+        private = self.read()
+        self.stack.pop()
+        self.init_model(model_class, model, values, self.read_fields_set(model_class), private)
+        return model
+
+    def set_row(self, row: int):
+        stack = self.stack
+        for index, models in self.rows:
+            stack[index] = models[row]
+
+    def read_models(self, nested: bool = False) -> list:
+        model_class = self.read_class()
+        cls = model_class.cls
+        count = self.read_varint()
+        models = [cls.__new__(cls) for _ in range(count)]
+        outer_rows = self.rows
+        self.rows = (outer_rows if nested else []) + [(len(self.stack), models)]
+        self.stack.append(None)
+        columns = []
+        for name in model_class.names:
+            tag = self.data[self.pos]
+            if tag == _COLUMN:
+                self.pos += 1
+                column = []
+                for row in range(count):
+                    self.set_row(row)
+                    column.append(self.read())
+            elif tag == _ROW_BACKREF:
+                self.pos += 1
+                index = -1 - self.read_varint()
+                column = []
+                for row in range(count):
+                    self.set_row(row)
+                    column.append(self.stack[index])
+            elif tag == _ROW_MODELS:
+                if self.data[self.pos + 1] != _MODELS:
+                    raise BinaryCodecError(f"Bad column for {cls.__name__}.{name}")
+                self.pos += 2
+                column = self.read_models(nested=True)
+            else:
+                column = self.read()
+            if type(column) is not list or len(column) != count:
+                raise BinaryCodecError(f"Bad column for {cls.__name__}.{name}")
+            columns.append(column)
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == _NONE:
+            privates = [None] * count
+        elif tag == _COLUMN:
+            privates = []
+            for row in range(count):
+                self.set_row(row)
+                privates.append(self.read())
+        else:
+            raise BinaryCodecError(f"Bad private attributes for {cls.__name__}")
+        self.stack.pop()
+        self.rows = outer_rows
+        bits = self.read()
+        if type(bits) is not list or len(bits) != count:
+            raise BinaryCodecError(f"Bad fields set for {cls.__name__}")
+        names = model_class.names
+        fields_set = self.fields_set
+        for model, row, private, model_bits in zip(models, zip(*columns), privates, bits):
+            self.init_model(model_class, model, dict(zip(names, row)), fields_set(model_class, model_bits), private)
+        return models
+
+    @staticmethod
+    def init_model(model_class: _ModelClass, model: BaseModel, values: dict, fields_set: set, private: Optional[dict]):
+        if not model_class.exact:
+            # The class changed since the data was written: let pydantic fill defaults and drop unknown fields
+            known = model_class.cls.model_fields
+            built = model_class.cls.model_construct(fields_set & known.keys(), **{k: v for k, v in values.items() if k in known})
+            values, fields_set = built.__dict__, built.__pydantic_fields_set__
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(model, "__pydantic_extra__", None)
+        if model_class.private:
+            defaults = {name: attribute.get_default() for name, attribute in model_class.private.items()}
+            if private:
+                defaults.update((name, value) for name, value in private.items() if name in defaults)
+            private = defaults
+        else:
+            private = None
+        object.__setattr__(model, "__pydantic_private__", private)
+
+
+# ------------------------------------------------------------------------
+# Public functions
+def encode_report(report: Report) -> bytes:
+    """ Returns report (UUTReport or UURReport) in the binary format """
+    encoder = _Encoder()
+    encoder.write(report)
+    return bytes(encoder.out)
+
+
+def decode_report(data: bytes) -> Report:
+    """ Returns the report in data (written by encode_report) """
+    if data[:len(MAGIC)] != MAGIC:
+        raise BinaryCodecError("Not a binary report (bad header)")
+    decoder = _Decoder(data)
+    try:
+        report = decoder.read()
+    except (IndexError, StructError) as e:
+        raise BinaryCodecError("Unexpected end of data") from e
+    except UnicodeDecodeError as e:
+        raise BinaryCodecError("Corrupt string data") from e
+    if decoder.pos != len(data):
+        raise BinaryCodecError("Trailing data after report")
+    if not isinstance(report, Report):
+        raise BinaryCodecError(f"Data holds a {type(report).__name__}, not a report")
+    return report
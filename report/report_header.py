@@ -0,0 +1,119 @@
+"""
+Report header projection
+-
+Parses only the top-level fields of a WSJF report (pn, sn, rev, result, start, process code,
+station and unit info). The step tree (root) and the other lists are skipped by the JSON parser
+without being turned into objects; the raw JSON is kept and the full report is validated the
+first time it is used:
+
+    header = parse_report_header(data)
+    if header.result == "F":
+        steps = header.root.steps      # Validates the full report once
+"""
+from datetime import datetime
+from typing import Annotated, Any, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel, Discriminator, Field, PrivateAttr, Tag, TypeAdapter
+
+from .uut.uut_info import UUTInfo
+from .uut.uut_report import UUTReport
+from .uut.steps.sequence_call import SequenceCall
+from .uur.uur_info import UURInfo
+from .uur.uur_report import UURReport
+
+
+def _report_type(value: Any) -> str:
+    # Reports without a type are test reports (as in UUTReport)
+    if isinstance(value, dict):
+        return value.get("type", "T")
+    return getattr(value, "type", "T")
+
+
+_report_adapter: Optional[TypeAdapter] = None
+
+
+def _get_report_adapter() -> TypeAdapter:
+    # Validates UUT and UUR reports from the same JSON, selected by "type". Built on first use
+    # (like the models, see WATSBase), so importing the package does not build the report schemas.
+    global _report_adapter
+    if _report_adapter is None:
+        _report_adapter = TypeAdapter(Annotated[Union[Annotated[UUTReport, Tag("T")], Annotated[UURReport, Tag("R")]], Discriminator(_report_type)])
+    return _report_adapter
+
+
+def validate_report_json(data: Union[str, bytes], context: Any = None) -> Union[UUTReport, UURReport]:
+    """ Validates WSJF JSON into a UUTReport or UURReport (by its "type") """
+    return _get_report_adapter().validate_json(data, context=context)
+
+
+class ReportHeader(BaseModel):
+    """
+    Top-level fields of a report.
+
+    Not a WATSBase: its before-validator would turn the whole document (step tree included) into
+    Python objects, which is what the projection avoids. Context defaults therefore only apply
+    to the unit info and to the full report.
+    """
+    model_config = {
+        "populate_by_name": True,
+        "use_enum_values": True,
+        "extra": "ignore",
+    }
+
+    id: UUID
+    type: str = "T"
+    pn: str
+    sn: str
+    rev: str
+    process_code: int = Field(..., validation_alias="processCode", serialization_alias="processCode")
+    result: str = "P"
+    station_name: Optional[str] = Field(default=None, validation_alias="machineName", serialization_alias="machineName")
+    location: Optional[str] = None
+    purpose: Optional[str] = None
+    start: Optional[datetime] = None
+    uut_info: Optional[UUTInfo] = Field(default=None, validation_alias="uut", serialization_alias="uut")
+    uur_info: Optional[UURInfo] = Field(default=None, validation_alias="uur", serialization_alias="uur")
+
+    _raw: Optional[bytes] = PrivateAttr(default=None)
+    _context: Any = PrivateAttr(default=None)
+    _report: Optional[Union[UUTReport, UURReport]] = PrivateAttr(default=None)
+
+    @property
+    def info(self) -> Optional[Union[UUTInfo, UURInfo]]:
+        """ Unit info of the report (uut or uur) """
+        return self.uur_info if self.type == "R" else self.uut_info
+
+    @property
+    def is_loaded(self) -> bool:
+        """ True when the full report has been validated """
+        return self._report is not None
+
+    @property
+    def report(self) -> Union[UUTReport, UURReport]:
+        """ The full report, validated from the raw JSON on first access """
+        if self._report is None:
+            if self._raw is None:
+                raise ValueError(f"Report {self.id} has no raw JSON to load")
+            self._report = validate_report_json(self._raw, self._context)
+            # The report owns the data from here on
+            self._raw = None
+        return self._report
+
+    @property
+    def root(self) -> SequenceCall:
+        """ Root sequence call (step tree) of a UUT report """
+        report = self.report
+        if not isinstance(report, UUTReport):
+            raise ValueError(f"Report {self.id} of type '{self.type}' has no step tree")
+        return report.root
+
+
+def parse_report_header(data: Union[str, bytes], context: Any = None) -> ReportHeader:
+    """
+    Returns the header of a WSJF report. data is kept so header.report can validate it later.
+    """
+    header = ReportHeader.model_validate_json(data, context=context)
+    header._raw = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+    header._context = context
+    return header
@@ -0,0 +1,133 @@
+"""
+Report templates
+-
+Build a report (header, sequences, steps, limits) once and stamp out a new report per unit:
+
+    template = ReportTemplate(uut)
+    for sn in serial_numbers:
+        report = template.new_report(sn=sn)
+        report.root.steps[0].measurement.value = measure()
+
+Each new report is an independent copy of the template (see clone_model), so it can be filled in
+and extended without affecting the template or the other reports.
+"""
+from datetime import datetime
+from typing import Any, Dict, ForwardRef, Generic, Literal, Optional, Tuple, TypeVar, get_args, get_origin
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from .report import Report
+from .uut.steps.sequence_call import StepList
+from .uut.steps.columnar_step_list import ColumnarStepList
+
+ReportT = TypeVar("ReportT", bound=Report)
+
+# References back up the tree; re-pointed to the copy instead of being copied
+_PARENT_FIELDS = ("parent", "parent_step")
+# Field names per model class that can hold models or lists; all other fields hold immutable values
+_NESTED_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def _may_hold_models(annotation) -> bool:
+    if annotation is Any or isinstance(annotation, (str, ForwardRef)):
+        return True
+    origin = get_origin(annotation)
+    if origin is None:
+        return isinstance(annotation, type) and issubclass(annotation, (BaseModel, list, dict))
+    if origin is Literal:
+        return False
+    if isinstance(origin, type) and issubclass(origin, (list, dict)):
+        return True
+    return any(_may_hold_models(arg) for arg in get_args(annotation))
+
+
+def _nested_fields(cls: type) -> Tuple[str, ...]:
+    fields = _NESTED_FIELDS.get(cls)
+    if fields is None:
+        fields = _NESTED_FIELDS[cls] = tuple(name for name, field in cls.model_fields.items()
+                                             if name in _PARENT_FIELDS or _may_hold_models(field.annotation))
+    return fields
+
+
+def _shallow_copy(model: BaseModel) -> BaseModel:
+    # Same as model.model_copy(), without its per-call overhead (this runs for every step and measurement)
+    copy = model.__class__.__new__(model.__class__)
+    object.__setattr__(copy, "__dict__", model.__dict__.copy())
+    object.__setattr__(copy, "__pydantic_fields_set__", model.__pydantic_fields_set__.copy())
+    extra, private = model.__pydantic_extra__, model.__pydantic_private__
+    object.__setattr__(copy, "__pydantic_extra__", None if extra is None else extra.copy())
+    object.__setattr__(copy, "__pydantic_private__", None if private is None else private.copy())
+    return copy
+
+
+def clone_model(model: BaseModel, parent: Optional[BaseModel] = None, original_parent: Optional[BaseModel] = None) -> BaseModel:
+    """
+    Copies a model tree without validation.
+
+    Every model and list in the tree is copied shallowly (eagerly, the whole tree), so the copy
+    can be changed freely, while the field values themselves (names, units, limits, comp ops, ...)
+    are immutable objects shared with the original. Parent references are pointed at the copied
+    parents.
+    """
+    copy = _shallow_copy(model)
+    private = copy.__pydantic_private__
+    if private:
+        # Roll-up state: counters are per copy, a back reference to the report follows the copy
+        for key, value in private.items():
+            if type(value) is dict:
+                private[key] = value.copy()
+            elif value is original_parent and value is not None:
+                private[key] = parent
+    values = copy.__dict__
+    for key in _nested_fields(model.__class__):
+        value = values.get(key)
+        if value is None:
+            continue
+        if key in _PARENT_FIELDS:
+            if value is original_parent:
+                values[key] = parent
+        elif isinstance(value, BaseModel):
+            values[key] = clone_model(value, copy, model)
+        elif isinstance(value, ColumnarStepList):
+            values[key] = value.clone(copy, lambda item: clone_model(item, copy, model))
+        elif isinstance(value, StepList):
+            values[key] = StepList([clone_model(item, copy, model) for item in value], parent=copy)
+        elif isinstance(value, list):
+            values[key] = [clone_model(item, copy, model) if isinstance(item, BaseModel) else item for item in value]
+        elif isinstance(value, dict):
+            values[key] = {k: clone_model(item, copy, model) if isinstance(item, BaseModel) else item for k, item in value.items()}
+    return copy
+
+
+class ReportTemplate(Generic[ReportT]):
+    """
+    Holds a fully built report and creates new reports from it.
+
+    The template keeps its own copy of the report, so later changes to the source report
+    (or to reports created from the template) do not leak into it.
+    """
+
+    def __init__(self, report: ReportT):
+        self._report: ReportT = clone_model(report)
+
+    @property
+    def report(self) -> ReportT:
+        """ The template report. Changes to it apply to reports created afterwards. """
+        return self._report
+
+    def new_report(self, sn: str, start: Optional[datetime] = None, **fields: Any) -> ReportT:
+        """
+        Returns a new report with a new id.
+
+        :param sn: Serial number of the new report.
+        :param start: Start time; defaults to now (local time).
+        :param fields: Other report fields to set, e.g. result or station_name.
+        """
+        report = clone_model(self._report)
+        report.id = uuid4()
+        report.sn = sn
+        report.start = start if start is not None else datetime.now().astimezone()
+        for name, value in fields.items():
+            setattr(report, name, value)
+        return report
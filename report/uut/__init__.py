@@ -1,17 +1,2 @@
 from .step import Step, StepType
 from .steps import * #NumericStep, MultiNumericStep, BooleanStep,MultiBooleanStep, StringStep, MultiStringStep,ActionStep, ChartStep, GenericStep, SequenceCall, CallExeStep, MessagePopUpStep
-
-# Rebuild models to resolve forward references
-Step.model_rebuild()
-NumericStep.model_rebuild()
-MultiNumericStep.model_rebuild()
-BooleanStep.model_rebuild()
-MultiBooleanStep.model_rebuild()
-StringStep.model_rebuild()
-MultiStringStep.model_rebuild()
-ActionStep.model_rebuild()
-GenericStep.model_rebuild()
-MessagePopUpStep.model_rebuild()
-CallExeStep.model_rebuild()
-ChartStep.model_rebuild()
-SequenceCall.model_rebuild()
@@ -27,6 +27,12 @@ class StepStatus(Enum):
     Skipped = 'S'
     Terminated = 'T'
     Done = 'D'
+
+def status_value(status) -> Any:
+    """ Status as its code ('P', 'F', ...). Defaults and unvalidated assignments may hold StepStatus members. """
+    return getattr(status, "value", status)
+
+_FAILED = StepStatus.Failed.value
     
 # -----------------------------------------------------------------------
 # Step: Abstract base step for all steps
@@ -95,6 +101,71 @@ class Step(WATSBase, ABC):
         #           errors.append(f"{self.get_step_path()} ErrorMessage.")
         #     return True
 
+    # -------------------------------------------------------------------
+    # Status roll-up
+    # Setting status notifies the parent sequence, which keeps counts of its children's statuses and
+    # fails itself while it has failing children (see SequenceCall). caused_seq_failure=False keeps
+    # a failed step from failing its sequence (TestStand's "step failure causes sequence failure").
+    # An assigned status or result always wins: the roll-up only changes values nobody assigned.
+    def __setattr__(self, name: str, value: Any):
+        if name == "status":
+            self._set_status(status_value(value))
+        elif name == "caused_seq_failure":
+            old_status, was_failing = status_value(self.status), self.is_failing
+            super().__setattr__(name, value)
+            self._status_changed(old_status, was_failing)
+        else:
+            super().__setattr__(name, value)
+
+    @property
+    def is_failing(self) -> bool:
+        """ True when the step failed and its failure fails its sequence """
+        return status_value(self.status) == _FAILED and self.caused_seq_failure is not False
+
+    def _set_status(self, status: Any):
+        old_status, was_failing = status_value(self.status), self.is_failing
+        super().__setattr__("status", status)
+        self._status_changed(old_status, was_failing)
+
+    def _status_changed(self, old_status: Any, was_failing: bool):
+        self.refresh_failure_flags()
+        parent = self.parent
+        if parent is not None:
+            parent._child_changed(old_status, was_failing, status_value(self.status), self.is_failing)
+        else:
+            self._root_changed()
+
+    def _root_changed(self):
+        """ Called when the status of a step without parent changed """
+
+    def refresh_failure_flags(self):
+        """
+        Sets caused_seq_failure/caused_uut_failure for a failed step in a sequence and clears them
+        otherwise. Flags set by the caller (or read from a report) are left alone. A failure causes
+        the UUT failure when no step on the path to the root opted out. O(depth).
+        """
+        # Written to __dict__ directly, so the flags set here do not count as set by the caller
+        values, fields_set = self.__dict__, self.__pydantic_fields_set__
+        own_seq = values["caused_seq_failure"] is None or "caused_seq_failure" not in fields_set
+        own_uut = values["caused_uut_failure"] is None or "caused_uut_failure" not in fields_set
+        if not (own_seq or own_uut):
+            return
+        parent = self.parent
+        if status_value(self.status) == _FAILED and parent is not None:
+            if own_seq and values["caused_seq_failure"] is None:
+                values["caused_seq_failure"] = True
+            if own_uut:
+                causes_uut_failure = values["caused_seq_failure"] is not False
+                while causes_uut_failure and parent.parent is not None:
+                    causes_uut_failure = parent.caused_seq_failure is not False
+                    parent = parent.parent
+                values["caused_uut_failure"] = True if causes_uut_failure else None
+        else:
+            if own_seq and values["caused_seq_failure"]:
+                values["caused_seq_failure"] = None
+            if own_uut and values["caused_uut_failure"]:
+                values["caused_uut_failure"] = None
+
     # return the steps path
     def get_step_path(self) -> str:
         path = []
@@ -137,9 +208,7 @@ class Step(WATSBase, ABC):
         self.attachment.content_type, _ = mimetypes.guess_type(file_name, strict=False)
 
 
-        
-
 StepType = Union['SequenceCall','MultiNumericStep','NumericStep','BooleanStep','MultiBooleanStep', 'MultiStringStep', 'StringStep', 'ChartStep', 'CallExeStep','MessagePopUpStep','GenericStep', 'ActionStep']
 from .steps import NumericStep,MultiNumericStep,SequenceCall,BooleanStep,MultiBooleanStep,MultiStringStep,StringStep,ChartStep,CallExeStep,MessagePopUpStep,GenericStep,ActionStep  # noqa: E402
 
-Step.model_rebuild()
+
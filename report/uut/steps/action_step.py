@@ -22,6 +22,8 @@ class ActionStep(Step):
     step_type: Literal["Action"] = Field(default="Action", validation_alias="stepType", serialization_alias="stepType")
 
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
@@ -3,44 +3,25 @@ from ...common_types import *
 from report.uut.steps.comp_operator import CompOp
 
 from ..step import Step, StepStatus
-from .measurement import BooleanMeasurement, MultiBooleanMeasurement
+from .measurement import BooleanMeasurement, MultiBooleanMeasurement, single_measurement
 
 
 class BooleanStep(Step):
     step_type: Literal["ET_PFT", "PassFailTest"] = Field(default="ET_PFT", validation_alias="stepType",serialization_alias="stepType")
  
-    measurement: BooleanMeasurement = Field(default=None, validation_alias="booleanMeas", serialization_alias="booleanMeas")
-
-    #Critical fix: Pre-process raw JSON data
-    @model_validator(mode='before')
-    def unpack_measurement(cls, data: dict) -> dict:
-        if 'booleanMeas' in data:
-            meas_data = data['booleanMeas']
-            
-            # Convert list to single item
-            if isinstance(meas_data, list):
-                data['booleanMeas'] = meas_data[0] if meas_data else None
-            
-            # Ensure dicts get converted to models
-            if isinstance(data['booleanMeas'], dict):
-                data['booleanMeas'] = BooleanMeasurement(**data['booleanMeas'])
-    
-        return data
-    
-    # Custom serializer for the measurement field
-    @field_serializer('measurement', when_used='json')
-    def serialize_measurement(self, measurement: Optional[BooleanMeasurement]) -> list:
-        if measurement is None:
-            return []
-        return [measurement.model_dump(by_alias=True, exclude_none=True)]  # Use aliases during serialization
+    measurement: single_measurement(BooleanMeasurement) = Field(default=None, validation_alias="booleanMeas", serialization_alias="booleanMeas")
     
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
 
 class MultiBooleanStep(BooleanStep):
     step_type: Literal["ET_MPFT"] = Field(default="ET_MPFT", validation_alias="stepType", serialization_alias="stepType")
+    # Not used; booleanMeas holds the measurements
+    measurement: Optional[BooleanMeasurement] = Field(default=None, exclude=True)
     measurements: list[MultiBooleanMeasurement] = Field(default_factory=list, validation_alias="booleanMeas",serialization_alias="booleanMeas")
 
     # validate_step
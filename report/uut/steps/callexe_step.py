@@ -22,6 +22,8 @@ class CallExeStep(Step):
     callExe: Optional[CallExeStepInfo] = Field(default=None, validation_alias="callExe", serialization_alias="callExe")
 
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
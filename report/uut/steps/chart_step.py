@@ -18,6 +18,8 @@ from ...chart import Chart
 class ChartStep(MultiNumericStep):
     step_type: Literal["WATS_XYGMNLT"] = Field(default="WATS_XYGMNLT", validation_alias="stepType", serialization_alias="stepType")
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
 
@@ -0,0 +1,607 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..step import Step, StepStatus, _FAILED
+from .sequence_call import StepList
+from .numeric_step import NumericStep, NumericMeasurement
+from .boolean_step import BooleanStep
+from .measurement import BooleanMeasurement
+from .comp_operator import CompOp
+
+# Row kinds
+NUMERIC = 0
+BOOLEAN = 1
+
+_NAN = float("nan")
+
+# Fields kept in columns; everything else is set on the materialized step
+_COLUMN_FIELDS = ("name", "group", "status", "tot_time")
+# Rarely used constructor arguments, kept in a sparse side table (in field order)
+_EXTRA_FIELDS = ("id", "error_code", "error_message", "report_text", "start")
+# Failure flags kept in the side table, set by the status roll-up (see Step.refresh_failure_flags)
+_FAILURE_FIELDS = ("caused_seq_failure", "caused_uut_failure")
+
+# Column attributes of ColumnarStepList by column type
+_CODE_COLUMNS = ("_groups", "_statuses", "_measurement_statuses", "_comp_ops", "_units")
+_FLOAT_COLUMNS = ("_tot_times", "_values", "_low_limits", "_high_limits")
+
+# Measurement status is restricted to P/F/S (see BooleanMeasurement)
+_MEASUREMENT_STATUSES = ("P", "F", "S")
+
+
+# ------------------------------------------------------------------------
+# Columns
+class _FloatColumn:
+    """
+    array('d') column. Values that are not plain numbers (None, strings, NaN) are marked with NaN
+    in the array and kept in a sparse side table.
+    """
+    __slots__ = ("values", "other")
+
+    def __init__(self):
+        self.values = array("d")
+        self.other: Dict[int, Union[float, str]] = {}
+
+    def append(self, value):
+        if (type(value) is float or type(value) is int) and value == value:
+            self.values.append(value)
+        else:
+            if value is not None:
+                self.other[len(self.values)] = value
+            self.values.append(_NAN)
+
+    def get(self, index: int):
+        value = self.values[index]
+        if value != value:
+            return self.other.get(index)
+        return value
+
+    def copy(self) -> "_FloatColumn":
+        column = _FloatColumn()
+        column.values = self.values[:]
+        column.other = self.other.copy()
+        return column
+
+    def set(self, index: int, value):
+        self.other.pop(index, None)
+        if (type(value) is float or type(value) is int) and value == value:
+            self.values[index] = value
+        else:
+            if value is not None:
+                self.other[index] = value
+            self.values[index] = _NAN
+
+
+class _CodeColumn:
+    """
+    Column of repeating values (status, group, unit, compOp) stored as codes into a value table.
+    """
+    __slots__ = ("codes", "table", "lookup")
+
+    def __init__(self, typecode: str = "B"):
+        self.codes = array(typecode)
+        self.table: List[Any] = []
+        self.lookup: Dict[Any, int] = {}
+
+    def _code(self, value) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.table)
+            self.table.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def get(self, index: int):
+        return self.table[self.codes[index]]
+
+    def set(self, index: int, value):
+        self.codes[index] = self._code(value)
+
+    def copy(self) -> "_CodeColumn":
+        column = _CodeColumn(self.codes.typecode)
+        column.codes = self.codes[:]
+        column.table = self.table.copy()
+        column.lookup = self.lookup.copy()
+        return column
+
+
+# ------------------------------------------------------------------------
+# Value checks. Mirror the field constraints of Step and the measurement models,
+# so a row holds the same values its materialized step would.
+def _check_name(name) -> str:
+    if not isinstance(name, str) or not 1 <= len(name) <= 100:
+        raise ValueError(f"Invalid step name: {name!r}")
+    return name
+
+def _check_group(group) -> str:
+    if group not in ("S", "M", "C"):
+        raise ValueError(f"Invalid step group: {group!r}")
+    return group
+
+def _check_status(status) -> str:
+    if isinstance(status, StepStatus):
+        status = status.value
+    if status not in StepStatus._value2member_map_:
+        raise ValueError(f"Invalid step status: {status!r}")
+    return status
+
+def _check_measurement_status(status) -> str:
+    status = _check_status(status)
+    if status not in _MEASUREMENT_STATUSES:
+        raise ValueError(f"Invalid measurement status: {status!r}")
+    return status
+
+def _check_float_or_str(value, field: str):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    raise ValueError(f"Invalid {field}: {value!r}")
+
+def _check_float(value, field: str) -> float:
+    try:
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            return float(value)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid {field}: {value!r}")
+
+def _check_comp_op(comp_op) -> Optional[str]:
+    if comp_op is None:
+        return None
+    if isinstance(comp_op, CompOp):
+        return comp_op.value
+    return CompOp(comp_op).value
+
+
+# ------------------------------------------------------------------------
+# Serialization layout, taken from the models so rows dump exactly like materialized steps
+class _Layout:
+    """
+    Output keys of a model dump in field order, for one by_alias setting.
+    """
+    __slots__ = ("keys", "template")
+
+    def __init__(self, model, by_alias: bool):
+        fields = [(name, (field.serialization_alias or name) if by_alias else name) for name, field in model.model_fields.items() if not field.exclude]
+        self.keys = dict(fields)
+        # Every field set to None, in field order
+        self.template = dict.fromkeys(key for _name, key in fields)
+
+    def dump(self, values: Dict[str, Any], exclude_none: bool) -> Dict[str, Any]:
+        """ values must be given in field order """
+        keys = self.keys
+        if exclude_none:
+            return {keys[name]: value for name, value in values.items() if value is not None}
+        out = self.template.copy()
+        for name, value in values.items():
+            out[keys[name]] = value
+        return out
+
+_STEP_LAYOUTS = {(kind, by_alias): _Layout(model, by_alias) for kind, model in ((NUMERIC, NumericStep), (BOOLEAN, BooleanStep)) for by_alias in (False, True)}
+_MEASUREMENT_LAYOUTS = {(kind, by_alias): _Layout(model, by_alias) for kind, model in ((NUMERIC, NumericMeasurement), (BOOLEAN, BooleanMeasurement)) for by_alias in (False, True)}
+_STEP_TYPES = {NUMERIC: NumericStep.model_fields["step_type"].default, BOOLEAN: BooleanStep.model_fields["step_type"].default}
+
+
+# ------------------------------------------------------------------------
+# Row handle
+class StepRow:
+    """
+    Handle for a numeric or boolean step stored in a ColumnarStepList.
+
+    name, group, status and tot_time are read from and written to the columns. Any other
+    attribute materializes the step (see materialize()), after which the handle forwards
+    everything to the step object.
+    """
+    __slots__ = ("_steps", "_row", "_step")
+
+    def __init__(self, steps: "ColumnarStepList", row: int):
+        object.__setattr__(self, "_steps", steps)
+        object.__setattr__(self, "_row", row)
+        object.__setattr__(self, "_step", None)
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._step is not None
+
+    def materialize(self) -> Step:
+        """ Returns the step object for this row, creating it on first use """
+        if self._step is None:
+            object.__setattr__(self, "_step", self._steps._build_step(self._row))
+        return self._step
+
+    @property
+    def step_type(self) -> str:
+        if self._step is not None:
+            return self._step.step_type
+        return _STEP_TYPES[self._steps._kinds[self._row]]
+
+    @property
+    def name(self) -> str:
+        if self._step is not None:
+            return self._step.name
+        return self._steps._names[self._row]
+
+    @property
+    def group(self) -> str:
+        if self._step is not None:
+            return self._step.group
+        return self._steps._groups.get(self._row)
+
+    @property
+    def status(self) -> str:
+        if self._step is not None:
+            return self._step.status
+        return self._steps._statuses.get(self._row)
+
+    @property
+    def tot_time(self):
+        if self._step is not None:
+            return self._step.tot_time
+        return self._steps._tot_times.get(self._row)
+
+    @property
+    def limits(self) -> Tuple[Optional[str], Any, Any]:
+        """ (comp_op, low_limit, high_limit) of the measurement; all None for boolean rows """
+        if self._step is not None:
+            measurement = getattr(self._step, "measurement", None)
+            if measurement is None or not hasattr(measurement, "comp_op"):
+                return None, None, None
+            return measurement.comp_op, measurement.low_limit, measurement.high_limit
+        steps, row = self._steps, self._row
+        return steps._comp_ops.get(row), steps._low_limits.get(row), steps._high_limits.get(row)
+
+    @property
+    def is_failing(self) -> bool:
+        if self._step is not None:
+            return self._step.is_failing
+        return self._steps._row_is_failing(self._row)
+
+    def refresh_failure_flags(self):
+        if self._step is not None:
+            self._step.refresh_failure_flags()
+        else:
+            self._steps._refresh_row_flags(self._row)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name, value):
+        if self._step is None and name in _COLUMN_FIELDS:
+            self._steps._set_column(self._row, name, value)
+        else:
+            setattr(self.materialize(), name, value)
+
+    def __repr__(self):
+        if self._step is not None:
+            return repr(self._step)
+        return f"StepRow(step_type={self.step_type!r}, name={self.name!r}, status={self.status!r})"
+
+
+# ------------------------------------------------------------------------
+# Columnar step list
+class ColumnarStepList(StepList):
+    """
+    StepList that stores numeric and boolean steps in parallel columns instead of one model per step.
+
+    Steps added with add_numeric_step()/add_boolean_step() are kept as rows and returned as StepRow
+    handles. A row becomes a real NumericStep/BooleanStep only when it is read from the list (indexing,
+    iteration) or when an attribute that is not a column is used on its handle. Rows that were never
+    materialized serialize straight from the columns.
+    Other steps (sequence calls, string steps, ...) are stored as ordinary step objects.
+    """
+
+    def __init__(self, items=None, parent: Optional["SequenceCall"] = None):
+        super().__init__(items, parent)
+        self._kinds = array("B")
+        self._names: List[str] = []
+        self._groups = _CodeColumn()
+        self._statuses = _CodeColumn()
+        self._tot_times = _FloatColumn()
+        # Measurement columns (numeric rows; boolean rows hold placeholders for value, limits, compOp and unit)
+        self._measurement_statuses = _CodeColumn()
+        self._values = _FloatColumn()
+        self._low_limits = _FloatColumn()
+        self._high_limits = _FloatColumn()
+        self._comp_ops = _CodeColumn()
+        self._units = _CodeColumn("I")
+        # Sparse side table for the rare fields: row -> {field: value}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    # -------------------------------------------------------------------
+    # Adding rows
+    def add_numeric_step(self, *, name: str, value: float, unit: str, comp_op: CompOp, low_limit, high_limit, status: str, group: str, tot_time, **extras) -> StepRow:
+        if not isinstance(unit, str):
+            raise ValueError(f"Invalid unit: {unit!r}")
+        row = self._append_row(NUMERIC, name, group, status, tot_time, extras)
+        self._values.append(_check_float(value, "value"))
+        self._low_limits.append(_check_float_or_str(low_limit, "low_limit"))
+        self._high_limits.append(_check_float_or_str(high_limit, "high_limit"))
+        self._comp_ops.append(_check_comp_op(comp_op))
+        self._units.append(unit)
+        return self._append_handle(row)
+
+    def add_boolean_step(self, *, name: str, status: str, group: str, tot_time, **extras) -> StepRow:
+        row = self._append_row(BOOLEAN, name, group, status, tot_time, extras)
+        self._values.append(None)
+        self._low_limits.append(None)
+        self._high_limits.append(None)
+        self._comp_ops.append(None)
+        self._units.append(None)
+        return self._append_handle(row)
+
+    def _append_row(self, kind: int, name, group, status, tot_time, extras: Dict[str, Any]) -> int:
+        # Check everything before appending, so a bad value leaves the columns aligned
+        name = _check_name(name)
+        group = _check_group(group)
+        measurement_status = _check_measurement_status(status)
+        tot_time = _check_float_or_str(tot_time, "tot_time")
+
+        row = len(self._kinds)
+        self._kinds.append(kind)
+        self._names.append(name)
+        self._groups.append(group)
+        self._statuses.append(measurement_status)
+        self._measurement_statuses.append(measurement_status)
+        self._tot_times.append(tot_time)
+        extras = {key: value for key, value in extras.items() if value is not None}
+        if extras:
+            self._extras[row] = extras
+        return row
+
+    def _append_handle(self, row: int) -> StepRow:
+        handle = StepRow(self, row)
+        list.append(self, handle)
+        self._added(handle)
+        return handle
+
+    def _set_column(self, row: int, name: str, value):
+        if name == "name":
+            self._names[row] = _check_name(value)
+        elif name == "group":
+            self._groups.set(row, _check_group(value))
+        elif name == "status":
+            status = _check_status(value)
+            old_status, was_failing = self._statuses.get(row), self._row_is_failing(row)
+            self._statuses.set(row, status)
+            self._refresh_row_flags(row)
+            if self.parent is not None:
+                self.parent._child_changed(old_status, was_failing, status, self._row_is_failing(row))
+        elif name == "tot_time":
+            self._tot_times.set(row, _check_float_or_str(value, "tot_time"))
+
+    def _row_is_failing(self, row: int) -> bool:
+        return self._statuses.get(row) == _FAILED and self._extras.get(row, {}).get("caused_seq_failure") is not False
+
+    def _refresh_row_flags(self, row: int):
+        # Same rules as Step.refresh_failure_flags(). Row dicts are replaced, not changed (see clone())
+        extras = self._extras.get(row, {})
+        flags = {name: extras.get(name) for name in _FAILURE_FIELDS}
+        parent = self.parent
+        if self._statuses.get(row) == _FAILED and parent is not None:
+            if flags["caused_seq_failure"] is None:
+                flags["caused_seq_failure"] = True
+            causes_uut_failure = flags["caused_seq_failure"] is not False
+            while causes_uut_failure and parent.parent is not None:
+                causes_uut_failure = parent.caused_seq_failure is not False
+                parent = parent.parent
+            flags["caused_uut_failure"] = True if causes_uut_failure else None
+        else:
+            for name, value in flags.items():
+                if value:
+                    flags[name] = None
+        if any(flags[name] != extras.get(name) for name in _FAILURE_FIELDS):
+            extras = {name: value for name, value in extras.items() if name not in _FAILURE_FIELDS}
+            extras.update((name, value) for name, value in flags.items() if value is not None)
+            if extras:
+                self._extras[row] = extras
+            else:
+                self._extras.pop(row, None)
+
+    # -------------------------------------------------------------------
+    # Materialization
+    def _build_step(self, row: int) -> Step:
+        """ Creates the step for a row the same way SequenceCall.add_numeric_step/add_boolean_step do """
+        extras = self._extras.get(row, {})
+        status = self._measurement_statuses.get(row)
+        # Constructed with the row status, so the step takes over the row's place in the sequence's status counts
+        common = dict(name=self._names[row], status=self._statuses.get(row), id=extras.get("id"), group=self._groups.get(row),
+                      errorCode=extras.get("error_code"), errorMessage=extras.get("error_message"),
+                      reportText=extras.get("report_text"), start=extras.get("start"), totTime=self._tot_times.get(row),
+                      parent=self.parent)
+        if self._kinds[row] == NUMERIC:
+            value, unit = self._values.get(row), self._units.get(row)
+            step = NumericStep(value=value, unit=unit, **common)
+            step.measurement = NumericMeasurement(value=value, unit=unit, status=status, comp_op=self._comp_ops.get(row),
+                                                  low_limit=self._low_limits.get(row), high_limit=self._high_limits.get(row))
+        else:
+            step = BooleanStep(**common)
+            step.measurement = BooleanMeasurement(status=status)
+        # The roll-up's failure flags, not set by the caller (see Step.refresh_failure_flags)
+        step.__dict__.update((name, extras[name]) for name in _FAILURE_FIELDS if name in extras)
+        return step
+
+    @staticmethod
+    def _item(item):
+        return item.materialize() if type(item) is StepRow else item
+
+    def materialize_all(self):
+        """ Materializes every row (the steps stay in the list) """
+        for item in list.__iter__(self):
+            if type(item) is StepRow:
+                item.materialize()
+
+    @property
+    def row_count(self) -> int:
+        """ Number of rows that have not been materialized """
+        return sum(1 for item in list.__iter__(self) if type(item) is StepRow and item._step is None)
+
+    # -------------------------------------------------------------------
+    # List access returns step objects
+    def __getitem__(self, index):
+        item = list.__getitem__(self, index)
+        if isinstance(index, slice):
+            return [self._item(i) for i in item]
+        return self._item(item)
+
+    def __iter__(self) -> Iterator[Step]:
+        for item in list.__iter__(self):
+            yield self._item(item)
+
+    def __reversed__(self) -> Iterator[Step]:
+        for item in list.__reversed__(self):
+            yield self._item(item)
+
+    def __contains__(self, value) -> bool:
+        return any(item is value or (type(item) is StepRow and item._step is value) for item in list.__iter__(self))
+
+    def index(self, value, *args) -> int:
+        for position, item in enumerate(list.__iter__(self)):
+            if item is value or (type(item) is StepRow and item._step is value):
+                return position
+        raise ValueError(f"{value!r} is not in list")
+
+    def remove(self, value):
+        list.__delitem__(self, self.index(value))
+        self._removed()
+
+    def pop(self, index=-1):
+        item = self._item(list.pop(self, index))
+        self._removed()
+        return item
+
+    def copy(self) -> List[Step]:
+        return list(self)
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles get plain step objects
+        return (StepList, (list(self), self.parent))
+
+    # -------------------------------------------------------------------
+    # Copying
+    def clone(self, parent: "SequenceCall", clone_item: Callable[[Step], Step]) -> "ColumnarStepList":
+        """
+        Returns an independent copy with parent as its sequence. Columns are copied as arrays;
+        step objects (including materialized rows) are copied with clone_item.
+        """
+        steps = ColumnarStepList(parent=parent)
+        for name in _CODE_COLUMNS + _FLOAT_COLUMNS:
+            setattr(steps, name, getattr(self, name).copy())
+        steps._kinds = self._kinds[:]
+        steps._names = self._names.copy()
+        # Extras are never changed in place, so the row dicts can be shared
+        steps._extras = self._extras.copy()
+        for item in list.__iter__(self):
+            if type(item) is StepRow:
+                handle = StepRow(steps, item._row)
+                if item._step is not None:
+                    object.__setattr__(handle, "_step", clone_item(item._step))
+                list.append(steps, handle)
+            else:
+                list.append(steps, clone_item(item))
+        return steps
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the list as plain arrays, lists and dicts. "entries" holds a row number for each
+        row that was never materialized and the step object for everything else.
+        """
+        state = {"kinds": self._kinds, "names": self._names, "extras": self._extras}
+        for name in _CODE_COLUMNS:
+            column = getattr(self, name)
+            state[name] = [column.codes, column.table]
+        for name in _FLOAT_COLUMNS:
+            column = getattr(self, name)
+            state[name] = [column.values, column.other]
+        state["entries"] = [item._row if type(item) is StepRow and item._step is None else self._item(item) for item in list.__iter__(self)]
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], parent: Optional["SequenceCall"] = None) -> "ColumnarStepList":
+        """ Creates a list from get_state() output """
+        steps = cls(parent=parent)
+        steps._kinds = state["kinds"]
+        steps._names = state["names"]
+        steps._extras = state["extras"]
+        for name in _CODE_COLUMNS:
+            column = getattr(steps, name)
+            column.codes, column.table = state[name]
+            column.lookup = {value: code for code, value in enumerate(column.table)}
+        for name in _FLOAT_COLUMNS:
+            column = getattr(steps, name)
+            column.values, column.other = state[name]
+        for entry in state["entries"]:
+            list.append(steps, StepRow(steps, entry) if type(entry) is int else entry)
+        return steps
+
+    # -------------------------------------------------------------------
+    # Parent handling
+    def set_parent(self, parent: "SequenceCall"):
+        self.parent = parent
+        for item in list.__iter__(self):
+            if type(item) is StepRow:
+                if item._step is not None:
+                    item._step.parent = parent
+            elif hasattr(item, "parent"):
+                item.parent = parent
+
+    def append(self, item):
+        super().append(self._item(item))
+
+    def extend(self, iterable):
+        super().extend([self._item(item) for item in iterable])
+
+    def insert(self, index, item):
+        super().insert(index, self._item(item))
+
+    # -------------------------------------------------------------------
+    # Serialization
+    def serialize_items(self, info) -> list:
+        if info.exclude_unset or info.exclude_defaults or info.round_trip:
+            # Field-set and default tracking only exists on real models
+            return list(self)
+
+        by_alias = bool(info.by_alias)
+        exclude_none = info.exclude_none
+        json_mode = info.mode_is_json()
+
+        items = []
+        for item in list.__iter__(self):
+            if type(item) is not StepRow:
+                items.append(item)
+            elif item._step is not None:
+                items.append(item._step)
+            else:
+                items.append(self._dump_row(item._row, by_alias, exclude_none, json_mode))
+        return items
+
+    def _dump_row(self, row: int, by_alias: bool, exclude_none: bool, json_mode: bool) -> Dict[str, Any]:
+        kind = self._kinds[row]
+        status = self._measurement_statuses.get(row)
+        if kind == NUMERIC:
+            measurement = {"status": status, "value": self._values.get(row), "comp_op": self._comp_ops.get(row),
+                           "high_limit": self._high_limits.get(row), "low_limit": self._low_limits.get(row), "unit": self._units.get(row)}
+        else:
+            measurement = {"status": status}
+
+        # NumericStep/BooleanStep serialize the measurement as a one item list in json mode
+        measurement = _MEASUREMENT_LAYOUTS[kind, by_alias].dump(measurement, exclude_none)
+        if json_mode:
+            measurement = [measurement]
+
+        values = {"step_type": _STEP_TYPES[kind], "name": self._names[row], "group": self._groups.get(row), "status": self._statuses.get(row)}
+        extras = self._extras.get(row)
+        if extras:
+            for name in _EXTRA_FIELDS:
+                values[name] = extras.get(name)
+        values["tot_time"] = self._tot_times.get(row)
+        if extras:
+            for name in _FAILURE_FIELDS:
+                values[name] = extras.get(name)
+        values["measurement"] = measurement
+        return _STEP_LAYOUTS[kind, by_alias].dump(values, exclude_none)
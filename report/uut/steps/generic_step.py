@@ -68,6 +68,8 @@ class GenericStep(Step):
     step_type: FlowType|str = Field(..., validation_alias="stepType",serialization_alias="stepType")
 
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
\ No newline at end of file
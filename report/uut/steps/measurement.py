@@ -1,7 +1,7 @@
 import json
-from typing import Any, Literal, Optional, Union, Generic, TypeVar
+from typing import Annotated, Any, Literal, Optional, Union, Generic, TypeVar
 from uuid import UUID
-from pydantic import Field, model_validator, root_validator
+from pydantic import BeforeValidator, Field, PlainSerializer, model_validator, root_validator
 from pydantic_core.core_schema import FieldPlainInfoSerializerFunction
 
 from report.wats_base import WATSBase
@@ -25,6 +25,23 @@ class BooleanMeasurement(Measurement):
 class MultiBooleanMeasurement(BooleanMeasurement):    
     name: Optional[str] = Field(..., description="The name of the measurement - required for MultiStepTypes")
 
+# ------------------------------------------------------------------------------------------
+# Measurement of a single measurement step (NumericStep, StringStep, BooleanStep). WSJF sends it
+# as a one item list: the list is unwrapped before validation and the measurement wrapped again
+# when serializing to JSON. The measurement itself is validated and serialized by pydantic-core.
+def _unwrap_measurement(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def _wrap_measurement(value: Any) -> list:
+    return [] if value is None else [value]
+
+def single_measurement(measurement_type: type) -> Any:
+    """ Field type of a step's single measurement: the measurement or a one item list; a one item list in JSON """
+    return Annotated[Optional[measurement_type], BeforeValidator(_unwrap_measurement),
+                     PlainSerializer(_wrap_measurement, return_type=list[measurement_type], when_used="json")]
+
 # ------------------------------------------------------------------------------------------
 # LimitMeasurement 
 class LimitMeasurement(BooleanMeasurement):
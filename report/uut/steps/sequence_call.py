@@ -4,11 +4,13 @@ from abc import abstractmethod
 from report.uut.steps.measurement import BooleanMeasurement
 from report.uut.steps.string_step import StringMeasurement
 from ...common_types import *
+from typing import Dict, ForwardRef, get_args
+from pydantic import Discriminator, PrivateAttr, Tag
 from pydantic_core import core_schema
 
 from report.chart import Chart, ChartSeries, ChartType
 
-from ..step import Step, StepType
+from ..step import Step, StepType, status_value, _FAILED
 from ..steps import *
 from .numeric_step import NumericStep, MultiNumericStep, NumericMeasurement
 from .string_step import StringStep, MultiStringStep
@@ -16,7 +18,10 @@ from .boolean_step import BooleanStep, MultiBooleanStep
 from .generic_step import GenericStep, FlowType
 from .chart_step import ChartStep
 from .action_step import ActionStep
+from .callexe_step import CallExeStep
+from .message_popup_step import MessagePopUpStep
 from .comp_operator import CompOp
+from ..validation import sequence_issues
 
 # ------------------------------------------------------------------------
 # Custom list class with parent reference
@@ -46,34 +51,114 @@ class StepList(List[StepType]):
         if hasattr(item, "parent"):
             item.parent = self.parent
         super().append(item)
+        self._added(item)
 
     def extend(self, iterable):
         """Ensure parent is set when extending."""
-        for item in iterable:
+        items = list(iterable)
+        for item in items:
             if hasattr(item, "parent"):
                 item.parent = self.parent
-        super().extend(iterable)
+        super().extend(items)
+        for item in items:
+            self._added(item)
 
     def insert(self, index, item):
         """Ensure parent is set when inserting."""
         if hasattr(item, "parent"):
             item.parent = self.parent
         super().insert(index, item)
+        self._added(item)
+
+    # Removing steps recounts the sequence's step statuses
+    def remove(self, value):
+        super().remove(value)
+        self._removed()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._removed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._removed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._removed()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._removed()
+
+    def _added(self, item):
+        # Tell the owning sequence (not set while validating, when parent can be the raw dict)
+        if isinstance(self.parent, SequenceCall):
+            self.parent._child_added(item)
+
+    def _removed(self):
+        if isinstance(self.parent, SequenceCall):
+            self.parent._children_changed()
 
     @classmethod
     def __get_pydantic_core_schema__(cls, source_type, handler):
         """Correctly handle serialization and validation for Pydantic with StepType (Union)."""
         return core_schema.list_schema(
-            items_schema=handler.generate_schema(StepType),  # Handle Union[Step, NumericStep, ...]
-            serialization=core_schema.plain_serializer_function_ser_schema(list),
+            items_schema=handler.generate_schema(_tagged_step_union()),  # Handle Union[Step, NumericStep, ...]
+            serialization=core_schema.plain_serializer_function_ser_schema(_serialize_step_list, info_arg=True),
         )
 
+    def serialize_items(self, info) -> list:
+        """Returns the items to serialize. Subclasses may return already dumped dicts."""
+        return list(self)
+
     @classmethod
     def _validate_list(cls, value):
         """Ensure the list is properly validated and converted."""
         if not isinstance(value, list):
             raise ValueError("Expected a list")
         return StepList(value)  # Convert normal lists to StepList
+
+def _serialize_step_list(value, info) -> list:
+    if isinstance(value, StepList):
+        return value.serialize_items(info)
+    return list(value)
+
+
+# ------------------------------------------------------------------------
+# Step union. The class of a step is picked from its stepType (a tagged union), so pydantic-core
+# validates each step against one class instead of trying every class of StepType.
+_DEFAULT_STEP_TAG = "SequenceCall"  # Steps without stepType
+_GENERIC_STEP_TAG = "GenericStep"   # Any other stepType
+_step_tags: Dict[str, str] = {}     # stepType -> class name
+_class_tags: Dict[type, str] = {}   # Step instances: class -> class name
+
+
+def _step_tag(value: Any) -> str:
+    if isinstance(value, dict):
+        step_type = value.get("stepType", value.get("step_type"))
+        if step_type is None:
+            return _DEFAULT_STEP_TAG
+        return _step_tags.get(step_type, _GENERIC_STEP_TAG) if isinstance(step_type, str) else _GENERIC_STEP_TAG
+    cls = type(value)
+    tag = _class_tags.get(cls)
+    if tag is None:
+        # Subclasses of the step classes validate as the nearest class of the union
+        tag = next((base.__name__ for base in cls.__mro__ if base.__name__ in _class_tags.values()), _GENERIC_STEP_TAG)
+        _class_tags[cls] = tag
+    return tag
+
+
+def _tagged_step_union() -> Any:
+    namespace = globals()
+    classes = [namespace[arg.__forward_arg__] if isinstance(arg, ForwardRef) else arg for arg in get_args(StepType)]
+    for cls in classes:
+        _class_tags[cls] = cls.__name__
+        for step_type in get_args(cls.model_fields["step_type"].annotation):
+            if isinstance(step_type, str):
+                _step_tags.setdefault(step_type, cls.__name__)
+    return Annotated[Union[tuple(Annotated[cls, Tag(cls.__name__)] for cls in classes)], Discriminator(_step_tag)]
 # ------------------------------------------------------------------------
 
 # ------------------------------------------------------------------------
@@ -99,6 +184,17 @@ class SequenceCall(Step):
 
     # Child steps - Only applies to SequenceCall
     steps: Optional[StepList[Annotated[StepType, Field(discriminator='step_type')]]] = Field(default_factory=StepList)
+
+    # Status roll-up state. Counts are built from the steps on first use and then kept up to date.
+    _status_counts: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    _failing_count: int = PrivateAttr(default=0)
+    # Status set on this sequence while failing children force it to "F"; restored when they stop failing
+    _own_status: Optional[str] = PrivateAttr(default=None)
+    # True once a status was assigned (also at construction or when read from a report); the roll-up
+    # then no longer changes it
+    _status_assigned: bool = PrivateAttr(default=False)
+    # Report this sequence is the root of
+    _report: Optional[Any] = PrivateAttr(default=None)
     
     # StepList model validator - before. Converts incoming list to StepList when deserializing
     @model_validator(mode="before")
@@ -131,6 +227,102 @@ class SequenceCall(Step):
             print(f"Error setting parent: {e}")
         return self  
 
+    # -------------------------------------------------------------------
+    # Status roll-up
+    def model_post_init(self, context: Any) -> None:
+        if "status" in self.__pydantic_fields_set__:
+            self.__pydantic_private__["_status_assigned"] = True
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name == "steps":
+            self._children_changed()
+
+    @property
+    def status_counts(self) -> Dict[str, int]:
+        """ Number of direct child steps per status """
+        return dict(self._counts())
+
+    @property
+    def failing_count(self) -> int:
+        """ Number of direct child steps that fail this sequence """
+        self._counts()
+        return self._failing_count
+
+    # The roll-up runs for every added step, so it works on the private attribute dict directly
+    def _counts(self) -> Dict[str, int]:
+        private = self.__pydantic_private__
+        counts = private["_status_counts"]
+        if counts is None:
+            counts, failing = {}, 0
+            for step in list.__iter__(self.steps or []):
+                status = status_value(step.status)
+                counts[status] = counts.get(status, 0) + 1
+                if step.is_failing:
+                    failing += 1
+            private["_status_counts"], private["_failing_count"] = counts, failing
+        return counts
+
+    def _child_changed(self, old_status, was_failing: bool, status, is_failing: bool):
+        private = self.__pydantic_private__
+        counts = private["_status_counts"]
+        if counts is None:
+            # Counted from the steps, which already hold the new status
+            self._counts()
+        else:
+            if old_status != status:
+                counts[old_status] = counts.get(old_status, 1) - 1
+                counts[status] = counts.get(status, 0) + 1
+            if was_failing != is_failing:
+                private["_failing_count"] += 1 if is_failing else -1
+        self._roll_up()
+
+    def _child_added(self, step):
+        private = self.__pydantic_private__
+        counts = private["_status_counts"]
+        if counts is None:
+            self._counts()
+        else:
+            status = status_value(step.status)
+            counts[status] = counts.get(status, 0) + 1
+            if step.is_failing:
+                private["_failing_count"] += 1
+                step.refresh_failure_flags()
+                self._roll_up()
+                return
+        step.refresh_failure_flags()
+        self._roll_up()
+
+    def _children_changed(self):
+        self.__pydantic_private__["_status_counts"] = None
+        self._roll_up()
+
+    def _roll_up(self):
+        self._counts()
+        private = self.__pydantic_private__
+        if private["_status_assigned"]:
+            return
+        if private["_failing_count"] > 0:
+            status = status_value(self.status)
+            if status != _FAILED:
+                private["_own_status"] = status
+                Step._set_status(self, _FAILED)
+        elif private["_own_status"] is not None:
+            status, private["_own_status"] = private["_own_status"], None
+            Step._set_status(self, status)
+
+    def _set_status(self, status):
+        # Assigned status: wins over the roll-up (the roll-up itself calls Step._set_status)
+        private = self.__pydantic_private__
+        private["_status_assigned"] = True
+        private["_own_status"] = None
+        super()._set_status(status)
+
+    def _root_changed(self):
+        report = self.__pydantic_private__["_report"]
+        if report is not None:
+            report._root_changed()
+
     # validate_step - all step types
     def validate_step(self, trigger_children=False, errors=None) -> bool:
         if errors is None:
@@ -141,11 +333,11 @@ class SequenceCall(Step):
         
         # Sequence Call Validation:
         
-        # Validate child steps
+        # Validate child steps - collects the errors of all steps (see report.uut.validation)
         if trigger_children:
-            for step in self.steps:
-                if not step.validate_step(trigger_children=trigger_children, errors=errors):
-                    return False            
+            issues = sequence_issues(self)
+            errors.extend(str(issue) for issue in issues)
+            return not issues
         
         return True
  
@@ -158,9 +350,21 @@ class SequenceCall(Step):
         new_seq.sequence.path = path
         new_seq.sequence.version = version
         new_seq.parent = self
+        if isinstance(self.steps, ColumnarStepList):
+            new_seq.enable_columnar_steps()
         self.steps.append(new_seq)
         return new_seq
     # --------------------------------------------
+    # Store numeric and boolean steps added from now on in columns (see ColumnarStepList)
+    def enable_columnar_steps(self) -> None:
+        """
+        Switches this sequence (and sub-sequences added later) to columnar step storage.
+        Meant for very large reports: add_numeric_step()/add_boolean_step() then return
+        light StepRow handles instead of step objects.
+        """
+        if not isinstance(self.steps, ColumnarStepList):
+            self.steps = ColumnarStepList(list(self.steps), parent=self)
+    # --------------------------------------------
     # AddNumericLimitStep()
     def add_numeric_step(self, *,
                          name: str,
@@ -181,6 +385,9 @@ class SequenceCall(Step):
             value = "NaN"
             comp_op = CompOp.LOG
             unit = ""
+        if isinstance(self.steps, ColumnarStepList):
+            return self.steps.add_numeric_step(name=name, value=value, unit=unit, comp_op=comp_op, low_limit=low_limit, high_limit=high_limit, status=status, group=group, tot_time=tot_time,
+                                               id=id, error_code=error_code, error_message=error_message, report_text=reportText, start=start)
         ns = NumericStep(name=name, value=value, unit=unit, status=status, id=id, group=group, errorCode=error_code, error_message=error_message, reportText=reportText, start=start, totTime=tot_time, parent=self)
         nm = NumericMeasurement(value=value, unit=unit, status=status, comp_op=comp_op, low_limit=low_limit, high_limit=high_limit)
         ns.measurement = nm
@@ -259,6 +466,9 @@ class SequenceCall(Step):
                          tot_time: Optional[Union[float, str]] = None) -> BooleanStep:
         """
         """
+        if isinstance(self.steps, ColumnarStepList):
+            return self.steps.add_boolean_step(name=name, status=status, group=group, tot_time=tot_time,
+                                               id=id, error_code=error_code, error_message=error_message, report_text=report_text, start=start)
         bs = BooleanStep(name=name, status=status, id=id, group=group, errorCode=error_code, errorMessage=error_message, reportText=report_text, start=start, totTime=tot_time, parent=self)
         bs.measurement = BooleanMeasurement(status=status)        
         self.steps.append(bs)
@@ -342,5 +552,4 @@ class SequenceCall(Step):
                 print(f"{prefix}    - {step.__class__.__name__}: {getattr(step, 'name', 'Unnamed')} (Parent: {step_parent_name}, Class: {step.step_type})")
     
 
-
-
+from .columnar_step_list import ColumnarStepList  # noqa: E402
@@ -1,11 +1,11 @@
 from typing import Optional, Union, Literal, TYPE_CHECKING
 from uuid import UUID
-from pydantic import Field, field_serializer, model_serializer, model_validator
+from pydantic import Field
 
 from report.uut.steps.comp_operator import CompOp
 
 from ..step import Step
-from .measurement import BooleanMeasurement, MultiBooleanMeasurement
+from .measurement import BooleanMeasurement, MultiBooleanMeasurement, single_measurement
 
 class StringMeasurement(BooleanMeasurement):
     value: Optional[str] = None
@@ -19,42 +19,23 @@ class MultiStringMeasurement(StringMeasurement):
 
 class StringStep(Step):
     step_type: Literal["ET_SVT"] = Field(default="ET_SVT", validation_alias="stepType", serialization_alias="stepType")
-    measurement: StringMeasurement = Field(default=None, validation_alias="stringMeas", serialization_alias="stringMeas")
+    measurement: single_measurement(StringMeasurement) = Field(default=None, validation_alias="stringMeas", serialization_alias="stringMeas")
 
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
 
-    #Critical fix: Pre-process raw JSON data
-    @model_validator(mode='before')
-    def unpack_measurement(cls, data: dict) -> dict:
-        if 'stringMeas' in data:
-            meas_data = data['stringMeas']
-            
-            # Convert list to single item
-            if isinstance(meas_data, list):
-                data['stringMeas'] = meas_data[0] if meas_data else None
-            
-            # Ensure dicts get converted to models
-            if isinstance(data['stringMeas'], dict):
-                data['stringMeas'] = StringMeasurement(**data['stringMeas'])
-        
-        return data
-
-    # Custom serializer for the measurement field
-    @field_serializer('measurement', when_used='json')
-    def serialize_measurement(self, measurement: Optional[StringMeasurement]) -> list:
-        if measurement is None:
-            return []
-        return [measurement.model_dump(by_alias=True, exclude_none=True)]  # Use aliases during serialization
-
 
 class MultiStringStep(Step):
     step_type: Literal["ET_MSVT"] = Field(default="ET_MSVT", validation_alias="stepType", serialization_alias="stepType")
     measurements: list[MultiStringMeasurement] = Field(default_factory=list, validation_alias="stringMeas", serialization_alias="stringMeas")
 
     def validate_step(self, trigger_children=False, errors=None) -> bool:
+        if errors is None:
+            errors = []
         if not super().validate_step(trigger_children=trigger_children, errors=errors):
             return False
         return True
@@ -4,8 +4,10 @@ UUTReport.py
 -
 """
 from report.common_types import *
+from pydantic import PrivateAttr
 from ..report import Report
 from .uut_info import UUTInfo
+from .step import status_value, _FAILED
 from .steps.sequence_call import SequenceCall, SequenceCallInfo
     
 def_MissingString = "Missing"
@@ -23,8 +25,65 @@ class UUTReport(Report):
     root: SequenceCall = Field(default_factory=SequenceCall)        # Root Sequence Call
     info: UUTInfo = Field(..., default_factory=UUTInfo, validation_alias="uut", serialization_alias="uut")     # Info (serializes as alias:uut)
 
+    # Result set on the report while a failed root forces it to "F"; restored when the root stops failing
+    _own_result: Optional[str] = PrivateAttr(default=None)
+    # True once a result was assigned (also at construction or when read from a report); the roll-up
+    # then no longer changes it
+    _result_assigned: bool = PrivateAttr(default=False)
+
+    # -------------------------------------------------------------------
+    # Result roll-up: the result follows the root sequence, which follows its steps. Only changes made
+    # after construction roll up, so a loaded report keeps the result it was stored with.
+    def model_post_init(self, context: Any) -> None:
+        if "result" in self.__pydantic_fields_set__:
+            self._result_assigned = True
+        if self.root is not None:
+            self.root._report = self
+
+    def __setattr__(self, name: str, value: Any):
+        if name == "result":
+            self._set_result(value)
+            return
+        super().__setattr__(name, value)
+        if name == "root":
+            self._bind_root()
+
+    def _bind_root(self):
+        if self.root is not None:
+            self.root._report = self
+            self._root_changed()
+
+    def _root_failed(self) -> bool:
+        return self.root is not None and status_value(self.root.status) == _FAILED
+
+    def _set_result(self, result: str):
+        # Assigned result: wins over the roll-up
+        self._result_assigned = True
+        self._own_result = None
+        super().__setattr__("result", result)
+
+    def _root_changed(self):
+        if self._result_assigned:
+            return
+        if self._root_failed():
+            if self.result != _FAILED:
+                self._own_result = self.result
+                super().__setattr__("result", _FAILED)
+        elif self._own_result is not None:
+            result, self._own_result = self._own_result, None
+            super().__setattr__("result", result)
+
     # -------------------------------------------------------------------
     # Get root sequence call    
     def get_root_sequence_call(self) -> SequenceCall:
         self.root.name = "MainSequence Callback"
-        return self.root
\ No newline at end of file
+        return self.root
+
+    # -------------------------------------------------------------------
+    # Columnar step storage for very large reports
+    def enable_columnar_steps(self) -> None:
+        """
+        Stores numeric and boolean steps added from now on in columns instead of step objects.
+        See SequenceCall.enable_columnar_steps().
+        """
+        self.root.enable_columnar_steps()
\ No newline at end of file
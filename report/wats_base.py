@@ -1,7 +1,13 @@
 
-from typing import Any, Dict, Optional, Self
+import threading
+from typing import Any, Dict, List, Optional, Self, Type
 from pydantic import BaseModel, ModelWrapValidatorHandler, ValidationInfo, model_validator
 
+# Report models in definition order; see WATSBase.model_rebuild
+_models: List[Type["WATSBase"]] = []
+_building = False
+_build_lock = threading.RLock()
+
 
 class WATSBase(BaseModel):
     '''
@@ -10,6 +16,30 @@ class WATSBase(BaseModel):
     Sets model configutation for all models
     Handles incoming deserialization-context for loading legacy-data by injecting default values
     '''
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any):
+        super().__pydantic_init_subclass__(**kwargs)
+        _models.append(cls)
+
+    @classmethod
+    def model_rebuild(cls, *args: Any, **kwargs: Any) -> Optional[bool]:
+        """
+        Schemas are built on first use (defer_build). The first model used builds all report models,
+        in definition order: a model is defined after the models it contains, so every schema is
+        generated once and reused by the models that contain it.
+        """
+        global _building
+        with _build_lock:
+            if not _building:
+                _building = True
+                try:
+                    for model in list(_models):
+                        if not model.__pydantic_complete__:
+                            super(WATSBase, model).model_rebuild(raise_errors=False)
+                finally:
+                    _building = False
+            return super().model_rebuild(*args, **kwargs)
+
     # Injects default values sent in validation-context.
     @model_validator(mode="before")
     def inject_defaults(cls, data: Any, info: Optional[ValidationInfo]) -> Any:
@@ -52,5 +82,6 @@ class WATSBase(BaseModel):
         "arbitrary_types_allowed": True,    # Fixes StepList issue
         "use_enum_values": True,
         "allow_inf_nan": True,
-        "ser_json_inf_nan": 'strings'
+        "ser_json_inf_nan": 'strings',
+        "defer_build": True,                # Schemas are built on first use, not on import
     }
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Binary report codec: decoded reports are the reports that were encoded; bad data raises BinaryCodecError
+"""
+import uuid
+
+import pytest
+
+from report.binary_codec import MAGIC, BinaryCodecError, decode_report, encode_report
+from report.chart import ChartSeries, ChartType
+from report.uur.uur_info import UURInfo
+from report.uur.uur_report import UURReport
+from report.uut.steps.callexe_step import CallExeStep, CallExeStepInfo
+from report.uut.steps.comp_operator import CompOp
+from report.uut.steps.generic_step import FlowType
+from report.uut.steps.message_popup_step import MessagePopupInfo, MessagePopUpStep
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+DUMPS = [{}, {"by_alias": True, "exclude_none": True}, {"exclude_unset": True}]
+
+
+def new_report(columnar: bool = False, numeric_steps: int = 3) -> UUTReport:
+    uut = UUTReport(pn="PN", sn="SN", rev="1", station_name="Station", process_code=10, location="Location",
+                    purpose="Test", info=UUTInfo(operator="Operatør"))
+    if columnar:
+        uut.enable_columnar_steps()
+    uut.add_misc_info("Firmware", "1.2.3")
+    uut.add_sub_unit("PCB", "SN-PCB", "PN-PCB", "A")
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    for number in range(numeric_steps):
+        sequence.add_numeric_step(name=f"Numeric {number}", value=number + 0.5, unit="V", comp_op=CompOp.GELE,
+                                  low_limit=0.0, high_limit=float("inf"), status="P")
+    sequence.add_boolean_step(name="Boolean", status="F")
+    sequence.add_string_step(name="String", value="ABC", comp_op=CompOp.IGNORECASE, limit="abc")
+    multi_numeric = sequence.add_multi_numeric_step(name="Multi numeric")
+    multi_numeric.add_measurement(name="First", value=1.0, unit="V", comp_op=CompOp.LOG)
+    multi_numeric.add_measurement(name="Second", value=float("nan"), unit="V", comp_op=CompOp.LOG)
+    multi_string = sequence.add_multi_string_step(name="Multi string")
+    multi_string.add_measurement(name="First", value="A", comp_op=CompOp.LOG, status="P")
+    multi_boolean = sequence.add_multi_boolean_step(name="Multi boolean")
+    multi_boolean.add_measurement(name="First", status="P")
+    multi_boolean.add_measurement(name="Second", status="F")
+    sequence.add_chart_step(name="Chart", chart_type=ChartType.LINE, label="Chart", x_label="X", x_unit="s",
+                            y_label="Y", y_unit="V", series=[ChartSeries(name="Series", xdata="0.0;1.5", ydata="2.0;3.25")])
+    sequence.add_generic_step(step_type=FlowType.If, name="If")
+    sequence.steps.append(CallExeStep(name="Call", callExe=CallExeStepInfo(exit_code=0), parent=sequence))
+    sequence.steps.append(MessagePopUpStep(name="Popup", messagePopup=MessagePopupInfo(button=1), parent=sequence))
+    sequence.add_sequence_call(name="Inner").add_numeric_step(name="Inner numeric", value=1.0, unit="A")
+    return uut
+
+
+def assert_same(decoded, original):
+    assert type(decoded) is type(original)
+    for options in DUMPS:
+        assert decoded.model_dump_json(**options) == original.model_dump_json(**options), options
+
+
+def test_uut_with_every_step_type():
+    uut = new_report()
+    decoded = decode_report(encode_report(uut))
+    assert_same(decoded, uut)
+    sequence = decoded.root.steps[0]
+    assert sequence.parent is decoded.root and decoded.root._report is decoded
+    assert all(step.parent is sequence for step in sequence.steps)
+    assert all(measurement.parent_step is sequence.steps[5] for measurement in sequence.steps[5].measurements)
+
+
+def test_decoded_report_keeps_rolling_up():
+    uut = new_report()
+    decoded = decode_report(encode_report(uut))
+    for report in (uut, decoded):
+        report.root.steps[0].steps[-1].add_boolean_step(name="Late failure", status="F")
+    assert_same(decoded, uut)
+    assert decoded.result == "F"
+
+
+def test_many_steps_of_one_type():
+    uut = new_report(numeric_steps=500)
+    assert_same(decode_report(encode_report(uut)), uut)
+
+
+def test_columnar_steps():
+    uut = new_report(columnar=True)
+    # One row materialized into a step object, the others still columns
+    uut.root.steps[0].steps[1].measurement.value = 7.5
+    decoded = decode_report(encode_report(uut))
+    assert_same(decoded, uut)
+    decoded.root.steps[0].add_numeric_step(name="Added", value=1.0, unit="V")
+    uut.root.steps[0].add_numeric_step(name="Added", value=1.0, unit="V")
+    assert_same(decoded, uut)
+
+
+def test_uur():
+    uur = UURReport(pn="PN", sn="SN", rev="1", station_name="Station", process_code=10, location="Location",
+                    purpose="Repair", info=UURInfo(operator="Operator", processCode=500, refUUT=uuid.uuid4(),
+                                                   children=[uuid.uuid4(), uuid.uuid4()]))
+    uur.add_misc_info("Cause", "Solder")
+    decoded = decode_report(encode_report(uur))
+    assert_same(decoded, uur)
+    assert decoded.info.children == uur.info.children
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"", "bad header"),
+    (b"{}", "bad header"),
+    (b"WRB1" + b"\x00", "bad header"),
+    (MAGIC + b"\xff", "Unknown tag"),
+    (MAGIC + b"\x00", "not a report"),
+    (MAGIC + b"\x0b\x00\x06\x09os:system", "outside of package"),
+])
+def test_bad_data(data, message):
+    with pytest.raises(BinaryCodecError, match=message):
+        decode_report(data)
+
+
+def test_trailing_data():
+    with pytest.raises(BinaryCodecError, match="Trailing data"):
+        decode_report(encode_report(new_report()) + b"\x00")
+
+
+def test_every_truncation_is_an_error():
+    data = encode_report(new_report())
+    for end in range(len(MAGIC), len(data)):
+        with pytest.raises(BinaryCodecError):
+            decode_report(data[:end])
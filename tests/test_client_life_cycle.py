@@ -0,0 +1,56 @@
+"""
+WATS client life cycle: the report index is written on close() and at interpreter exit
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pywats_api.WATS import WATS
+from pywats_api.mock_server import MockWatsServer
+from pywats_api.report_index import ReportIndex
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def new_report(sn: str = "SN") -> UUTReport:
+    return UUTReport(pn="PN", sn=sn, rev="1", result="P", station_name="Station", process_code=10,
+                     location="Location", purpose="Test", info=UUTInfo(operator="Operator"))
+
+
+@pytest.fixture
+def server():
+    with MockWatsServer() as server:
+        yield server
+
+
+def indexed(path: str) -> int:
+    with ReportIndex(path) as index:
+        return len(index)
+
+
+def test_close_writes_the_index(server, tmp_path):
+    path = str(tmp_path / "index.db")
+    with WATS(server.url, "token", index_path=path) as wats:
+        assert wats.submit_report(new_report())
+        # Buffered until the batch is full or flush_interval passed
+        assert wats.index._reports
+    assert indexed(path) == 1
+    # Closing again does nothing
+    wats.close()
+
+
+def test_index_is_written_at_exit(server, tmp_path):
+    path = str(tmp_path / "index.db")
+    script = (
+        "from pywats_api.WATS import WATS\n"
+        "from tests.test_client_life_cycle import new_report\n"
+        f"wats = WATS({server.url!r}, 'token', index_path={path!r})\n"
+        "assert wats.submit_report(new_report())\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True, timeout=60)
+    assert indexed(path) == 1
@@ -0,0 +1,123 @@
+"""
+Columnar step storage: rows behave, roll up and serialize like step objects
+"""
+import copy
+import pickle
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from report.report_template import clone_model
+from report.uut.steps.boolean_step import BooleanStep
+from report.uut.steps.columnar_step_list import ColumnarStepList, StepRow
+from report.uut.steps.comp_operator import CompOp
+from report.uut.steps.numeric_step import NumericStep
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+REPORT_ID = uuid.uuid4()
+START = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+DUMPS = [{"by_alias": True, "exclude_none": True}, {}, {"exclude_unset": True}]
+
+
+def new_report(columnar: bool) -> UUTReport:
+    uut = UUTReport(pn="PN", sn="SN", rev="1", station_name="Station", process_code=10, location="Location",
+                    purpose="Test", info=UUTInfo(operator="Operator"), id=REPORT_ID, start=START)
+    if columnar:
+        uut.enable_columnar_steps()
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    sequence.add_numeric_step(name="Voltage", value=1.5, unit="V", comp_op=CompOp.GELE, low_limit=1.0, high_limit=2.0)
+    sequence.add_numeric_step(name="Logged", value=float("inf"), unit="A")
+    sequence.add_numeric_step(name="Skipped", value=0.0, status="S", group="S")
+    sequence.add_numeric_step(name="Extras", value=3, unit="mV", comp_op=CompOp.LT, high_limit=5, id=7, error_code=2,
+                              error_message="Error", reportText="Text", start="2025-01-01T10:00:00", tot_time=0.25)
+    sequence.add_boolean_step(name="Passed", status="P", report_text="Boolean text")
+    sequence.add_string_step(name="String", value="A", comp_op=CompOp.LOG)
+    sequence.add_boolean_step(name="Failed", status="F", group="C")
+    return uut
+
+
+def dumps(uut: UUTReport):
+    # JSON, since NaN values never compare equal
+    return [uut.model_dump_json(**options) for options in DUMPS]
+
+
+def test_rows_serialize_like_steps():
+    objects, rows = new_report(False), new_report(True)
+    assert isinstance(rows.root.steps[0].steps, ColumnarStepList)
+    assert rows.root.steps[0].steps.row_count == 6
+    assert dumps(rows) == dumps(objects)
+    # Serializing does not materialize the rows
+    assert rows.root.steps[0].steps.row_count == 6
+
+
+def test_rows_roll_up_like_steps():
+    objects, rows = new_report(False), new_report(True)
+    for uut in (objects, rows):
+        uut.root.steps[0].add_numeric_step(name="Late failure", value=9.0, unit="V", comp_op=CompOp.LT, high_limit=5.0, status="F")
+    assert rows.result == objects.result == "F"
+    assert rows.root.steps[0].status == "F"
+    assert dumps(rows) == dumps(objects)
+
+
+def test_append_returns_row_handles():
+    sequence = new_report(True).root.steps[0]
+    row = sequence.add_numeric_step(name="Handle", value=1.0, unit="V")
+    assert type(row) is StepRow and not row.is_materialized
+    assert (row.name, row.status, row.step_type, row.limits) == ("Handle", "P", "ET_NLT", ("LOG", None, None))
+    # Column fields are changed in place
+    row.name = "Renamed"
+    row.tot_time = 0.5
+    assert not row.is_materialized and row.name == "Renamed"
+    with pytest.raises(ValueError):
+        sequence.add_numeric_step(name="Bad", value=1.0, unit=5)
+    assert len(sequence.steps) == 8 and sequence.steps.row_count == 7
+
+
+def test_materialize():
+    sequence = new_report(True).root.steps[0]
+    steps = sequence.steps
+    row = list.__getitem__(steps, 0)
+    step = steps[0]
+    assert type(step) is NumericStep and row.is_materialized and row.materialize() is step
+    assert step.parent is sequence and step.measurement.value == 1.5
+    # The handle forwards to the step from here on
+    row.name = "Changed"
+    assert step.name == "Changed"
+    assert step in steps and steps.index(step) == 0
+    # Other attributes materialize the row
+    extras = list.__getitem__(steps, 3)
+    assert extras.error_message == "Error" and extras.is_materialized
+    steps.materialize_all()
+    assert steps.row_count == 0
+    assert all(not isinstance(item, StepRow) for item in steps)
+    assert [type(item) for item in steps][-1] is BooleanStep
+
+
+def test_materialized_rows_serialize_like_steps():
+    objects, rows = new_report(False), new_report(True)
+    for uut in (objects, rows):
+        uut.root.steps[0].steps[0].measurement.value = 1.75
+    rows.root.steps[0].steps.materialize_all()
+    assert dumps(rows) == dumps(objects)
+
+
+def test_copies():
+    uut = new_report(True)
+    uut.root.steps[0].steps[1].name = "Materialized"
+    clone = clone_model(uut)
+    steps = clone.root.steps[0].steps
+    assert isinstance(steps, ColumnarStepList) and steps.row_count == 5
+    assert dumps(clone) == dumps(uut)
+    steps[0].name = "Changed in the clone"
+    assert uut.root.steps[0].steps[0].name == "Voltage"
+    for other in (copy.deepcopy(uut), pickle.loads(pickle.dumps(uut))):
+        assert dumps(other) == dumps(uut)
+
+
+def test_loaded_report_uses_step_objects():
+    uut = new_report(True)
+    loaded = UUTReport.model_validate_json(uut.model_dump_json(by_alias=True, exclude_none=True))
+    assert not isinstance(loaded.root.steps[0].steps, ColumnarStepList)
+    assert loaded.model_dump_json(by_alias=True, exclude_none=True) == uut.model_dump_json(by_alias=True, exclude_none=True)
@@ -0,0 +1,99 @@
+"""
+Converter registry: format sniffing, converter order and the replayed stream
+"""
+import io
+
+import pytest
+
+from benchmarks import corpus
+from converters import atml_converter, teststand_xml_converter
+from converters.converter_base import SNIFF_SIZE, ReplayStream, ReportConverter, sniff_xml
+from converters.converter_registry import ConverterRegistry, default_registry
+
+
+class RecordingConverter(ReportConverter):
+    """ Accepts documents with root element ROOT and returns what it read """
+    ROOT = "Results"
+
+    def __init__(self, args=None):
+        self.args = args
+
+    @classmethod
+    def can_convert(cls, sniff):
+        return sniff.root_tag == cls.ROOT
+
+    def convert(self, file_stream):
+        yield file_stream.read()
+
+
+class OtherRecordingConverter(RecordingConverter):
+    pass
+
+
+def test_sniff_namespace_and_tags():
+    sniff = sniff_xml(b'<?xml version="1.0"?><tr:TestResults xmlns:tr="urn:results"><tr:UUT/><Extra/></tr:TestResults>')
+    assert (sniff.root_tag, sniff.namespace, sniff.tags) == ("TestResults", "urn:results", ["TestResults", "UUT", "Extra"])
+    assert sniff_xml(b"<Reports><Report/></Reports>").namespace is None
+
+
+def test_sniff_teststand_stylesheet():
+    sniff = sniff_xml(b'<?xml version="1.0"?>\n<?xml:stylesheet type="text/xsl" href="report.xsl"?>\n<Reports><Report Type="UUT">')
+    assert (sniff.root_tag, sniff.tags) == ("Reports", ["Reports", "Report"])
+
+
+def test_sniff_badly_formed_head():
+    sniff = sniff_xml(b'<tr:TestResults xmlns:tr="urn:results" a="&bad;"><tr:UUT><Name>\xff\xfe</Name>')
+    assert (sniff.root_tag, sniff.namespace) == ("TestResults", "urn:results")
+    assert sniff.tags[:2] == ["TestResults", "UUT"]
+    assert sniff_xml(b"not xml").root_tag is None
+
+
+def test_first_registered_converter_wins():
+    registry = ConverterRegistry({"operator": "op"})
+    registry.register(RecordingConverter)
+    registry.register(OtherRecordingConverter)
+    converter, _stream, sniff = registry.find_converter(io.BytesIO(b"<Results/>"))
+    assert type(converter) is RecordingConverter and sniff.root_tag == "Results"
+    assert converter.args == {"operator": "op"}
+    # Ties go to a converter registered with first=True
+    registry.register(OtherRecordingConverter, first=True)
+    assert registry.converter_types == [OtherRecordingConverter, RecordingConverter, OtherRecordingConverter]
+    assert type(registry.find_converter(io.BytesIO(b"<Results/>"))[0]) is OtherRecordingConverter
+
+
+def test_converter_instances_are_reused():
+    registry = ConverterRegistry()
+    registry.register(RecordingConverter)
+    first = registry.find_converter(io.BytesIO(b"<Results/>"))[0]
+    assert registry.find_converter(io.BytesIO(b"<Results/>"))[0] is first
+
+
+def test_no_converter():
+    registry = default_registry()
+    with pytest.raises(ValueError, match="root element 'Unknown'"):
+        registry.find_converter(io.BytesIO(b"<Unknown/>"))
+
+
+def test_converter_reads_the_whole_stream():
+    registry = ConverterRegistry()
+    registry.register(RecordingConverter)
+    document = b"<Results>" + b"<Value>1</Value>" * SNIFF_SIZE + b"</Results>"
+    assert registry.convert_report(io.BytesIO(document)) == document
+    assert registry.convert_report(io.StringIO(document.decode())) == document
+
+
+def test_replay_stream():
+    stream = ReplayStream(b"head", io.BytesIO(b"-rest"))
+    assert stream.read(2) == b"he"
+    assert stream.read(4) == b"ad-r"
+    assert stream.read() == b"est"
+    assert stream.read(1) == b""
+
+
+def test_default_registry_sniffs_shipped_formats():
+    registry = default_registry()
+    atml_document = corpus.atml(steps=2)
+    teststand_document = corpus.teststand_xml(steps=2)
+    assert isinstance(registry.find_converter(io.BytesIO(atml_document))[0], atml_converter.ATMLConverter)
+    assert isinstance(registry.find_converter(io.BytesIO(teststand_document))[0], teststand_xml_converter.TestStandXMLConverter)
+    assert registry.convert_report(io.BytesIO(atml_document)).sn == "SN0000"
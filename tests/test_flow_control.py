@@ -0,0 +1,110 @@
+"""
+Flow control on a simulated clock: the concurrency limit backs off and recovers, Retry-After pauses, timeouts
+"""
+import pytest
+
+from pywats_api import flow_control
+from pywats_api.flow_control import FlowControl, FlowControlTimeout
+
+
+class FakeClock:
+    """ Stands in for the time module; sleep() advances the clock at once """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(flow_control, "time", clock)
+    return clock
+
+
+def request(flow: FlowControl, clock: FakeClock, status_code: int, retry_after=None, latency: float = 0.01):
+    with flow.permit() as permit:
+        clock.now += latency
+        permit.record(status_code, retry_after)
+
+
+def test_limit_shrinks_on_overload(clock):
+    flow = FlowControl(initial_concurrency=16, max_concurrency=16)
+    request(flow, clock, 503)
+    assert flow.concurrency.limit == 8
+    request(flow, clock, 429)
+    assert flow.concurrency.limit == 4
+    with pytest.raises(OSError):
+        with flow.permit():
+            raise OSError("connection reset")
+    assert flow.concurrency.limit == 2
+    # 4xx other than 429 come from a working server
+    request(flow, clock, 400)
+    assert flow.concurrency.limit == 2
+    assert flow.snapshot()["overloaded"] == 3
+
+
+def test_limit_shrinks_once_per_round_trip(clock):
+    flow = FlowControl(initial_concurrency=16, max_concurrency=16)
+    permits = [flow.permit() for _ in range(4)]
+    for permit in permits:
+        permit.__enter__().record(503)
+    clock.now += 0.01
+    for permit in permits:
+        permit.__exit__(None, None, None)
+    assert flow.concurrency.limit == 8
+
+
+def test_limit_grows_on_success(clock):
+    flow = FlowControl(initial_concurrency=4, max_concurrency=6)
+    for _ in range(5):
+        request(flow, clock, 200)
+    assert flow.concurrency.limit == 5
+    for _ in range(20):
+        request(flow, clock, 200)
+    assert flow.concurrency.limit == 6
+
+
+def test_slow_responses_count_as_overload(clock):
+    flow = FlowControl(initial_concurrency=8, max_concurrency=8, latency_tolerance=2.0, min_latency=0.05)
+    request(flow, clock, 200, latency=0.1)
+    request(flow, clock, 200, latency=0.5)
+    assert flow.concurrency.limit == 4
+
+
+def test_retry_after_pauses_requests(clock):
+    flow = FlowControl()
+    request(flow, clock, 429, retry_after="2")
+    with pytest.raises(FlowControlTimeout):
+        flow.permit(timeout=1).__enter__()
+    assert clock.slept == 0
+    request(flow, clock, 200)
+    assert clock.slept == pytest.approx(2.0)
+
+
+def test_rate_limit(clock):
+    flow = FlowControl(rate=2, burst=2)
+    for _ in range(4):
+        request(flow, clock, 200, latency=0)
+    # Two at once, then one every 0.5 s
+    assert clock.slept == pytest.approx(1.0)
+    with pytest.raises(FlowControlTimeout):
+        flow.permit(timeout=0.1).__enter__()
+    assert flow.concurrency.in_flight == 0
+    assert flow.snapshot()["timeouts"] == 1
+
+
+def test_no_free_slot(clock):
+    flow = FlowControl(initial_concurrency=1, max_concurrency=1)
+    with flow.permit():
+        with pytest.raises(FlowControlTimeout):
+            flow.permit(timeout=0).__enter__()
+    request(flow, clock, 200)
+    assert flow.snapshot()["timeouts"] == 1
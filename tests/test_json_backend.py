@@ -0,0 +1,63 @@
+"""
+JSON backends: the orjson backend writes and reads the same JSON values as the stdlib backend
+"""
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from pywats_api.json_backend import JsonBackend, OrjsonBackend, check_parity, get_backend
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+pytest.importorskip("orjson")
+
+VALUES = [
+    {"nan": float("nan"), "inf": float("inf"), "-inf": float("-inf"), "nested": [[float("nan")], (1.5, float("inf"))]},
+    {"naive": datetime(2025, 2, 25, 10, 20, 30, 123456), "utc": datetime(2025, 2, 25, 10, 20, 30, tzinfo=timezone.utc),
+     "offset": datetime(2025, 2, 25, 10, 20, 30, tzinfo=timezone(timedelta(hours=1))), "date": date(2025, 2, 25)},
+    {"id": UUID("12345678-1234-5678-1234-567812345678"), "ids": [UUID(int=0)]},
+    {"text": "Målt spenning – 5 µV ✓", "emoji": "🔋", "control": "tab\tnewline\n\"quote\""},
+    [0.1 + 0.2, 1e300, -0.0, 2 ** 63, True, None],
+]
+
+
+def new_report() -> UUTReport:
+    uut = UUTReport(pn="PN", sn="SN-ø", rev="1", result="P", station_name="Station", process_code=10,
+                    location="Location", purpose="Test", info=UUTInfo(operator="Operatør"))
+    uut.root.add_numeric_step(name="NaN", value=float("nan"), unit="V")
+    uut.root.add_numeric_step(name="Inf", value=float("inf"), unit="µV")
+    return uut
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_dumps_and_loads_match(value):
+    assert check_parity([value], OrjsonBackend()) == []
+
+
+def test_non_finite_floats_are_strings():
+    data = {"values": [float("nan"), float("inf"), float("-inf")]}
+    for backend in (JsonBackend(), OrjsonBackend()):
+        assert backend.loads(backend.dumps(data)) == {"values": ["NaN", "Infinity", "-Infinity"]}
+
+
+def test_datetimes_and_uuids_are_written_like_pydantic():
+    value = {"at": datetime(2025, 2, 25, 10, 20, 30, tzinfo=timezone.utc), "id": UUID(int=1)}
+    expected = {"at": "2025-02-25T10:20:30Z", "id": "00000000-0000-0000-0000-000000000001"}
+    for backend in (JsonBackend(), OrjsonBackend()):
+        assert backend.loads(backend.dumps(value)) == expected
+
+
+def test_non_ascii_text_is_utf8():
+    for backend in (JsonBackend(), OrjsonBackend()):
+        data = backend.dumps({"text": "µV ✓"})
+        assert "µV ✓".encode("utf-8") in data
+
+
+def test_report_round_trip():
+    uut = new_report()
+    assert check_parity([uut], OrjsonBackend()) == []
+    backend = get_backend("orjson")
+    data = backend.encode_report(uut)
+    assert data == JsonBackend().encode_report(uut)
+    assert backend.decode_report(data).info.operator == "Operatør"
@@ -0,0 +1,107 @@
+"""
+Mock WATS server: endpoints, throttling, injected errors and payload validation
+"""
+import asyncio
+import json
+import uuid
+
+import pytest
+import requests
+
+from pywats_api.mock_server import VALIDATE_FULL, VALIDATE_JSON, VALIDATE_NONE, MockWatsServer
+from tests.test_client_life_cycle import new_report
+
+SUBMIT = "/api/Report/WSJF"
+
+
+def report_json() -> bytes:
+    return new_report().model_dump_json(by_alias=True, exclude_none=True).encode()
+
+
+def test_submit_and_download():
+    with MockWatsServer(token="secret") as server:
+        headers = {"Authorization": "Basic secret"}
+        data = report_json()
+        response = requests.post(server.url + SUBMIT, data=data, headers=headers)
+        report_id = json.loads(data)["id"]
+        assert response.status_code == 200 and response.json() == {"id": report_id}
+        assert requests.get(f"{server.url}{SUBMIT}/{report_id.upper()}", headers=headers).content == data
+        processes = requests.get(server.url + "/api/internal/Process/GetProcesses", headers=headers).json()
+        assert processes == server.processes
+        assert requests.get(f"{server.url}{SUBMIT}/{uuid.uuid4()}", headers=headers).status_code == 404
+        assert requests.get(server.url + SUBMIT, headers=headers).status_code == 405
+        assert requests.get(server.url + "/api/Unknown", headers=headers).status_code == 404
+        assert requests.post(server.url + SUBMIT, data=data, headers={"Authorization": "Basic wrong"}).status_code == 401
+        assert (server.stats.requests, server.stats.reports, server.stats.received_bytes) == (7, 1, 2 * len(data))
+        assert server.stats.by_status == {200: 3, 404: 2, 405: 1, 401: 1}
+
+
+def test_rate_limit():
+    with MockWatsServer(rate_limit=1, burst=2) as server:
+        statuses = [requests.get(server.url + "/api/internal/Process/GetProcesses") for _ in range(4)]
+        assert [response.status_code for response in statuses] == [200, 200, 429, 429]
+        assert statuses[2].headers["Retry-After"] == "1"
+        assert server.stats.by_status[429] == 2
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 0.25, 1.0])
+def test_error_rate(error_rate):
+    with MockWatsServer(error_rate=error_rate, error_status=502, seed=1) as server:
+        with requests.Session() as session:
+            statuses = [session.post(server.url + SUBMIT, data=report_json()).status_code for _ in range(200)]
+        errors = statuses.count(502)
+        assert errors + statuses.count(200) == 200
+        assert errors == pytest.approx(200 * error_rate, abs=25)
+        assert server.stats.reports == 200 - errors
+
+
+def test_random_errors_repeat_with_a_seed():
+    runs = []
+    for _ in range(2):
+        with MockWatsServer(error_rate=0.5, seed=7) as server:
+            with requests.Session() as session:
+                runs.append([session.get(server.url + "/api/internal/Process/GetProcesses").status_code for _ in range(20)])
+    assert runs[0] == runs[1] and 503 in runs[0] and 200 in runs[0]
+
+
+@pytest.mark.parametrize("validation, body, status", [
+    (VALIDATE_NONE, b"not json", 200),
+    (VALIDATE_JSON, b"not json", 400),
+    (VALIDATE_JSON, b"[]", 400),
+    (VALIDATE_JSON, b'{"id": "1", "pn": "PN"}', 400),
+    (VALIDATE_JSON, b'{"id": "1", "pn": "PN", "sn": "SN", "rev": "1", "processCode": 10}', 200),
+    (VALIDATE_FULL, b'{"id": "1", "pn": "PN", "sn": "SN", "rev": "1", "processCode": 10}', 400),
+    (VALIDATE_FULL, None, 200),
+])
+def test_validation(validation, body, status):
+    with MockWatsServer(validation=validation) as server:
+        response = requests.post(server.url + SUBMIT, data=report_json() if body is None else body)
+        assert response.status_code == status
+        if status == 400:
+            assert response.json()["message"]
+            assert server.stats.reports == 0
+
+
+def test_reports_are_not_kept():
+    with MockWatsServer(keep_reports=False) as server:
+        data = report_json()
+        assert requests.post(server.url + SUBMIT, data=data).status_code == 200
+        assert not server.reports
+        assert requests.get(f"{server.url}{SUBMIT}/{json.loads(data)['id']}").status_code == 404
+
+
+def test_unknown_validation():
+    with pytest.raises(ValueError, match="Unknown validation"):
+        MockWatsServer(validation="strict")
+
+
+def test_start_in_a_running_event_loop():
+    async def run():
+        server = await MockWatsServer().start_async()
+        try:
+            response = await asyncio.to_thread(requests.get, server.url + "/api/internal/Process/GetProcesses")
+        finally:
+            await server.stop_async()
+        return response.status_code
+
+    assert asyncio.run(run()) == 200
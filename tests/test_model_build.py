@@ -0,0 +1,102 @@
+"""
+Deferred schema builds: a fresh interpreter validates reports whichever model is used first, and
+from several threads at once
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from report.uut.steps.comp_operator import CompOp
+from tests.test_client_life_cycle import new_report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter; REPORT is the path of a report's JSON
+CHECK_REPORT = """
+from report.uut.uut_report import UUTReport
+from report.uut.validation import validate_report
+from report.wats_base import _models
+
+def check_report():
+    with open(REPORT, "rb") as file:
+        data = file.read()
+    report = UUTReport.model_validate_json(data)
+    assert validate_report(report) == []
+    assert report.model_dump_json(by_alias=True, exclude_none=True).encode() == data
+    return report
+"""
+
+LEAF_FIRST = CHECK_REPORT + """
+from report.uut.steps.numeric_step import NumericMeasurement
+assert not any(model.__pydantic_complete__ for model in _models)
+measurement = NumericMeasurement(value=1.5, unit="V", status="P")
+assert measurement.value == 1.5
+assert all(model.__pydantic_complete__ for model in _models)
+check_report()
+"""
+
+THREADS_FIRST = CHECK_REPORT + """
+import threading
+from report.uut.steps.boolean_step import BooleanStep
+from report.uut.steps.numeric_step import NumericMeasurement, NumericStep
+from report.uut.steps.sequence_call import SequenceCall
+from report.uut.steps.string_step import StringMeasurement
+
+FIRST_USES = [
+    lambda: NumericMeasurement(value=1.0, unit="V", status="P"),
+    lambda: StringMeasurement(value="ABC", status="P"),
+    lambda: BooleanStep(name="Step", status="P"),
+    lambda: NumericStep.model_validate({"name": "Step", "numericMeas": [{"value": 1.0, "unit": "V", "status": "P"}]}),
+    lambda: SequenceCall(name="Sequence").add_numeric_step(name="Step", value=1.0, unit="V"),
+    check_report,
+] * 2
+barrier = threading.Barrier(len(FIRST_USES))
+errors = []
+
+def run(first_use):
+    try:
+        barrier.wait()
+        first_use()
+        check_report()
+    except BaseException as err:
+        errors.append(repr(err))
+
+threads = [threading.Thread(target=run, args=(first_use,)) for first_use in FIRST_USES]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+assert errors == [], errors
+assert all(model.__pydantic_complete__ for model in _models)
+"""
+
+
+@pytest.fixture
+def report_path(tmp_path):
+    uut = new_report()
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    sequence.add_numeric_step(name="Numeric", value=1.5, unit="V", comp_op=CompOp.GELE, low_limit=0.0, high_limit=2.0)
+    sequence.add_string_step(name="String", value="ABC", comp_op=CompOp.IGNORECASE, limit="abc")
+    sequence.add_boolean_step(name="Boolean", status="F")
+    multi = sequence.add_multi_numeric_step(name="Multi")
+    multi.add_measurement(name="First", value=1.0, unit="V", comp_op=CompOp.LOG)
+    multi.add_measurement(name="Second", value=2.0, unit="V", comp_op=CompOp.LOG)
+    path = tmp_path / "report.json"
+    path.write_text(uut.model_dump_json(by_alias=True, exclude_none=True), encoding="utf-8")
+    return str(path)
+
+
+def run_fresh(script: str, report_path: str):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, "-c", f"REPORT = {report_path!r}\n" + script], cwd=ROOT, env=env,
+                   check=True, timeout=120)
+
+
+def test_leaf_model_used_first(report_path):
+    run_fresh(LEAF_FIRST, report_path)
+
+
+def test_models_used_first_by_several_threads(report_path):
+    run_fresh(THREADS_FIRST, report_path)
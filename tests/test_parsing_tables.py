@@ -0,0 +1,49 @@
+"""
+Converter parsing helpers: timestamps and timezones
+"""
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from converters.parsing_tables import localize, parse_timestamp, resolve_timezone
+
+TIMESTAMPS = ["2025-01-15T08:00:00", "2025-03-30T01:30:00", "2025-03-30T03:30:00", "2025-07-01T12:00:00.250000",
+              "2025-10-26T01:59:00", "2025-10-26T03:00:00"]
+
+
+@pytest.fixture(params=["Europe/Oslo", "America/New_York", "UTC"])
+def local_zone(request, monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset() is not available")
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2025-02-25T10:20:30.5") == datetime(2025, 2, 25, 10, 20, 30, 500000)
+    assert parse_timestamp("25.02.2025 10:20", fmt="%d.%m.%Y %H:%M") == datetime(2025, 2, 25, 10, 20)
+
+
+@pytest.mark.parametrize("value", TIMESTAMPS)
+def test_local_timezone_uses_the_offset_of_the_date(local_zone, value):
+    naive = datetime.fromisoformat(value)
+    aware = localize(naive, resolve_timezone(None))
+    assert aware.replace(tzinfo=None) == naive
+    assert aware.utcoffset() == ZoneInfo(local_zone).utcoffset(naive)
+
+
+@pytest.mark.parametrize("value", TIMESTAMPS)
+def test_named_timezone(value):
+    zone = resolve_timezone("Europe/Oslo")
+    naive = datetime.fromisoformat(value)
+    assert localize(naive, zone) == naive.replace(tzinfo=ZoneInfo("Europe/Oslo"))
+    assert localize(naive, zone).tzinfo is zone
+
+
+def test_invalid_timezone_falls_back_to_local():
+    assert resolve_timezone("Not/A_Zone") is None
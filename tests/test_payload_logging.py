@@ -0,0 +1,54 @@
+"""
+Request and response bodies go to their own logger, which is off unless the application turns it on
+"""
+import logging
+
+import pytest
+
+from pywats_api.WATS import WATS, payload_logger
+from pywats_api.mock_server import MockWatsServer
+from tests.test_client_life_cycle import new_report
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def names(self) -> set:
+        return {record.name for record in self.records}
+
+
+@pytest.fixture
+def root_handler():
+    # The application's handler on the root logger, at DEBUG
+    root = logging.getLogger()
+    handler, level = Records(), root.level
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    yield handler
+    root.removeHandler(handler)
+    root.setLevel(level)
+
+
+@pytest.fixture
+def wats():
+    with MockWatsServer() as server, WATS(server.url, "token") as wats:
+        yield wats
+
+
+def test_payload_is_not_logged_by_default(wats, root_handler):
+    assert payload_logger.level == logging.NOTSET
+    assert wats.submit_report(new_report())
+    assert "pywats_api.WATS" in root_handler.names()
+    assert payload_logger.name not in root_handler.names()
+
+
+def test_payload_logging_can_be_enabled(wats, root_handler, monkeypatch):
+    monkeypatch.setattr(payload_logger, "propagate", True)
+    assert wats.submit_report(new_report())
+    messages = [record.getMessage() for record in root_handler.records if record.name == payload_logger.name]
+    assert len(messages) == 1 and messages[0].startswith("Request body: {")
@@ -0,0 +1,77 @@
+"""
+Processing journal post-process moves: crash safe, never overwriting a different file
+"""
+import errno
+import os
+
+import pytest
+
+from pywats_api import processing_journal
+from pywats_api.processing_journal import atomic_move
+
+
+def write(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_move_and_repeat(tmp_path):
+    src = write(tmp_path / "report.xml", b"report")
+    done = str(tmp_path / "Done")
+    dst = atomic_move(src, done)
+    assert not os.path.exists(src) and read(dst) == b"report"
+    # Repeating after a crash finds the file already moved
+    assert atomic_move(src, done) == dst
+
+
+def test_different_file_in_done_is_kept(tmp_path):
+    done = tmp_path / "Done"
+    done.mkdir()
+    write(done / "report.xml", b"first")
+    dst = atomic_move(write(tmp_path / "report.xml", b"second"), str(done))
+    assert os.path.basename(dst) == "report (2).xml"
+    assert (read(done / "report.xml"), read(dst)) == (b"first", b"second")
+
+
+def test_identical_file_in_done_finishes_the_move(tmp_path):
+    done = tmp_path / "Done"
+    done.mkdir()
+    write(done / "report.xml", b"report")
+    src = write(tmp_path / "report.xml", b"report")
+    assert atomic_move(src, str(done)) == str(done / "report.xml")
+    assert not os.path.exists(src) and os.listdir(done) == ["report.xml"]
+
+
+def fail_replace(monkeypatch, code: int):
+    replace = os.replace
+    calls = []
+
+    def patched(src, dst):
+        calls.append(dst)
+        if len(calls) == 1:
+            raise OSError(code, os.strerror(code))
+        replace(src, dst)
+
+    monkeypatch.setattr(processing_journal.os, "replace", patched)
+
+
+def test_copy_between_file_systems(tmp_path, monkeypatch):
+    fail_replace(monkeypatch, errno.EXDEV)
+    src = write(tmp_path / "report.xml", b"report")
+    dst = atomic_move(src, str(tmp_path / "Done"))
+    assert not os.path.exists(src) and read(dst) == b"report"
+    assert os.listdir(tmp_path / "Done") == ["report.xml"]
+
+
+def test_other_errors_are_raised(tmp_path, monkeypatch):
+    fail_replace(monkeypatch, errno.EACCES)
+    src = write(tmp_path / "report.xml", b"report")
+    with pytest.raises(PermissionError):
+        atomic_move(src, str(tmp_path / "Done"))
+    assert read(src) == b"report"
@@ -0,0 +1,79 @@
+"""
+Report cache: LRU by use, max age by storage time, invalidated when the client submits a report again
+"""
+import os
+import threading
+import time
+from uuid import uuid4
+
+from pywats_api.WATS import WATS
+from pywats_api.mock_server import MockWatsServer
+from pywats_api.report_cache import ReportCache
+from tests.test_client_life_cycle import new_report
+
+
+def test_least_recently_used_is_evicted_after_restart(tmp_path):
+    ids = [uuid4() for _ in range(3)]
+    cache = ReportCache(str(tmp_path), max_bytes=30)
+    for number, report_id in enumerate(ids):
+        cache.put(report_id, b"x" * 10)
+        os.utime(cache._path(cache.key(report_id)), (1000 + number, 1000 + number))
+    assert cache.get(ids[0]) == b"x" * 10
+
+    cache = ReportCache(str(tmp_path), max_bytes=30)
+    cache.put(uuid4(), b"x" * 10)
+    assert ids[0] in cache and ids[1] not in cache and ids[2] in cache
+
+
+def test_max_age(tmp_path):
+    report_id = uuid4()
+    cache = ReportCache(str(tmp_path), max_age=60)
+    cache.put(report_id, b"{}")
+    assert cache.get(report_id) == b"{}"
+    # Use does not renew the age, also not after a restart
+    path = cache._path(cache.key(report_id))
+    os.utime(path, (time.time(), time.time() - 120))
+    cache = ReportCache(str(tmp_path), max_age=60)
+    assert cache.get(report_id) is None
+    assert not os.path.exists(path) and len(cache) == 0
+
+
+def test_invalidate(tmp_path):
+    report_id = uuid4()
+    cache = ReportCache(str(tmp_path))
+    cache.put(report_id, b"{}")
+    cache.invalidate(str(report_id))
+    assert cache.get(report_id) is None and cache.size == 0
+
+
+def test_submit_invalidates_the_cached_report(tmp_path):
+    with MockWatsServer() as server, WATS(server.url, "token", cache_dir=str(tmp_path)) as wats:
+        report = new_report()
+        assert wats.submit_report(report)
+        assert wats.load_report_from_server(str(report.id)).sn == "SN"
+        assert report.id in wats.cache
+        report.sn = "SN2"
+        assert wats.submit_report(report)
+        assert report.id not in wats.cache
+        assert wats.load_report_from_server(str(report.id)).sn == "SN2"
+
+
+def test_threads_have_their_own_session():
+    with MockWatsServer() as server, WATS(server.url, "token") as wats:
+        reports = [new_report(f"SN{number}") for number in range(8)]
+        for report in reports:
+            assert wats.submit_report(report)
+        sessions = set()
+        record = wats._thread_session
+
+        def thread_session():
+            session = record()
+            sessions.add((threading.get_ident(), id(session)))
+            return session
+
+        wats._thread_session = thread_session
+        loaded = wats.load_reports([str(report.id) for report in reports], max_concurrency=4)
+        assert [report.sn for report in loaded] == [report.sn for report in reports]
+        threads = {thread for thread, _session in sessions}
+        assert len(threads) > 1 and len({session for _thread, session in sessions}) == len(threads)
+        assert wats.session is record()
@@ -0,0 +1,64 @@
+"""
+Report header projection: header fields without the step tree, full report on first use
+"""
+import uuid
+
+import pytest
+
+from report.report_header import ReportHeader, parse_report_header
+from report.uur.uur_info import UURInfo
+from report.uur.uur_report import UURReport
+from report.uut.uut_report import UUTReport
+from tests.test_client_life_cycle import new_report
+
+
+def new_uur() -> UURReport:
+    return UURReport(pn="PN", sn="SN", rev="1", station_name="Station", process_code=10, location="Location",
+                     purpose="Repair", info=UURInfo(operator="Operator", processCode=500, refUUT=uuid.uuid4()))
+
+
+def test_uut_header():
+    uut = new_report()
+    uut.root.add_numeric_step(name="Voltage", value=1.0, unit="V", status="F")
+    uut.result = "F"
+    data = uut.model_dump_json(by_alias=True, exclude_none=True)
+    assert '"processCode"' in data and '"machineName"' in data
+    header = parse_report_header(data)
+    assert (header.id, header.type, header.pn, header.sn, header.rev) == (uut.id, "T", uut.pn, uut.sn, uut.rev)
+    assert header.process_code == uut.process_code and header.station_name == uut.station_name
+    assert header.result == "F" and header.info.operator == uut.info.operator
+    assert not header.is_loaded and header._raw is not None
+
+    report = header.report
+    assert isinstance(report, UUTReport) and header.is_loaded
+    assert header._raw is None
+    assert header.report is report
+    assert report.result == header.result
+    assert header.root is report.root
+    assert report.model_dump_json(by_alias=True, exclude_none=True) == data
+
+
+def test_uur_header():
+    uur = new_uur()
+    data = uur.model_dump_json(by_alias=True, exclude_none=True).encode()
+    header = parse_report_header(data)
+    assert header.type == "R" and header.info.processCode == 500 and header.uut_info is None
+    report = header.report
+    assert isinstance(report, UURReport)
+    assert report.result == header.result
+    assert header._raw is None
+    with pytest.raises(ValueError):
+        header.root
+
+
+def test_header_serializes_with_aliases():
+    header = parse_report_header(new_report().model_dump_json(by_alias=True))
+    dumped = header.model_dump(by_alias=True)
+    assert "processCode" in dumped and "machineName" in dumped
+    assert ReportHeader.model_validate(dumped).station_name == header.station_name
+
+
+def test_header_without_raw_json():
+    header = ReportHeader.model_validate_json(new_report().model_dump_json(by_alias=True))
+    with pytest.raises(ValueError, match="no raw JSON"):
+        header.report
@@ -0,0 +1,121 @@
+"""
+Local report index: batched writes, resubmitted reports, filters and UTC time ranges
+"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from pywats_api.report_index import ReportIndex, failed_step_paths
+from report.uur.uur_info import UURInfo
+from report.uur.uur_report import UURReport
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+OSLO = ZoneInfo("Europe/Oslo")
+
+
+def new_report(sn: str = "SN", start: datetime = datetime(2025, 6, 1, 12, tzinfo=timezone.utc), fixture_id: str = "Fixture",
+               failed: bool = False) -> UUTReport:
+    uut = UUTReport(pn="PN", sn=sn, rev="1", station_name="Station", process_code=10, location="Location",
+                    purpose="Test", start=start, info=UUTInfo(operator="Operator", fixture_id=fixture_id))
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    sequence.add_numeric_step(name="Voltage", value=1.0, unit="V", status="F" if failed else "P")
+    sequence.add_boolean_step(name="Boolean", status="P")
+    return uut
+
+
+def stored(path) -> int:
+    # Rows written to the database, read without flushing the index
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+def test_reports_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "index.db")
+    with ReportIndex(path, batch_size=3, flush_interval=3600) as index:
+        index.add(new_report("SN1"))
+        index.add(new_report("SN2"))
+        assert stored(path) == 0
+        index.add(new_report("SN3"))
+        assert stored(path) == 3
+        index.add(new_report("SN4"))
+        assert stored(path) == 3
+        # Queries see the buffered report
+        assert len(index) == 4
+        assert stored(path) == 4
+    with ReportIndex(path, flush_interval=0) as index:
+        index.add(new_report("SN5"))
+        assert stored(path) == 5
+
+
+def test_close_writes_the_buffer(tmp_path):
+    path = str(tmp_path / "index.db")
+    index = ReportIndex(path, flush_interval=3600)
+    index.add(new_report())
+    index.close()
+    index.close()
+    assert stored(path) == 1
+
+
+def test_resubmitted_report_replaces_its_entry(tmp_path):
+    uut = new_report(failed=True)
+    with ReportIndex(str(tmp_path / "index.db"), flush_interval=3600) as index:
+        index.add(uut)
+        assert index.failed_steps(uut.id) == ["StepName/Sequence", "StepName/Sequence/Voltage"]
+        assert index.query()[0].result == "F"
+        retest = new_report()
+        retest.id = uut.id
+        index.add(retest)
+        assert len(index) == 1
+        assert index.query()[0].result == "P"
+        assert index.failed_steps(uut.id) == []
+        # Both in the same batch
+        index.add(uut)
+        index.add(retest)
+        assert len(index) == 1
+        assert index.failed_steps(uut.id) == []
+
+
+def test_filters(tmp_path):
+    with ReportIndex(str(tmp_path / "index.db")) as index:
+        index.add(new_report("SN1", fixture_id="A", failed=True))
+        index.add(new_report("SN2", fixture_id="A"))
+        index.add(new_report("SN3", fixture_id="B", failed=True))
+        index.add(UURReport(pn="PN", sn="SN1", rev="1", station_name="Station", process_code=10, location="Location",
+                            purpose="Repair", info=UURInfo(operator="Operator")))
+        assert {report.sn for report in index.query(fixture_id="A", result="F")} == {"SN1"}
+        assert {report.sn for report in index.query(failed_step="%/Voltage")} == {"SN1", "SN3"}
+        assert [report.type for report in index.query(sn="SN1", type="R")] == ["R"]
+        assert len(index.query(limit=2)) == 2
+        with pytest.raises(ValueError, match="Unknown filter"):
+            index.query(location="Location")
+
+
+def test_time_range_in_utc(tmp_path):
+    starts = [datetime(2025, 3, 30, 0, 30, tzinfo=timezone.utc),   # 01:30 in Oslo (CET)
+              datetime(2025, 3, 30, 3, 30, tzinfo=OSLO),           # 01:30 UTC (CEST)
+              datetime(2025, 3, 30, 4, 0, tzinfo=timezone(timedelta(hours=-5)))]  # 09:00 UTC
+    with ReportIndex(str(tmp_path / "index.db")) as index:
+        for number, start in enumerate(starts):
+            index.add(new_report(f"SN{number}", start=start))
+        reports = index.query()
+        # Newest first, stored in UTC
+        assert [report.sn for report in reports] == ["SN2", "SN1", "SN0"]
+        assert reports[0].start == "2025-03-30T09:00:00+00:00"
+        # Bounds in any timezone: since is inclusive, until exclusive
+        since = datetime(2025, 3, 30, 3, 30, tzinfo=OSLO)
+        assert {report.sn for report in index.query(since=since)} == {"SN1", "SN2"}
+        assert {report.sn for report in index.query(until=since)} == {"SN0"}
+        assert {report.sn for report in index.query(since=datetime(2025, 3, 30, 1, tzinfo=timezone.utc),
+                                                    until=datetime(2025, 3, 30, 4, 0, tzinfo=timezone(timedelta(hours=-5))))} == {"SN1"}
+
+
+def test_failed_steps_of_columnar_rows_are_not_materialized():
+    uut = new_report(failed=True)
+    uut.enable_columnar_steps()
+    uut.root.steps[0].steps[0].status = "P"
+    row = uut.root.add_sequence_call(name="Columnar").add_numeric_step(name="Current", value=2.0, unit="A", status="F")
+    assert failed_step_paths(uut.root) == ["StepName/Columnar", "StepName/Columnar/Current"]
+    assert not row.is_materialized
@@ -0,0 +1,99 @@
+"""
+WATS client while the server is down: start with a spool, fail fast through the circuit breaker
+"""
+import functools
+import socket
+
+import pytest
+import requests
+
+from pywats_api.WATS import WATS
+from pywats_api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from pywats_api.flow_control import FlowControl, FlowControlTimeout
+from pywats_api.mock_server import MockWatsServer
+from tests.test_client_life_cycle import new_report
+
+
+@pytest.fixture
+def down_url():
+    # A port nobody listens on
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_start_without_spool_fails(down_url):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        WATS(down_url, "token")
+
+
+def test_start_with_spool(down_url, tmp_path):
+    with WATS(down_url, "token", spool_dir=str(tmp_path / "spool")) as wats:
+        assert wats.processes is None
+        assert not wats.submit_report(new_report())
+        assert len(wats.spool) == 1
+        with pytest.raises(requests.exceptions.ConnectionError):
+            wats.get_local_processes()
+
+
+def test_process_list_synchronized_later(tmp_path):
+    with MockWatsServer() as server:
+        with WATS(server.url, "token", spool_dir=str(tmp_path / "spool")) as wats:
+            wats.processes = None
+            assert wats.get_local_processes() == server.processes
+
+
+def test_downloads_go_through_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with MockWatsServer() as server:
+        with WATS(server.url, "token", circuit_breaker=breaker) as wats:
+            report = new_report()
+            assert wats.submit_report(report)
+            assert wats.load_report_from_server(str(report.id)).sn == "SN"
+            breaker.record_failure()
+            requests_before = server.stats.requests
+            with pytest.raises(CircuitOpenError):
+                wats.load_report_from_server(str(report.id))
+            with pytest.raises(CircuitOpenError):
+                wats.sync_local_processes_with_server()
+            assert server.stats.requests == requests_before
+
+
+def test_connection_errors_open_the_circuit(down_url, tmp_path):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    # The process list sync at start fails once
+    with WATS(down_url, "token", circuit_breaker=breaker, spool_dir=str(tmp_path / "spool")) as wats:
+        assert breaker.state == "closed"
+        with pytest.raises(requests.exceptions.ConnectionError):
+            wats.get_local_processes()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            wats.get_local_processes()
+
+
+def test_flow_control_timeout_is_not_a_server_failure(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    flow = FlowControl(initial_concurrency=1, max_concurrency=1)
+    with MockWatsServer() as server:
+        with WATS(server.url, "token", circuit_breaker=breaker, flow_control=flow) as wats:
+            monkeypatch.setattr(flow, "permit", functools.partial(FlowControl.permit, flow, timeout=0.01))
+            with flow.permit():
+                with pytest.raises(FlowControlTimeout):
+                    wats.submit_report(new_report())
+            assert breaker.snapshot()["failures"] == 0
+            assert wats.submit_report(new_report())
+
+
+def test_local_errors_are_not_server_failures():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    with MockWatsServer() as server:
+        with WATS(server.url, "token", circuit_breaker=breaker) as wats:
+            with pytest.raises(requests.exceptions.MissingSchema):
+                wats._get("no-scheme/api/Report/Wsjf/1")
+            assert breaker.state == "closed"
+            # A half open probe that fails locally lets the next probe through
+            breaker.record_failure()
+            with pytest.raises(requests.exceptions.MissingSchema):
+                wats._get("no-scheme/api/Report/Wsjf/1")
+            assert breaker.allow()
@@ -0,0 +1,67 @@
+"""
+NumericStep, StringStep and BooleanStep: one measurement in Python, a one item list in WSJF
+"""
+import json
+
+import pytest
+
+from report.uut.steps.boolean_step import BooleanMeasurement, BooleanStep, MultiBooleanStep
+from report.uut.steps.numeric_step import NumericMeasurement, NumericStep
+from report.uut.steps.sequence_call import SequenceCall
+from report.uut.steps.string_step import StringMeasurement, StringStep
+
+MEASUREMENTS = [
+    (NumericStep, "numericMeas", NumericMeasurement(value=1.5, unit="V", status="P")),
+    (StringStep, "stringMeas", StringMeasurement(value="ABC", status="P")),
+    (BooleanStep, "booleanMeas", BooleanMeasurement(status="F")),
+]
+
+
+def same(a, b) -> bool:
+    return a.model_dump(mode="json") == b.model_dump(mode="json")
+
+
+@pytest.mark.parametrize("step_class, alias, measurement", MEASUREMENTS)
+def test_measurement_keyword(step_class, alias, measurement):
+    step = step_class(name="Step", measurement=measurement)
+    assert step.measurement == measurement
+    assert "measurement" in step.model_dump()
+
+
+@pytest.mark.parametrize("step_class, alias, measurement", MEASUREMENTS)
+def test_measurement_as_object_or_list(step_class, alias, measurement):
+    data = measurement.model_dump(by_alias=True, exclude_none=True)
+    assert same(step_class.model_validate({"name": "Step", alias: data}).measurement, measurement)
+    assert same(step_class.model_validate({"name": "Step", alias: [data]}).measurement, measurement)
+    assert step_class.model_validate({"name": "Step", alias: []}).measurement is None
+
+
+@pytest.mark.parametrize("step_class, alias, measurement", MEASUREMENTS)
+def test_measurement_serializes_as_one_item_list(step_class, alias, measurement):
+    step = step_class(name="Step", measurement=measurement)
+    data = json.loads(step.model_dump_json(by_alias=True, exclude_none=True))
+    assert data[alias] == [measurement.model_dump(mode="json", by_alias=True, exclude_none=True)]
+    assert isinstance(step.model_dump(by_alias=True)[alias], dict)
+    assert same(step_class.model_validate_json(step.model_dump_json(by_alias=True)).measurement, measurement)
+
+
+def test_multi_boolean_step_keeps_its_measurements():
+    step = MultiBooleanStep(name="Step")
+    step.add_measurement(name="First", status="P")
+    step.add_measurement(name="Second", status="F")
+    data = json.loads(step.model_dump_json(by_alias=True, exclude_none=True))
+    assert [m["name"] for m in data["booleanMeas"]] == ["First", "Second"]
+    assert [m.name for m in MultiBooleanStep.model_validate(data).measurements] == ["First", "Second"]
+
+
+@pytest.mark.parametrize("mode", ["python", "json"])
+def test_columnar_rows_dump_like_steps(mode):
+    sequences = []
+    for columnar in (False, True):
+        sequence = SequenceCall(name="Sequence")
+        if columnar:
+            sequence.enable_columnar_steps()
+        sequence.add_numeric_step(name="Numeric", value=1.5, unit="V", low_limit=0.0, high_limit=2.0, status="P")
+        sequence.add_boolean_step(name="Boolean", status="P")
+        sequences.append(sequence.model_dump(mode=mode, by_alias=True, exclude_none=True)["steps"])
+    assert sequences[0] == sequences[1]
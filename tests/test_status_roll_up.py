@@ -0,0 +1,135 @@
+"""
+Status roll-up: sequences and the report follow failing steps unless a status or result was assigned
+"""
+import io
+import json
+
+from benchmarks import corpus
+from converters import teststand_xml_converter
+from report.uut.step import status_value
+from report.uut.steps.sequence_call import SequenceCall
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+
+
+def new_report(**fields) -> UUTReport:
+    # No result given: it follows the steps
+    return UUTReport(pn="PN", sn="SN", rev="1", station_name="Station", process_code=10,
+                     location="Location", purpose="Test", info=UUTInfo(operator="Operator"), **fields)
+
+
+def test_failed_step_fails_sequence_and_report():
+    uut = new_report()
+    step = uut.root.add_boolean_step(name="Step", status="F")
+    assert (uut.result, uut.root.status) == ("F", "F")
+    assert (step.caused_seq_failure, step.caused_uut_failure) == (True, True)
+
+    step.status = "P"
+    assert (uut.result, uut.root.status) == ("P", "P")
+    assert (step.caused_seq_failure, step.caused_uut_failure) == (None, None)
+
+
+def test_assigned_status_and_result_win():
+    uut = new_report()
+    uut.root.add_boolean_step(name="Step", status="F")
+    uut.result = "P"
+    uut.root.status = "P"
+    assert (uut.result, uut.root.status) == ("P", "P")
+
+    uut.root.add_boolean_step(name="Another", status="F")
+    assert (uut.result, uut.root.status) == ("P", "P")
+
+
+def test_result_given_at_construction_is_kept():
+    uut = new_report(result="P")
+    uut.root.add_boolean_step(name="Step", status="F")
+    assert (uut.result, uut.root.status) == ("P", "F")
+
+
+def test_loaded_report_keeps_its_result_and_statuses():
+    uut = new_report()
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    sequence.add_boolean_step(name="Step", status="F")
+    data = json.loads(uut.model_dump_json(by_alias=True, exclude_none=True))
+    # As stored by a tool that does not roll up
+    data["result"], data["root"]["status"], data["root"]["steps"][0]["status"] = "P", "P", "P"
+    loaded = UUTReport.model_validate(data)
+    assert json.loads(loaded.model_dump_json(by_alias=True, exclude_none=True)) == data
+
+    # Stored values count as assigned, also when the report is changed afterwards
+    loaded.root.steps[0].add_boolean_step(name="Another", status="F")
+    assert (loaded.result, loaded.root.status, status_value(loaded.root.steps[0].status)) == ("P", "P", "P")
+
+
+def test_status_given_at_construction_is_kept():
+    sequence = SequenceCall(name="Sequence", status="P")
+    sequence.add_boolean_step(name="Step", status="F")
+    assert status_value(sequence.status) == "P"
+
+
+def test_caused_seq_failure_false_keeps_sequence_passed():
+    uut = new_report()
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    step = sequence.add_boolean_step(name="Step", status="P")
+    step.caused_seq_failure = False
+    step.status = "F"
+    assert (uut.result, status_value(sequence.status)) == ("P", "P")
+    assert step.caused_uut_failure is None
+
+
+def test_assigned_failure_flags_are_kept():
+    uut = new_report()
+    step = uut.root.add_boolean_step(name="Step", status="P")
+    step.caused_uut_failure = False
+    step.status = "F"
+    assert (step.caused_seq_failure, step.caused_uut_failure) == (True, False)
+
+    step.status = "P"
+    assert (step.caused_seq_failure, step.caused_uut_failure) == (None, False)
+
+
+def test_flags_in_serialized_report():
+    uut = new_report()
+    uut.root.add_boolean_step(name="Step", status="F")
+    step = json.loads(uut.model_dump_json(by_alias=True, exclude_none=True))["root"]["steps"][0]
+    assert (step["causedSeqFailure"], step["causedUUTFailure"]) == (True, True)
+
+
+def convert_teststand(capsys, main_status: str = "Passed", fail_every: int = 2,
+                      caused_sequence_failure: str = "") -> UUTReport:
+    document = corpus.teststand_xml(steps=3, depth=1, multi_width=1, chart_points=0, fail_every=fail_every, seed=1, sn="SN1")
+    main = b'<Prop Name="MainSequenceResults" Type="TEResult"><Prop Name="Status" Type="String"><Value>'
+    document = document.replace(main + b"Passed", main + main_status.encode())
+    if caused_sequence_failure:
+        failed = b'<Prop Name="Status" Type="String"><Value>Failed</Value></Prop>'
+        document = document.replace(failed, failed + b'<Prop Name="StepCausedSequenceFailure" Type="Boolean"><Value>'
+                                    + caused_sequence_failure.encode() + b'</Value></Prop>')
+    uut = teststand_xml_converter.TestStandXMLConverter().convert_report(io.BytesIO(document))
+    assert "StepCausedSequenceFailure" not in capsys.readouterr().out
+    return uut
+
+
+def test_teststand_failed_main_sequence_without_failed_steps(capsys):
+    for main_status in ("Failed", "Error"):
+        uut = convert_teststand(capsys, main_status, fail_every=0)
+        assert (uut.result, status_value(uut.root.status)) == ("F", "F")
+
+
+def test_teststand_passed_main_sequence_with_failed_step(capsys):
+    uut = convert_teststand(capsys, "Passed", fail_every=2)
+    assert status_value(uut.root.steps[0].status) == "F"
+    assert (uut.result, status_value(uut.root.status)) == ("P", "P")
+
+
+def test_teststand_ignored_failure(capsys):
+    uut = convert_teststand(capsys, caused_sequence_failure="False")
+    step = uut.root.steps[0]
+    assert (status_value(step.status), step.caused_seq_failure, step.caused_uut_failure) == ("F", False, None)
+    assert (uut.result, status_value(uut.root.status)) == ("P", "P")
+
+
+def test_teststand_step_failure_causes_sequence_failure(capsys):
+    uut = convert_teststand(capsys, "Failed", caused_sequence_failure="True")
+    step = uut.root.steps[0]
+    assert (step.caused_seq_failure, step.caused_uut_failure) == (True, True)
+    assert (uut.result, status_value(uut.root.status)) == ("F", "F")
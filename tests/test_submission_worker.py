@@ -0,0 +1,97 @@
+"""
+Background submission: futures, spooling, cancelling and draining on close
+"""
+import pytest
+import requests
+
+from pywats_api.WATS import WATS
+from pywats_api.mock_server import MockWatsServer
+from pywats_api.submission_worker import RAISE, SPOOL, QueueFullError, SubmissionWorker
+from tests.test_client_life_cycle import new_report
+
+
+def test_submit_resolves_the_future():
+    with MockWatsServer() as server:
+        with WATS(server.url, "token") as wats:
+            with SubmissionWorker(wats, workers=2) as worker:
+                reports = [new_report(sn=f"SN{number}") for number in range(5)]
+                futures = [worker.submit(report) for report in reports]
+                assert [future.result(timeout=10) for future in futures] == [True] * 5
+            assert worker.snapshot()["submitted"] == 5
+            assert set(server.reports) >= {str(report.id) for report in reports}
+
+
+def test_failures_are_set_on_the_future():
+    with MockWatsServer(error_status=400) as server:
+        with WATS(server.url, "token") as wats:
+            server.error_rate = 1.0
+            with SubmissionWorker(wats) as worker:
+                future = worker.submit(new_report())
+                with pytest.raises(requests.exceptions.HTTPError):
+                    future.result(timeout=10)
+            assert worker.snapshot()["failed"] == 1
+
+
+def test_server_errors_are_spooled(tmp_path):
+    with MockWatsServer(error_rate=1.0) as server:
+        with WATS(server.url, "token", spool_dir=str(tmp_path / "spool")) as wats:
+            with SubmissionWorker(wats, flush_interval=60) as worker:
+                assert worker.submit(new_report()).result(timeout=10) is False
+            assert len(wats.spool) == 1
+            assert worker.snapshot()["spooled"] == 1
+
+
+def test_full_queue(tmp_path):
+    with MockWatsServer(latency=0.5) as server:
+        with WATS(server.url, "token", spool_dir=str(tmp_path / "spool")) as wats:
+            queued = 0
+            with SubmissionWorker(wats, queue_size=1, on_full=RAISE) as worker:
+                with pytest.raises(QueueFullError):
+                    for _ in range(3):
+                        worker.submit(new_report())
+                        queued += 1
+            with SubmissionWorker(wats, queue_size=1, on_full=SPOOL) as worker:
+                futures = [worker.submit(new_report()) for _ in range(4)]
+                # Spooled on the calling thread
+                spooled = [future for future in futures if future.done()]
+                assert spooled and all(future.result() is False for future in spooled)
+            assert worker.snapshot()["spooled"] == len(spooled)
+            # The worker resubmits spooled reports
+            assert server.stats.reports + len(wats.spool) == queued + 4
+
+
+def test_cancelled_report_is_not_submitted():
+    with MockWatsServer(latency=0.5) as server:
+        with WATS(server.url, "token") as wats:
+            with SubmissionWorker(wats) as worker:
+                first = worker.submit(new_report())
+                second = worker.submit(new_report())
+                assert second.cancel()
+                assert first.result(timeout=10)
+                assert worker.flush(timeout=10)
+            assert worker.snapshot()["cancelled"] == 1
+            assert server.stats.reports == 1
+
+
+def test_close_drains_the_queue():
+    with MockWatsServer(latency=0.05) as server:
+        with WATS(server.url, "token") as wats:
+            worker = SubmissionWorker(wats)
+            futures = [worker.submit(new_report()) for _ in range(5)]
+            worker.close()
+            assert all(future.done() and future.result() for future in futures)
+            assert server.stats.reports == 5
+            assert worker.pending == 0
+            with pytest.raises(RuntimeError):
+                worker.submit(new_report())
+
+
+def test_close_timeout_spools_the_rest(tmp_path):
+    with MockWatsServer(latency=0.5) as server:
+        with WATS(server.url, "token", spool_dir=str(tmp_path / "spool")) as wats:
+            worker = SubmissionWorker(wats, flush_interval=60)
+            futures = [worker.submit(new_report()) for _ in range(4)]
+            worker.close(timeout=0.1)
+            results = [future.result(timeout=10) for future in futures]
+            assert results.count(False) == len(wats.spool) >= 2
+            assert worker.pending == 0
@@ -0,0 +1,80 @@
+"""
+Step validation (report.uut.validation)
+"""
+from report.chart import ChartSeries, ChartType
+from report.uut.steps.comp_operator import CompOp
+from report.uut.steps.sequence_call import SequenceCall
+from report.uut.uut_info import UUTInfo
+from report.uut.uut_report import UUTReport
+from report.uut.validation import (INVALID_COMP_OP, MISSING_LIMIT, STATUS_MISMATCH, TOO_FEW_MEASUREMENTS,
+                                   step_issues, validate_report)
+
+
+def new_report() -> UUTReport:
+    return UUTReport(pn="PN", sn="SN", rev="1", result="P", station_name="Station", process_code=10,
+                     location="Location", purpose="Test", info=UUTInfo(operator="Operator"))
+
+
+def codes(issues) -> list:
+    return [(issue.code, issue.field, issue.index) for issue in issues]
+
+
+def test_valid_report_has_no_issues():
+    uut = new_report()
+    uut.root.add_numeric_step(name="Numeric", value=1.0, unit="V", comp_op=CompOp.GELE, low_limit=0.0, high_limit=2.0)
+    uut.root.add_boolean_step(name="Boolean")
+    assert validate_report(uut) == []
+
+
+def test_numeric_step_limits():
+    uut = new_report()
+    sequence = uut.root.add_sequence_call(name="Sequence")
+    sequence.add_numeric_step(name="Numeric", value=1.0, unit="V", comp_op=CompOp.GELE, low_limit=0.0)
+    issues = validate_report(uut)
+    assert codes(issues) == [(MISSING_LIMIT, "high_limit", None)]
+    assert issues[0].path.endswith("/Sequence/Numeric")
+
+
+def test_invalid_comp_op():
+    uut = new_report()
+    step = uut.root.add_numeric_step(name="Numeric", value=1.0, unit="V")
+    step.measurement.comp_op = "BETWEEN"
+    assert codes(validate_report(uut)) == [(INVALID_COMP_OP, "comp_op", None)]
+
+
+def test_multi_numeric_step_collects_every_issue():
+    uut = new_report()
+    step = uut.root.add_multi_numeric_step(name="Multi", status="F")
+    step.add_measurement(name="First", value=1.0, comp_op=CompOp.GT, status="P")
+    assert codes(validate_report(uut)) == [(MISSING_LIMIT, "low_limit", 0),
+                                           (TOO_FEW_MEASUREMENTS, "measurements", None),
+                                           (STATUS_MISMATCH, "status", None)]
+    assert not step.validate_step()
+
+
+def test_chart_step_limits():
+    uut = new_report()
+    step = uut.root.add_chart_step(name="Chart", chart_type=ChartType.LINE, label="Chart", x_label="X", x_unit="s",
+                                   y_label="Y", y_unit="V", series=[ChartSeries(name="Series", xdata="0;1", ydata="0;1")])
+    step.add_measurement(name="Limit", value=1.0, comp_op=CompOp.GELE, low_limit=0.0)
+    assert codes(validate_report(uut)) == [(MISSING_LIMIT, "high_limit", 0)]
+    errors = []
+    assert not step.validate_step(errors=errors)
+    assert errors == [str(issue) for issue in step_issues(step)]
+
+
+def test_columnar_rows_are_checked_without_materializing():
+    uut = new_report()
+    uut.enable_columnar_steps()
+    uut.root.add_numeric_step(name="Numeric", value=1.0, unit="V", comp_op=CompOp.GELE, low_limit=0.0)
+    uut.root.add_boolean_step(name="Boolean")
+    assert codes(validate_report(uut)) == [(MISSING_LIMIT, "high_limit", None)]
+    assert uut.root.steps.row_count == 2
+
+
+def test_sequence_validate_step_reports_children():
+    sequence = SequenceCall(name="Sequence")
+    sequence.add_numeric_step(name="Numeric", value=1.0, unit="V", comp_op=CompOp.LT)
+    errors = []
+    assert not sequence.validate_step(trigger_children=True, errors=errors)
+    assert len(errors) == 1 and "Numeric" in errors[0]